@@ -0,0 +1,135 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.database import get_read_db
+from app.schemas.account import BalanceSnapshotResponse, MonthlySummaryResponse
+from app.models.account import Account
+from app.models.account_monthly_summary import AccountMonthlySummary
+from app.models.balance_history import BalanceHistory
+from app.models.user import User, UserRole
+from app.middleware.auth import get_current_user
+from app.services.balance_snapshots import downsample
+from app.services.statements import (
+    STATEMENT_FORMATS,
+    csv_chunks,
+    iter_statement_rows,
+    ndjson_chunks
+)
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/accounts", tags=["Accounts"])
+
+# Downsampling resolutions accepted by the history endpoint
+RESOLUTIONS = {
+    "raw": 0,
+    "5m": 300,
+    "1h": 3600,
+    "1d": 86400,
+}
+MAX_HISTORY_POINTS = 5000
+
+
+def get_account_for_user(db: Session, account_id: int, current_user: User) -> Account:
+    """Load an account the current user is allowed to read."""
+    account = db.query(Account).filter(Account.id == account_id).first()
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Account with ID {account_id} not found"
+        )
+
+    if current_user.role == UserRole.CLIENT and account.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only access your own account"
+        )
+
+    return account
+
+
+@router.get("/{account_id}/balance-history", response_model=List[BalanceSnapshotResponse])
+async def get_balance_history(
+    account_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: str = Query("raw", description=f"One of: {', '.join(RESOLUTIONS)}"),
+    limit: int = Query(1000, ge=1, le=MAX_HISTORY_POINTS),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Balance and equity history from periodic snapshots, optionally downsampled."""
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid resolution. Must be one of: {', '.join(RESOLUTIONS)}"
+        )
+
+    get_account_for_user(db, account_id, current_user)
+
+    query = db.query(BalanceHistory).filter(BalanceHistory.account_id == account_id)
+    if start is not None:
+        query = query.filter(BalanceHistory.recorded_at >= start)
+    if end is not None:
+        query = query.filter(BalanceHistory.recorded_at < end)
+
+    rows = query.order_by(BalanceHistory.recorded_at).yield_per(1000)
+    points = []
+    for point in downsample(rows, RESOLUTIONS[resolution]):
+        points.append(point)
+        if len(points) >= limit:
+            break
+    return points
+
+
+@router.get("/{account_id}/statement")
+async def export_statement(
+    account_id: int,
+    format: str = Query("csv", description=f"One of: {', '.join(STATEMENT_FORMATS)}"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the account's transactions and trades as CSV or NDJSON."""
+    if format not in STATEMENT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format. Must be one of: {', '.join(STATEMENT_FORMATS)}"
+        )
+
+    account = get_account_for_user(db, account_id, current_user)
+    rows = iter_statement_rows(db, account, start, end)
+    chunks = csv_chunks(rows) if format == "csv" else ndjson_chunks(rows)
+
+    logger.info(f"Statement export ({format}) for account {account.account_number} by {current_user.email}")
+    return StreamingResponse(
+        chunks,
+        media_type=STATEMENT_FORMATS[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="statement-{account.account_number}.{format}"'
+        }
+    )
+
+
+@router.get("/{account_id}/statement/summary", response_model=List[MonthlySummaryResponse])
+async def get_statement_summary(
+    account_id: int,
+    start_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    end_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Precomputed monthly totals for the account's statement."""
+    get_account_for_user(db, account_id, current_user)
+
+    query = db.query(AccountMonthlySummary).filter(AccountMonthlySummary.account_id == account_id)
+    if start_month is not None:
+        query = query.filter(AccountMonthlySummary.month >= start_month)
+    if end_month is not None:
+        query = query.filter(AccountMonthlySummary.month <= end_month)
+
+    return query.order_by(AccountMonthlySummary.month).all()
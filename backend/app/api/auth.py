@@ -4,8 +4,6 @@ from datetime import datetime
 from typing import Optional
 import uuid
 from pathlib import Path
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from app.database import get_db
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
 from app.models.user import User, UserRole, KYCStatus, AccountType
@@ -14,22 +12,22 @@ from app.models.account import Account
 from app.models.kyc_document import KYCDocument, DocumentType, DocumentStatus
 from app.middleware.auth import get_current_user
 from app.utils.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     create_refresh_token,
     generate_account_number
 )
 from app.utils.logging import log_security_event, log_kyc_upload, get_logger
+from app.utils.metrics import UPLOAD_BYTES
+from app.utils.rate_limit import limiter
 from app.utils.file_storage import save_kyc_document
 
 logger = get_logger(__name__)
-limiter = Limiter(key_func=get_remote_address)
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-# KYC file upload directory
+# KYC file upload directory, created on first upload
 KYC_UPLOAD_DIR = Path("kyc_uploads")
-KYC_UPLOAD_DIR.mkdir(exist_ok=True)
 
 # Allowed file types
 ALLOWED_MIME_TYPES = [
@@ -54,6 +52,7 @@ async def save_kyc_document(file: UploadFile, user_id: int, doc_type: DocumentTy
     # Read file content to check size
     content = await file.read()
     file_size = len(content)
+    UPLOAD_BYTES.labels("kyc").inc(file_size)
 
     if file_size > MAX_FILE_SIZE:
         raise HTTPException(
@@ -64,6 +63,7 @@ async def save_kyc_document(file: UploadFile, user_id: int, doc_type: DocumentTy
     # Generate unique filename
     file_extension = Path(file.filename).suffix
     unique_filename = f"{user_id}_{doc_type.value}_{uuid.uuid4()}{file_extension}"
+    KYC_UPLOAD_DIR.mkdir(exist_ok=True)
     file_path = KYC_UPLOAD_DIR / unique_filename
 
     # Save file
@@ -128,7 +128,7 @@ async def register(
 
         new_user = User(
             email=email,
-            hashed_password=get_password_hash(password),
+            hashed_password=await get_password_hash_async(password),
             name=name,
             phone=phone,
             role=UserRole.CLIENT,
@@ -261,7 +261,7 @@ async def login(request: Request, credentials: UserLogin, db: Session = Depends(
             )
 
         # Verify password
-        if not verify_password(credentials.password, user.hashed_password):
+        if not await verify_password_async(credentials.password, user.hashed_password):
             log_security_event("login", user_email=credentials.email, user_id=user.id, success=False, details="Invalid password")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,27 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from datetime import date, datetime, timezone
+from typing import List, Optional
+from app.config import settings
+from app.database import get_db, get_read_db
 from app.schemas.manager import (
     ProductSpreadCreate,
     ProductSpreadUpdate,
     ProductSpreadResponse,
     BranchCommissionUpdate,
     BranchResponse,
+    BranchCommissionTotals,
     LiquidityProviderCreate,
     LiquidityProviderUpdate,
     LiquidityProviderResponse,
     RoutingRuleCreate,
     RoutingRuleUpdate,
-    RoutingRuleResponse
+    RoutingRuleResponse,
+    ProductSpreadBulkUpsert,
+    LiquidityProviderBulkUpsert,
+    RoutingRuleBulkUpsert,
+    BulkItemResult,
+    BulkUpsertResponse,
+    AuditEventResponse,
+    AnalyticsRow,
+    ExposureRow
 )
 from app.models.product_spread import ProductSpread
 from app.models.branch import Branch
 from app.models.user import User, UserRole
-from app.models.liquidity_provider import LiquidityProvider
-from app.models.routing_rule import RoutingRule
-from app.middleware.auth import get_current_user
+from app.models.liquidity_provider import LiquidityProvider, LPStatus, LPType
+from app.models.routing_rule import RoutingRule, RoutingType
+from app.middleware.auth import WebSocketAuth, get_current_user, get_websocket_auth
+from app.services.analytics import DIMENSIONS, query_rollups
+from app.services.commissions import commission_engine
+from app.services.exposure import DIMENSIONS as EXPOSURE_DIMENSIONS, exposure_aggregator
+from app.utils.audit_log import get_audit_log
 from app.utils.logging import get_logger
+from app.utils.bulk import upsert_statement
+from app.utils.http_cache import conditional_response, resource_cache
+from app.utils.pagination import PageParams, apply_filters, page_payload, paginate, projection_query
 
 logger = get_logger(__name__)
 
@@ -38,16 +61,59 @@ def require_manager(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+def parse_dimensions(group_by: str, allowed) -> List[str]:
+    """Split a comma-separated ``group_by`` into distinct dimension names from ``allowed``."""
+    dimensions = [name.strip() for name in group_by.split(",") if name.strip()]
+    unknown = [name for name in dimensions if name not in allowed]
+    if unknown or len(set(dimensions)) != len(dimensions):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"group_by must list distinct dimensions from: {', '.join(allowed)}"
+        )
+    return dimensions
+
+
+def bulk_response(results: List[BulkItemResult]) -> BulkUpsertResponse:
+    """Summarize per-item bulk upsert results."""
+    return BulkUpsertResponse(
+        created=sum(1 for result in results if result.status == "created"),
+        updated=sum(1 for result in results if result.status == "updated"),
+        failed=sum(1 for result in results if result.status == "error"),
+        results=results
+    )
+
+
+def unknown_lp_detail(row: dict, known_lp_ids: set) -> Optional[str]:
+    """Error detail when a routing rule row names a liquidity provider not in ``known_lp_ids``."""
+    for column in ("lp_id", "backup_lp_id"):
+        if row[column] is not None and row[column] not in known_lp_ids:
+            return f"Liquidity provider with ID {row[column]} not found"
+    return None
+
+
 # ==================== Product Spreads Endpoints ====================
 
 @router.get("/spreads", response_model=List[ProductSpreadResponse])
 async def get_all_spreads(
+    request: Request,
+    category: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_manager)
 ):
-    """Get all product spreads (manager only)."""
-    spreads = db.query(ProductSpread).all()
-    return spreads
+    """Get product spreads ordered by symbol, one page at a time (manager only)."""
+    def build_page():
+        sort = [ProductSpread.symbol, ProductSpread.id]
+        query = projection_query(db, ProductSpread, ProductSpreadResponse, page, sort)
+        query = apply_filters(query, ProductSpread, {
+            "category": category,
+            "is_active": is_active,
+        })
+        spreads, next_cursor = paginate(query, sort, page)
+        return page_payload(spreads, next_cursor, ProductSpreadResponse, page, trusted=True)
+
+    return conditional_response(request, db, ProductSpread, build_page)
 
 
 @router.get("/spreads/{symbol}", response_model=ProductSpreadResponse)
@@ -92,6 +158,8 @@ async def create_spread(
             name=spread_data.name,
             base_spread=spread_data.base_spread,
             extra_spread=spread_data.extra_spread,
+            swap_long=spread_data.swap_long,
+            swap_short=spread_data.swap_short,
             category=spread_data.category,
             is_active=spread_data.is_active
         )
@@ -134,6 +202,10 @@ async def update_spread(
             spread.extra_spread = spread_data.extra_spread
         if spread_data.base_spread is not None:
             spread.base_spread = spread_data.base_spread
+        if spread_data.swap_long is not None:
+            spread.swap_long = spread_data.swap_long
+        if spread_data.swap_short is not None:
+            spread.swap_short = spread_data.swap_short
         if spread_data.is_active is not None:
             spread.is_active = spread_data.is_active
 
@@ -183,16 +255,92 @@ async def delete_spread(
         )
 
 
+@router.post("/spreads/bulk", response_model=BulkUpsertResponse)
+async def bulk_upsert_spreads(
+    bulk_data: ProductSpreadBulkUpsert,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_manager)
+):
+    """Create or update many product spreads, keyed by symbol, in one transaction (manager only)."""
+    results: List[Optional[BulkItemResult]] = [None] * len(bulk_data.items)
+    rows = {}
+    for index, item in enumerate(bulk_data.items):
+        symbol = item.symbol.upper()
+        if symbol in rows:
+            results[index] = BulkItemResult(key=symbol, status="error", detail="Duplicate symbol in batch")
+            continue
+        rows[symbol] = (index, {**item.model_dump(), "symbol": symbol})
+
+    try:
+        existing = {
+            symbol for (symbol,) in
+            db.query(ProductSpread.symbol).filter(ProductSpread.symbol.in_(list(rows)))
+        }
+        statement = upsert_statement(
+            db, ProductSpread, [row for _, row in rows.values()], ["symbol"],
+            returning=[ProductSpread.id, ProductSpread.symbol]
+        )
+        ids = {symbol: spread_id for spread_id, symbol in db.execute(statement)}
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Bulk spread upsert failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to upsert product spreads. Please try again later."
+        )
+
+    resource_cache.bump(ProductSpread.__tablename__)
+
+    for symbol, (index, _) in rows.items():
+        results[index] = BulkItemResult(
+            key=symbol,
+            id=ids.get(symbol),
+            status="updated" if symbol in existing else "created"
+        )
+
+    logger.info(f"{len(rows)} product spreads upserted by manager {current_user.email}")
+    return bulk_response(results)
+
+
 # ==================== Branch Commissions Endpoints ====================
 
 @router.get("/branches", response_model=List[BranchResponse])
 async def get_all_branches(
+    request: Request,
+    branch_status: Optional[str] = Query(None, alias="status"),
+    is_active: Optional[bool] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_manager)
+):
+    """Get branches with their commissions, one page at a time (manager only)."""
+    def build_page():
+        sort = [Branch.id]
+        query = projection_query(db, Branch, BranchResponse, page, sort)
+        query = apply_filters(query, Branch, {
+            "status": branch_status,
+            "is_active": is_active,
+        })
+        branches, next_cursor = paginate(query, sort, page)
+        return page_payload(branches, next_cursor, BranchResponse, page, trusted=True)
+
+    return conditional_response(request, db, Branch, build_page)
+
+
+@router.get("/branches/commissions", response_model=List[BranchCommissionTotals])
+async def get_branch_commission_totals(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_manager)
 ):
-    """Get all branches with their commissions (manager only)."""
-    branches = db.query(Branch).all()
-    return branches
+    """Commission charged on closed trades so far, per branch (manager only)."""
+    totals = commission_engine.branch_totals(db)
+    return [
+        BranchCommissionTotals(branch_id=branch_id, trades=branch.trades,
+                               lots=float(branch.lots), commission=float(branch.commission))
+        for branch_id, branch in sorted(totals.items())
+    ]
 
 
 @router.get("/branches/{branch_id}", response_model=BranchResponse)
@@ -233,6 +381,7 @@ async def update_branch_commission(
 
         db.commit()
         db.refresh(branch)
+        commission_engine.invalidate_rate(branch_id)
 
         logger.info(f"Branch commission updated for branch {branch_id} by manager {current_user.email}")
         return branch
@@ -250,12 +399,27 @@ async def update_branch_commission(
 
 @router.get("/liquidity-providers", response_model=List[LiquidityProviderResponse])
 async def get_all_liquidity_providers(
+    request: Request,
+    lp_status: Optional[LPStatus] = Query(None, alias="status"),
+    lp_type: Optional[LPType] = None,
+    is_active: Optional[bool] = None,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_manager)
 ):
-    """Get all liquidity providers (manager only)."""
-    lps = db.query(LiquidityProvider).all()
-    return lps
+    """Get liquidity providers ordered by priority, one page at a time (manager only)."""
+    def build_page():
+        sort = [LiquidityProvider.priority, LiquidityProvider.id]
+        query = projection_query(db, LiquidityProvider, LiquidityProviderResponse, page, sort)
+        query = apply_filters(query, LiquidityProvider, {
+            "status": lp_status,
+            "lp_type": lp_type,
+            "is_active": is_active,
+        })
+        lps, next_cursor = paginate(query, sort, page)
+        return page_payload(lps, next_cursor, LiquidityProviderResponse, page, trusted=True)
+
+    return conditional_response(request, db, LiquidityProvider, build_page)
 
 
 @router.get("/liquidity-providers/{lp_id}", response_model=LiquidityProviderResponse)
@@ -378,16 +542,96 @@ async def delete_liquidity_provider(
         )
 
 
+@router.post("/liquidity-providers/bulk", response_model=BulkUpsertResponse)
+async def bulk_upsert_liquidity_providers(
+    bulk_data: LiquidityProviderBulkUpsert,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_manager)
+):
+    """Create or update many liquidity providers, keyed by code, in one transaction (manager only)."""
+    results: List[Optional[BulkItemResult]] = [None] * len(bulk_data.items)
+    rows = {}
+    names = {}
+    for index, item in enumerate(bulk_data.items):
+        if item.code in rows or item.name in names:
+            results[index] = BulkItemResult(key=item.code, status="error", detail="Duplicate code or name in batch")
+            continue
+        row = item.model_dump()
+        row["lp_type"] = LPType(item.lp_type.value)
+        row["status"] = LPStatus(item.status.value)
+        rows[item.code] = (index, row)
+        names[item.name] = item.code
+
+    try:
+        existing_codes = set()
+        for code, name in db.query(LiquidityProvider.code, LiquidityProvider.name).filter(
+            (LiquidityProvider.code.in_(list(rows))) | (LiquidityProvider.name.in_(list(names)))
+        ):
+            existing_codes.add(code)
+            owner = names.get(name)
+            if owner is not None and owner != code:
+                # Name is already taken by a different provider
+                index, _ = rows.pop(owner)
+                results[index] = BulkItemResult(key=owner, status="error",
+                                                detail=f"Name '{name}' is used by provider {code}")
+
+        ids = {}
+        if rows:
+            statement = upsert_statement(
+                db, LiquidityProvider, [row for _, row in rows.values()], ["code"],
+                returning=[LiquidityProvider.id, LiquidityProvider.code]
+            )
+            ids = {code: lp_id for lp_id, code in db.execute(statement)}
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Bulk liquidity provider upsert failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to upsert liquidity providers. Please try again later."
+        )
+
+    resource_cache.bump(LiquidityProvider.__tablename__)
+
+    for code, (index, _) in rows.items():
+        results[index] = BulkItemResult(
+            key=code,
+            id=ids.get(code),
+            status="updated" if code in existing_codes else "created"
+        )
+
+    logger.info(f"{len(rows)} liquidity providers upserted by manager {current_user.email}")
+    return bulk_response(results)
+
+
 # ==================== Routing Rule Endpoints ====================
 
 @router.get("/routing-rules", response_model=List[RoutingRuleResponse])
 async def get_all_routing_rules(
+    request: Request,
+    symbol: Optional[str] = None,
+    routing_type: Optional[RoutingType] = None,
+    lp_id: Optional[int] = None,
+    is_active: Optional[bool] = None,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_manager)
 ):
-    """Get all routing rules (manager only)."""
-    rules = db.query(RoutingRule).order_by(RoutingRule.priority).all()
-    return rules
+    """Get routing rules ordered by priority, one page at a time (manager only)."""
+    def build_page():
+        sort = [RoutingRule.priority, RoutingRule.id]
+        query = projection_query(db, RoutingRule, RoutingRuleResponse, page, sort)
+        query = apply_filters(query, RoutingRule, {
+            "symbol": symbol.upper() if symbol else None,
+            "routing_type": routing_type,
+            "lp_id": lp_id,
+            "is_active": is_active,
+        })
+        rules, next_cursor = paginate(query, sort, page)
+        return page_payload(rules, next_cursor, RoutingRuleResponse, page, trusted=True)
+
+    return conditional_response(request, db, RoutingRule, build_page)
 
 
 @router.get("/routing-rules/{rule_id}", response_model=RoutingRuleResponse)
@@ -497,3 +741,196 @@ async def delete_routing_rule(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete routing rule. Please try again later."
         )
+
+
+@router.post("/routing-rules/bulk", response_model=BulkUpsertResponse)
+async def bulk_upsert_routing_rules(
+    bulk_data: RoutingRuleBulkUpsert,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_manager)
+):
+    """Create routing rules and update existing ones by ID in one transaction (manager only)."""
+    results: List[Optional[BulkItemResult]] = [None] * len(bulk_data.items)
+    updates = {}
+    creates = []
+    for index, item in enumerate(bulk_data.items):
+        row = item.model_dump(exclude={"id"})
+        row["routing_type"] = RoutingType(item.routing_type.value)
+        if item.id is None:
+            creates.append((index, {**row, "created_by": current_user.id}))
+        elif item.id in updates:
+            results[index] = BulkItemResult(key=str(item.id), status="error", detail="Duplicate ID in batch")
+        else:
+            updates[item.id] = (index, {**row, "id": item.id})
+
+    try:
+        if updates:
+            found = {rule_id for (rule_id,) in db.query(RoutingRule.id).filter(RoutingRule.id.in_(list(updates)))}
+            for rule_id in set(updates) - found:
+                index, _ = updates.pop(rule_id)
+                results[index] = BulkItemResult(key=str(rule_id), status="error",
+                                                detail=f"Routing rule with ID {rule_id} not found")
+
+        lp_ids = {row[column] for _, row in [*updates.values(), *creates]
+                  for column in ("lp_id", "backup_lp_id") if row[column] is not None}
+        if lp_ids:
+            known = {lp_id for (lp_id,) in
+                     db.query(LiquidityProvider.id).filter(LiquidityProvider.id.in_(list(lp_ids)))}
+            for rule_id, (index, row) in list(updates.items()):
+                detail = unknown_lp_detail(row, known)
+                if detail:
+                    del updates[rule_id]
+                    results[index] = BulkItemResult(key=str(rule_id), status="error", detail=detail)
+            valid_creates = []
+            for index, row in creates:
+                detail = unknown_lp_detail(row, known)
+                if detail:
+                    results[index] = BulkItemResult(key=row["name"], status="error", detail=detail)
+                else:
+                    valid_creates.append((index, row))
+            creates = valid_creates
+
+        if updates:
+            db.execute(upsert_statement(db, RoutingRule, [row for _, row in updates.values()], ["id"]))
+
+        created_ids = []
+        if creates:
+            created_ids = db.scalars(
+                insert(RoutingRule).returning(RoutingRule.id, sort_by_parameter_order=True),
+                [row for _, row in creates]
+            ).all()
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Bulk routing rule upsert failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to upsert routing rules. Please try again later."
+        )
+
+    resource_cache.bump(RoutingRule.__tablename__)
+
+    for rule_id, (index, _) in updates.items():
+        results[index] = BulkItemResult(key=str(rule_id), id=rule_id, status="updated")
+    for (index, row), rule_id in zip(creates, created_ids):
+        results[index] = BulkItemResult(key=row["name"], id=rule_id, status="created")
+
+    logger.info(f"{len(updates) + len(creates)} routing rules upserted by manager {current_user.email}")
+    return bulk_response(results)
+
+
+# ==================== Audit Log Endpoints ====================
+
+@router.get("/audit-log", response_model=List[AuditEventResponse])
+async def get_audit_events(
+    user_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    current_user: User = Depends(require_manager)
+):
+    """Look up audit events by user and/or time range, oldest first (manager only)."""
+    audit_log = get_audit_log()
+    if audit_log is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Audit log is not enabled"
+        )
+
+    records = audit_log.query(
+        user_id=user_id,
+        start=start.timestamp() if start else None,
+        end=end.timestamp() if end else None,
+        limit=limit
+    )
+    return [
+        AuditEventResponse(
+            seq=record.seq,
+            timestamp=datetime.fromtimestamp(record.timestamp, timezone.utc),
+            category=record.category,
+            event=record.event,
+            user_id=record.user_id,
+            data=record.data
+        )
+        for record in records
+    ]
+
+
+# ==================== Analytics Endpoints ====================
+
+@router.get("/analytics", response_model=List[AnalyticsRow], response_model_exclude_unset=True)
+async def get_analytics(
+    group_by: str = Query("day,branch,symbol", description="Comma-separated dimensions: day, branch, symbol"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    branch_id: Optional[int] = None,
+    symbol: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_manager)
+):
+    """Closed-trade volume, P&L, commission and active clients from the daily rollups (manager only)."""
+    dimensions = parse_dimensions(group_by, DIMENSIONS)
+    return query_rollups(db, dimensions, date_from=date_from, date_to=date_to,
+                         branch_id=branch_id, symbol=symbol)
+
+
+# ==================== Exposure Endpoints ====================
+
+@router.get("/exposure", response_model=List[ExposureRow], response_model_exclude_unset=True)
+async def get_exposure(
+    group_by: str = Query("symbol,branch,routing", description="Comma-separated dimensions: symbol, branch, routing"),
+    symbol: Optional[str] = None,
+    branch_id: Optional[int] = None,
+    routing_type: Optional[RoutingType] = None,
+    current_user: User = Depends(require_manager)
+):
+    """Net lots, notional and unrealized P&L of open positions, from the live exposure book (manager only)."""
+    dimensions = parse_dimensions(group_by, EXPOSURE_DIMENSIONS)
+    await run_in_threadpool(exposure_aggregator.ensure_loaded)
+    return exposure_aggregator.snapshot(dimensions, symbol=symbol.upper() if symbol else None,
+                                        branch_id=branch_id, routing_type=routing_type)
+
+
+@router.websocket("/exposure/stream")
+async def stream_exposure(
+    websocket: WebSocket,
+    auth: Optional[WebSocketAuth] = Depends(get_websocket_auth)
+):
+    """
+    Stream exposure by symbol, branch and routing type (manager only).
+
+    Authenticate with the ``bearer`` subprotocol or an Authorization header
+    (see ``get_websocket_auth``). The first message is a full ``snapshot``;
+    after that a ``delta`` carrying only the buckets that changed is sent at
+    most every ``EXPOSURE_STREAM_INTERVAL_SECONDS``. The stream is closed with
+    1008 when the access token expires; reconnect with a fresh one.
+    """
+    if auth is None or auth.user.role != UserRole.MANAGER:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept(subprotocol=auth.subprotocol)
+    await run_in_threadpool(exposure_aggregator.ensure_loaded)
+    version, rows = exposure_aggregator.changes_since(0)
+    try:
+        await websocket.send_json({"type": "snapshot", "version": version, "rows": rows})
+        while True:
+            remaining = auth.expires_at - time.time()
+            try:
+                message = await asyncio.wait_for(websocket.receive(),
+                                                 timeout=min(settings.EXPOSURE_STREAM_INTERVAL_SECONDS, remaining))
+                if message["type"] == "websocket.disconnect":
+                    return
+            except asyncio.TimeoutError:
+                pass
+            if time.time() >= auth.expires_at:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token expired")
+                return
+
+            await run_in_threadpool(exposure_aggregator.ensure_loaded)
+            version, rows = exposure_aggregator.changes_since(version)
+            if rows:
+                await websocket.send_json({"type": "delta", "version": version, "rows": rows})
+    except WebSocketDisconnect:
+        return
@@ -0,0 +1,167 @@
+from decimal import Decimal
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.schemas.transaction import DepositRequest, WithdrawRequest, TransactionResponse
+from app.models.account import Account, AccountStatus
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.models.user import User, UserRole
+from app.middleware.auth import require_roles
+from app.services.statements import record_transaction
+from app.utils.idempotency import (
+    IDEMPOTENCY_HEADER,
+    idempotency_store,
+    transaction_fingerprint,
+    validate_idempotency_key
+)
+from app.utils.logging import log_transaction, get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/transactions", tags=["Transactions"])
+
+
+def get_account_for_posting(db: Session, account_id: int, current_user: User) -> Account:
+    """Load and row-lock an account to post to."""
+    account = db.query(Account).filter(Account.id == account_id).with_for_update().first()
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Account with ID {account_id} not found"
+        )
+
+    if account.status != AccountStatus.ACTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Account is not active"
+        )
+
+    return account
+
+
+def post_transaction(
+    db: Session,
+    current_user: User,
+    account_id: int,
+    transaction_type: TransactionType,
+    amount: float,
+    description: Optional[str],
+    idempotency_key: Optional[str]
+) -> dict:
+    """
+    Post a deposit or withdrawal exactly once per idempotency key.
+
+    A repeated key returns the original transaction without touching balances.
+    """
+    key = validate_idempotency_key(idempotency_key)
+    fingerprint = transaction_fingerprint(account_id, transaction_type.value, amount)
+
+    if key is not None:
+        previous = idempotency_store.lookup(db, key, current_user.id, fingerprint)
+        if previous is not None:
+            logger.info(f"Replayed {transaction_type.value} for idempotency key {key}")
+            return previous
+
+    account = get_account_for_posting(db, account_id, current_user)
+
+    delta = Decimal(str(amount)).quantize(Decimal("0.01"))
+    balance_before = Decimal(account.balance or 0)
+    if transaction_type == TransactionType.WITHDRAW:
+        if delta > Decimal(account.wallet_balance or 0):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient wallet balance"
+            )
+        delta = -delta
+
+    try:
+        account.balance = balance_before + delta
+        account.wallet_balance = Decimal(account.wallet_balance or 0) + delta
+
+        transaction = Transaction(
+            user_id=account.user_id,
+            account_id=account.id,
+            transaction_type=transaction_type,
+            amount=abs(delta),
+            balance_before=balance_before,
+            balance_after=account.balance,
+            description=description,
+            reference=key,
+            status=TransactionStatus.COMPLETED,
+            performed_by_id=current_user.id if current_user.id != account.user_id else None
+        )
+        db.add(transaction)
+        record_transaction(db, transaction)
+        db.commit()
+        db.refresh(transaction)
+
+    except IntegrityError:
+        # A concurrent request with the same key won the race; replay its result
+        db.rollback()
+        if key is None:
+            raise
+        previous = idempotency_store.lookup(db, key, current_user.id, fingerprint)
+        if previous is None:
+            raise
+        return previous
+
+    log_transaction(transaction_type.value, account.user_id, float(abs(delta)),
+                    transaction_id=transaction.id, details=f"Account: {account.account_number}")
+
+    if key is None:
+        return TransactionResponse.model_validate(transaction).model_dump(mode="json")
+    return idempotency_store.remember(transaction)
+
+
+@router.post("/deposit", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
+async def deposit(
+    deposit_data: DepositRequest,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles(UserRole.MANAGER, UserRole.ADMIN))
+):
+    """
+    Deposit funds into an account (manager or admin only: the money has been received).
+
+    Retries with the same Idempotency-Key are replayed.
+    """
+    try:
+        return post_transaction(db, current_user, deposit_data.account_id, TransactionType.DEPOSIT,
+                                deposit_data.amount, deposit_data.description, idempotency_key)
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Deposit failed for account {deposit_data.account_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to post deposit. Please try again later."
+        )
+
+
+@router.post("/withdraw", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
+async def withdraw(
+    withdraw_data: WithdrawRequest,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles(UserRole.MANAGER, UserRole.ADMIN))
+):
+    """
+    Withdraw funds from an account (manager or admin only: the money has been paid out).
+
+    Retries with the same Idempotency-Key are replayed.
+    """
+    try:
+        return post_transaction(db, current_user, withdraw_data.account_id, TransactionType.WITHDRAW,
+                                withdraw_data.amount, withdraw_data.description, idempotency_key)
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Withdrawal failed for account {withdraw_data.account_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to post withdrawal. Please try again later."
+        )
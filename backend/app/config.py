@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 from functools import lru_cache
 
 
@@ -12,6 +12,10 @@ class Settings(BaseSettings):
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # Pre-forked workers started by `python -m app.server` (0: one per available core)
+    WORKERS: int = 0
+    # Seconds a stopping worker may spend finishing in-flight requests
+    WORKER_GRACEFUL_TIMEOUT_SECONDS: int = 30
 
     # Database
     DATABASE_URL: str
@@ -19,6 +23,76 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 10
     DB_POOL_TIMEOUT: int = 30
     DB_POOL_RECYCLE: int = 3600
+    # Pool checkouts that wait longer than this are logged and counted
+    DB_SLOW_CHECKOUT_MS: int = 100
+    # Statements repeated this many times in one request are reported as a likely N+1
+    DB_REPEATED_QUERY_THRESHOLD: int = 5
+
+    # Read replica for history, statement and dashboard reads (unset: everything uses the primary)
+    DATABASE_REPLICA_URL: Optional[str] = None
+    # Reads fall back to the primary while the replica is further behind than this
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 1.0
+    # After a user's own write, their reads stay on the primary for this long
+    DB_READ_YOUR_WRITES_SECONDS: float = 10.0
+
+    # Balance snapshots (run in a single process; disable on extra workers)
+    BALANCE_SNAPSHOT_ENABLED: bool = True
+    BALANCE_SNAPSHOT_INTERVAL_SECONDS: int = 300
+
+    # Branch commission on closed trades, charged in one transaction per account per batch
+    COMMISSION_ACCRUAL_ENABLED: bool = True
+    COMMISSION_BATCH_INTERVAL_SECONDS: int = 60
+    # Branch rates are re-read after this long (immediately in the worker that changed one)
+    COMMISSION_RATE_TTL_SECONDS: int = 300
+    # Per-branch dashboard totals are recomputed from trades this often
+    COMMISSION_TOTALS_REFRESH_SECONDS: int = 300
+    # Every batch also charges trades closed this recently that are still uncharged, e.g. queued by a dead worker
+    COMMISSION_SWEEP_HOURS: int = 24
+
+    # Dealing desk exposure: reload open positions this often to pick up other workers' trades
+    EXPOSURE_RESYNC_SECONDS: int = 60
+    # Seconds between updates on the exposure WebSocket stream
+    EXPOSURE_STREAM_INTERVAL_SECONDS: float = 0.5
+
+    # B-Book hedging: net exposure per symbol left unhedged before an offsetting LP order is sent,
+    # checked once per window so small client trades are batched into fewer, larger hedges
+    HEDGE_THRESHOLD_LOTS: float = 1.0
+    HEDGE_WINDOW_SECONDS: float = 1.0
+    # A hedge not answered within this long (or LP_HTTP_TIMEOUT_SECONDS, which should be shorter) may still
+    # fill: it is recorded as unknown and the symbol is held until the LP reports the order's status
+    HEDGE_ORDER_TIMEOUT_SECONDS: float = 15.0
+    # Run the hedge loop in this process (one process only: disabled on extra server workers)
+    HEDGING_ENABLED: bool = False
+
+    # Liquidity provider connections: stream LP quotes into the exposure book in every worker
+    LP_CONNECTIONS_ENABLED: bool = False
+    # Per LP: pooled keep-alive connections, orders in flight (more wait for a slot) and request timeout
+    LP_MAX_CONNECTIONS: int = 10
+    LP_MAX_CONCURRENCY: int = 20
+    LP_HTTP_TIMEOUT_SECONDS: float = 10.0
+    # Multiplex orders over one HTTP/2 connection per LP (needs the h2 package)
+    LP_HTTP2: bool = False
+    # Market data reconnects wait this long after the first failure, doubling up to the maximum
+    LP_RECONNECT_MIN_SECONDS: float = 0.5
+    LP_RECONNECT_MAX_SECONDS: float = 30.0
+
+    # Overnight swap: weekday (0 = Monday) whose rollover charges three nights to cover the weekend
+    SWAP_TRIPLE_WEEKDAY: int = 2
+
+    # Logging: plain text unless LOG_JSON turns on one JSON object per line
+    LOG_JSON: bool = False
+    LOG_FILE: str = ""
+    LOG_FILE_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_FILE_BACKUP_COUNT: int = 5
+    LOG_QUEUE_SIZE: int = 10000
+    # Fraction of successful API request logs to keep (errors are always kept)
+    API_LOG_SAMPLE_RATE: float = 0.1
+
+    # Audit log (append-only, hash-chained record of security and transaction events)
+    AUDIT_LOG_ENABLED: bool = True
+    AUDIT_LOG_DIR: str = "audit_logs"
+    AUDIT_LOG_SEGMENT_BYTES: int = 64 * 1024 * 1024
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -1,27 +1,64 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from starlette.requests import HTTPConnection
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.utils.db_pool import create_pooled_engine
+from app.utils.read_replica import ReplicaRouter, request_user_id, track_writes
+
+
+def _engine_settings() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "slow_checkout_ms": settings.DB_SLOW_CHECKOUT_MS,
+        "echo": settings.DEBUG,
+    }
+
 
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_pre_ping=True,
-    echo=settings.DEBUG
-)
+engine = create_pooled_engine(settings.DATABASE_URL, name="primary", **_engine_settings())
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional read replica for read-only dependencies (see get_read_db)
+replica_engine = create_pooled_engine(settings.DATABASE_REPLICA_URL, name="replica", **_engine_settings()) \
+    if settings.DATABASE_REPLICA_URL else None
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) \
+    if replica_engine is not None else None
+
+read_router = ReplicaRouter(
+    SessionLocal,
+    ReadSessionLocal,
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    lag_check_interval=settings.DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+    read_your_writes_seconds=settings.DB_READ_YOUR_WRITES_SECONDS
+)
+track_writes(lambda: read_router)
+
 # Create base class for models
 Base = declarative_base()
 
 
-# Dependency to get database session
-def get_db():
+# Dependency to get database session (HTTP requests and WebSocket handshakes alike)
+def get_db(request: HTTPConnection):
     db = SessionLocal()
+    if read_router.replica is not None:
+        # Commits by this session keep the user's reads on the primary for a while
+        db.info["user_id"] = request_user_id(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Dependency for read-only endpoints: a replica session when it is safe to use one
+def get_read_db(request: Request):
+    user_id = request_user_id(request) if read_router.replica is not None else None
+    db = read_router.session(user_id)
     try:
         yield db
     finally:
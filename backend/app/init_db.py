@@ -1,17 +1,90 @@
 """
 Initialize database with default data
 Run this script after creating the database to populate it with initial data
+
+    python -m app.init_db                      # demo branches, spreads and users
+    python -m app.init_db --migrate            # schema only, once per deploy
+    python -m app.init_db --seed --users 100000 --trades 1000000 --transactions 1000000
+
+The ``--seed`` mode generates a large deterministic dataset for benchmarks
+and staging. Rows are produced as tuples and written with the DBAPI's
+``executemany`` (or ``COPY`` on PostgreSQL), skipping the ORM, and every
+seeded user shares one precomputed password hash.
 """
+import argparse
+import csv
+import io
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, Enum, Numeric, func, inspect, select, text
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.orm import Session
 from app.database import SessionLocal, engine, Base
-from app.models import User, Branch, Account, UserRole, AccountType, ProductSpread
+from app.models import (
+    User, Branch, Account, UserRole, AccountType, KYCStatus, ProductSpread, Trade, Transaction,
+    AccountMonthlySummary
+)
+from app.models.trade import OrderType, TradeStatus, TradeType
+from app.models.transaction import TransactionStatus, TransactionType
+from app.services.analytics import rebuild_rollups
 from app.utils.security import get_password_hash, generate_account_number
 
 
+# Columns added to tables that deployed databases already have; create_all never alters an existing table
+ADDED_COLUMNS = (
+    ("product_spreads", "swap_long"),
+    ("product_spreads", "swap_short"),
+)
+
+
+def add_missing_columns(conn: Connection) -> List[str]:
+    """``ALTER TABLE ... ADD COLUMN`` each of ``ADDED_COLUMNS`` its table lacks; returns those added."""
+    added = []
+    for table_name, column_name in ADDED_COLUMNS:
+        if column_name in {column["name"] for column in inspect(conn).get_columns(table_name)}:
+            continue
+        column = Base.metadata.tables[table_name].c[column_name]
+        ddl = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(dialect=conn.dialect)}"
+        if column.default is not None and column.default.is_scalar:
+            ddl += f" DEFAULT {column.default.arg}"
+        conn.execute(text(ddl))
+        added.append(f"column {table_name}.{column_name}")
+    return added
+
+
+def add_missing_indexes(conn: Connection) -> List[str]:
+    """Create the model indexes that existing tables lack; returns their names."""
+    inspector = inspect(conn)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                index.create(conn)
+                added.append(f"index {index.name}")
+    return added
+
+
+def migrate(bind: Engine = engine) -> List[str]:
+    """
+    Create any missing tables, add the ``ADDED_COLUMNS`` that existing tables
+    predate and create their missing indexes. Returns what was added.
+
+    Run once per deploy, before the workers start; workers never issue DDL
+    themselves.
+    """
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as conn:
+        return add_missing_columns(conn) + add_missing_indexes(conn)
+
+
 def init_db():
     """Initialize database with default data."""
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    migrate()
 
     db = SessionLocal()
 
@@ -258,6 +331,317 @@ def init_db():
         db.close()
 
 
+# ==================== Bulk seeding ====================
+
+SEED_PASSWORD = "client123"
+SEED_MANAGER_EMAIL = "manager@seed.example.com"
+SEED_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+SEED_CHUNK_SIZE = 20000
+
+# (symbol, name, category, price, swap long, swap short); swaps per lot per night in USD
+SEED_SYMBOLS = (
+    ("EURUSD", "Euro / US Dollar", "forex", 1.08, -7.2, 2.1),
+    ("GBPUSD", "British Pound / US Dollar", "forex", 1.26, -4.5, 0.8),
+    ("USDJPY", "US Dollar / Japanese Yen", "forex", 149.5, 12.4, -25.6),
+    ("XAUUSD", "Gold / US Dollar", "commodity", 2030.0, -45.0, 22.5),
+    ("BTCUSD", "Bitcoin / US Dollar", "crypto", 43000.0, -25.0, -25.0),
+)
+
+TRANSACTION_COLUMNS = ("id", "user_id", "account_id", "transaction_type", "amount",
+                       "balance_before", "balance_after", "status", "created_at")
+TRADE_COLUMNS = ("id", "user_id", "symbol", "trade_type", "order_type", "lots", "open_price",
+                 "close_price", "profit_loss", "commission", "swap", "status",
+                 "opened_at", "created_at", "closed_at")
+
+
+def seed_client_email(index: int) -> str:
+    """Email of the ``index``-th seeded client (1-based); client n owns account n."""
+    return f"user{index}@seed.example.com"
+
+
+def _copy_value(value) -> object:
+    # CSV COPY: NULL is an unquoted empty field; booleans must be t/f
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return value
+
+
+def _sqlite_datetime(value: datetime) -> str:
+    return value.replace(tzinfo=None).isoformat(" ", "microseconds")
+
+
+def _bind_processor(column_type, dialect):
+    """Bind processor for one column, with cheaper equivalents for the hot types."""
+    impl = column_type.dialect_impl(dialect)
+    process = impl.bind_processor(dialect)
+    if process is None:
+        return None
+    if isinstance(impl, Enum) and impl.enum_class is not None:
+        # Precomputed member -> stored value lookup instead of per-row validation
+        return {member: process(member) for member in impl.enum_class}.__getitem__
+    if dialect.name == "sqlite":
+        if isinstance(impl, Numeric):
+            # sqlite3 binds Python floats natively; seeded numerics are floats
+            return None
+        if isinstance(impl, DateTime) and \
+                getattr(impl, "_storage_format", None) == sqlite.DATETIME._storage_format:
+            # The default storage format is naive ISO 8601 with microseconds
+            return _sqlite_datetime
+    return process
+
+
+def bulk_load(conn: Connection, model, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+    """
+    Load ``rows`` (tuples in ``columns`` order) into ``model``'s table.
+
+    Values go through each column type's bind processor, so enums and
+    datetimes are stored exactly as the ORM would store them; numeric values
+    are expected as ``float``/``int``. PostgreSQL
+    gets ``COPY ... FROM STDIN``; other databases a raw ``executemany`` per
+    chunk. Returns the number of rows written.
+    """
+    table = model.__table__
+    dialect = conn.dialect
+    processors = [_bind_processor(table.c[name].type, dialect) for name in columns]
+    converters = [(i, p) for i, p in enumerate(processors) if p is not None]
+
+    def convert(row: tuple) -> tuple:
+        if not converters:
+            return row
+        row = list(row)
+        for i, process in converters:
+            if row[i] is not None:
+                row[i] = process(row[i])
+        return tuple(row)
+
+    cursor = conn.connection.dbapi_connection.cursor()
+    column_list = ", ".join(columns)
+    if dialect.name == "postgresql":
+        statement = f"COPY {table.name} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+    else:
+        marker = {"qmark": "?", "numeric": None, "named": None}.get(dialect.paramstyle, "%s")
+        if marker is None:
+            raise NotImplementedError(f"Bulk load does not support paramstyle {dialect.paramstyle}")
+        statement = f"INSERT INTO {table.name} ({column_list}) VALUES ({', '.join([marker] * len(columns))})"
+
+    written = 0
+    chunk: List[tuple] = []
+
+    def flush():
+        if dialect.name == "postgresql":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows([_copy_value(v) for v in row] for row in chunk)
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+        else:
+            cursor.executemany(statement, chunk)
+
+    for row in rows:
+        chunk.append(convert(row))
+        if len(chunk) >= SEED_CHUNK_SIZE:
+            flush()
+            written += len(chunk)
+            chunk = []
+    if chunk:
+        flush()
+        written += len(chunk)
+    cursor.close()
+    return written
+
+
+def _transaction_rows(rng: random.Random, balances: List[float], count: int,
+                      summaries: Optional[Dict[Tuple[int, str], list]] = None) -> Iterator[tuple]:
+    """
+    Generate ``count`` deposits and withdrawals, updating ``balances`` in place.
+
+    When ``summaries`` is given, the monthly statement totals for each
+    (account, month) are accumulated into it as
+    ``[opening, closing, deposits, withdrawals, count]``.
+    """
+    users = len(balances) - 1
+    deposit, withdraw, completed = TransactionType.DEPOSIT, TransactionType.WITHDRAW, TransactionStatus.COMPLETED
+    uniform = rng.random
+    for t in range(1, count + 1):
+        account_id = int(uniform() * users) + 1
+        before = balances[account_id]
+        if before > 100 and uniform() < 0.3:
+            kind, amount = withdraw, round(10 + uniform() * (before / 2 - 10), 2)
+            after = before - amount
+        else:
+            kind, amount = deposit, round(100 + uniform() * 4900, 2)
+            after = before + amount
+        balances[account_id] = after
+        created_at = SEED_EPOCH - timedelta(seconds=(count - t) * 30)
+
+        if summaries is not None:
+            key = (account_id, f"{created_at.year:04d}-{created_at.month:02d}")
+            totals = summaries.get(key)
+            if totals is None:
+                totals = summaries[key] = [before, after, 0.0, 0.0, 0]
+            totals[1] = after
+            totals[2 if kind is deposit else 3] += amount
+            totals[4] += 1
+
+        yield (t, account_id + 1, account_id, kind, amount, round(before, 2), round(after, 2),
+               completed, created_at)
+
+
+def _trade_rows(rng: random.Random, users: int, count: int) -> Iterator[tuple]:
+    lot_sizes = (0.01, 0.1, 0.5, 1.0, 2.0)
+    sides = (TradeType.BUY, TradeType.SELL)
+    # rng.random() is several times cheaper than randint/choice/uniform
+    uniform = rng.random
+    for t in range(1, count + 1):
+        symbol, _, _, price, _, _ = SEED_SYMBOLS[int(uniform() * len(SEED_SYMBOLS))]
+        open_price = round(price * (0.98 + uniform() * 0.04), 5)
+        opened_at = SEED_EPOCH - timedelta(minutes=int(uniform() * 525600) + 1)
+        user_id = int(uniform() * users) + 2
+        side = sides[uniform() < 0.5]
+        lots = lot_sizes[int(uniform() * len(lot_sizes))]
+        if uniform() < 0.9:
+            yield (t, user_id, symbol, side, OrderType.MARKET, lots, open_price,
+                   round(open_price * (0.995 + uniform() * 0.01), 5), round(uniform() * 1000 - 500, 2),
+                   5.0, 0.0, TradeStatus.CLOSED,
+                   opened_at, opened_at, opened_at + timedelta(minutes=int(uniform() * 4320) + 1))
+        else:
+            yield (t, user_id, symbol, side, OrderType.MARKET, lots, open_price,
+                   None, 0.0, 5.0, 0.0, TradeStatus.OPEN, opened_at, opened_at, None)
+
+
+def _reset_sequences(conn: Connection, models: Sequence) -> None:
+    """Move PostgreSQL id sequences past explicitly inserted ids."""
+    if conn.dialect.name != "postgresql":
+        return
+    for model in models:
+        table = model.__tablename__
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+        ))
+
+
+def seed_database(
+    bind: Optional[Engine] = None,
+    branches: int = 10,
+    users: int = 1000,
+    trades: int = 10000,
+    transactions: int = 10000,
+    random_seed: int = 42,
+    reset: bool = False
+) -> Dict[str, int]:
+    """
+    Generate a deterministic dataset of the given size.
+
+    The same ``random_seed`` and sizes always produce the same rows. Client
+    ``n`` (see ``seed_client_email``) owns account ``n``; every seeded user
+    logs in with ``SEED_PASSWORD``. Refuses to run on a non-empty database
+    unless ``reset`` is set, in which case all tables are dropped first.
+    Returns row counts per table.
+    """
+    bind = bind or engine
+    rng = random.Random(random_seed)
+    # One bcrypt call for the whole dataset
+    password_hash = get_password_hash(SEED_PASSWORD)
+
+    if reset:
+        Base.metadata.drop_all(bind=bind)
+    Base.metadata.create_all(bind=bind)
+
+    with bind.begin() as conn:
+        if conn.execute(select(func.count()).select_from(Branch)).scalar():
+            raise RuntimeError("Database already has data; pass reset=True (--reset) to replace it")
+
+        bulk_load(conn, Branch,
+                  ("id", "name", "code", "referral_code", "leverage", "commission_per_lot",
+                   "admin_email", "admin_name", "status", "is_active"),
+                  ((b, f"Branch {b}", f"BR-{b:04d}", f"BR{b:04d}-REF", 100, 5.0,
+                    f"admin{b}@seed.example.com", f"Branch {b} Admin", "active", True)
+                   for b in range(1, branches + 1)))
+        bulk_load(conn, ProductSpread,
+                  ("symbol", "name", "category", "base_spread", "extra_spread", "swap_long", "swap_short",
+                   "is_active"),
+                  ((symbol, name, category, 1.0, 0.5, swap_long, swap_short, True)
+                   for symbol, name, category, _, swap_long, swap_short in SEED_SYMBOLS))
+
+        user_columns = ("id", "email", "hashed_password", "name", "role", "account_type", "account_number",
+                        "branch_id", "is_active", "is_verified", "kyc_status", "created_at")
+        bulk_load(conn, User, user_columns, [
+            (1, SEED_MANAGER_EMAIL, password_hash, "Seed Manager", UserRole.MANAGER, None, None,
+             None, True, True, None, SEED_EPOCH)
+        ])
+        bulk_load(conn, User, user_columns, (
+            (n + 1, seed_client_email(n), password_hash, f"Client {n}", UserRole.CLIENT, AccountType.STANDARD,
+             f"ACC-{n:08d}", rng.randint(1, branches), True, True, KYCStatus.APPROVED,
+             SEED_EPOCH - timedelta(days=rng.randint(30, 730)))
+            for n in range(1, users + 1)
+        ))
+
+        # Accounts need their final balances before the ledger rows that produce
+        # them, so the ledger is generated twice from the same RNG state
+        state = rng.getstate()
+        balances = [0.0] * (users + 1)
+        summaries: Dict[Tuple[int, str], list] = {}
+        for _ in _transaction_rows(rng, balances, transactions, summaries):
+            pass
+        bulk_load(conn, Account,
+                  ("id", "user_id", "account_number", "balance", "wallet_balance", "trading_balance", "leverage"),
+                  ((n, n + 1, f"ACC-{n:08d}", round(balances[n], 2), round(balances[n], 2), 0.0, 100)
+                   for n in range(1, users + 1)))
+        rng.setstate(state)
+        bulk_load(conn, Transaction, TRANSACTION_COLUMNS, _transaction_rows(rng, [0.0] * (users + 1), transactions))
+        bulk_load(conn, Trade, TRADE_COLUMNS, _trade_rows(rng, users, trades))
+
+        # The same totals rebuild_monthly_summaries() would compute, without reading the ledger back
+        bulk_load(conn, AccountMonthlySummary,
+                  ("account_id", "month", "opening_balance", "closing_balance", "deposits", "withdrawals",
+                   "trade_pnl", "commissions", "other", "transaction_count"),
+                  ((account_id, month, round(opening, 2), round(closing, 2), round(deposits, 2),
+                    round(withdrawals, 2), 0.0, 0.0, 0.0, tx_count)
+                   for (account_id, month), (opening, closing, deposits, withdrawals, tx_count)
+                   in sorted(summaries.items())))
+
+        _reset_sequences(conn, (Branch, ProductSpread, User, Account, Transaction, Trade, AccountMonthlySummary))
+
+    with Session(bind) as db:
+        rebuild_rollups(db)
+
+    return {"branches": branches, "users": users + 1, "accounts": users,
+            "trades": trades, "transactions": transactions}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Initialize the trading platform database")
+    parser.add_argument("--migrate", action="store_true", help="Only create missing tables and indexes")
+    parser.add_argument("--seed", action="store_true", help="Generate a large deterministic dataset")
+    parser.add_argument("--branches", type=int, default=10)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--trades", type=int, default=10000)
+    parser.add_argument("--transactions", type=int, default=10000)
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Drop existing tables before seeding")
+    args = parser.parse_args(argv)
+
+    if args.migrate:
+        for change in migrate():
+            print(f"  added {change}")
+        print("✓ Database schema up to date")
+        return
+
+    if not args.seed:
+        print("Initializing Imtiaz Trading Platform Database...\n")
+        init_db()
+        return
+
+    import time
+    started = time.perf_counter()
+    counts = seed_database(
+        branches=args.branches, users=args.users, trades=args.trades,
+        transactions=args.transactions, random_seed=args.random_seed, reset=args.reset
+    )
+    print(f"✓ Seeded {counts} in {time.perf_counter() - started:.1f}s")
+    print(f"  Manager: {SEED_MANAGER_EMAIL} / Clients: {seed_client_email(1)} ... (password: {SEED_PASSWORD})")
+
+
 if __name__ == "__main__":
-    print("Initializing Imtiaz Trading Platform Database...\n")
-    init_db()
+    main()
@@ -1,31 +1,101 @@
-from fastapi import FastAPI, Request
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from fastapi.responses import ORJSONResponse
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from app.config import settings
-from app.database import Base, engine
-from app.api import auth, manager
+from app.api import auth, manager, transactions, accounts
+from app.services.balance_snapshots import balance_snapshotter, run_balance_snapshots
+from app.services.commissions import commission_engine, run_commission_accrual
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware, QUERY_COUNT_HEADER, QUERY_TIME_HEADER
+from app.utils.audit_log import open_audit_log, close_audit_log
+from app.utils.db_pool import database_health
 from app.utils.logging import setup_logging, get_logger
+from app.utils.metrics import CONTENT_TYPE, render_metrics
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.rate_limit import limiter
 # Import other routers as we create them
-# from app.api import accounts, transactions, trades
+# from app.api import trades
 
-# Setup logging
-setup_logging(log_level="INFO" if not settings.DEBUG else "DEBUG")
 logger = get_logger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
-# Create rate limiter
-limiter = Limiter(key_func=get_remote_address)
+def configure_logging() -> None:
+    """Set up logging from settings; run by the process entry points, not on import."""
+    setup_logging(
+        log_level="INFO" if not settings.DEBUG else "DEBUG",
+        json_output=settings.LOG_JSON,
+        log_file=settings.LOG_FILE or None,
+        max_bytes=settings.LOG_FILE_MAX_BYTES,
+        backup_count=settings.LOG_FILE_BACKUP_COUNT,
+        queue_size=settings.LOG_QUEUE_SIZE,
+        sample_rates={"api": settings.API_LOG_SAMPLE_RATE}
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Set up logging, start periodic background jobs when a worker starts and
+    cancel them on shutdown.
+
+    The schema is not created here: ``python -m app.init_db --migrate`` runs
+    once per deploy, before any worker starts.
+    """
+    configure_logging()
+    logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
+    if settings.AUDIT_LOG_ENABLED:
+        open_audit_log(settings.AUDIT_LOG_DIR, segment_max_bytes=settings.AUDIT_LOG_SEGMENT_BYTES)
+    snapshot_task = commission_task = None
+    if settings.BALANCE_SNAPSHOT_ENABLED:
+        snapshot_task = asyncio.create_task(
+            run_balance_snapshots(balance_snapshotter, settings.BALANCE_SNAPSHOT_INTERVAL_SECONDS)
+        )
+    if settings.COMMISSION_ACCRUAL_ENABLED:
+        commission_task = asyncio.create_task(
+            run_commission_accrual(commission_engine, settings.COMMISSION_BATCH_INTERVAL_SECONDS)
+        )
+    lp_gateway = hedge_task = None
+    if settings.LP_CONNECTIONS_ENABLED or settings.HEDGING_ENABLED:
+        # httpx and websockets load only in workers that connect to liquidity providers
+        from app.services.lp_connectors import LPGateway
+
+        lp_gateway = LPGateway()
+        await lp_gateway.start()
+    if settings.HEDGING_ENABLED:
+        from app.services.hedging import HedgeEngine, run_hedging
+
+        hedge_task = asyncio.create_task(run_hedging(HedgeEngine(lp_gateway), settings.HEDGE_WINDOW_SECONDS))
+    try:
+        yield
+    finally:
+        if snapshot_task is not None:
+            snapshot_task.cancel()
+        if hedge_task is not None:
+            # Wait for a running rebalance to record its orders before the connections close
+            hedge_task.cancel()
+            await asyncio.gather(hedge_task, return_exceptions=True)
+        if lp_gateway is not None:
+            await lp_gateway.close()
+        if commission_task is not None:
+            # Wait for the final batch so queued commission is charged before exit
+            commission_task.cancel()
+            await asyncio.gather(commission_task, return_exceptions=True)
+        close_audit_log()
+
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Backend API for Imtiaz Trading Platform with MetaTrader Integration",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add rate limiter to app state
@@ -39,15 +109,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", QUERY_COUNT_HEADER, QUERY_TIME_HEADER],
 )
 
-logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
+# Query counts go to metrics always, and to response headers in debug mode
+app.add_middleware(
+    QueryStatsMiddleware,
+    expose_headers=settings.DEBUG,
+    repeat_threshold=settings.DB_REPEATED_QUERY_THRESHOLD,
+)
+
+# Outermost middleware so recorded latency covers CORS and rate limiting
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(manager.router, prefix="/api")
-# app.include_router(accounts.router, prefix="/api")
-# app.include_router(transactions.router, prefix="/api")
+app.include_router(transactions.router, prefix="/api")
+app.include_router(accounts.router, prefix="/api")
 # app.include_router(trades.router, prefix="/api")
 
 
@@ -67,6 +146,19 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/db")
+async def database_health_check():
+    """Database reachability and connection pool saturation."""
+    report = await run_in_threadpool(database_health)
+    return ORJSONResponse(report, status_code=503 if report["status"] == "down" else 200)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,13 +1,23 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, WebSocket, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.utils.security import decode_token
 from app.models.user import User
-from typing import Optional
+from typing import NamedTuple, Optional
 
 security = HTTPBearer()
 
+# Browsers cannot set headers on a WebSocket handshake, so they offer the
+# subprotocols ["bearer", <access token>] instead; the server accepts "bearer"
+WEBSOCKET_AUTH_PROTOCOL = "bearer"
+
+
+class WebSocketAuth(NamedTuple):
+    user: User
+    expires_at: float  # the token's exp, in seconds since the epoch
+    subprotocol: Optional[str]  # to accept the handshake with
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -43,6 +53,38 @@ async def get_current_user(
     return user
 
 
+async def get_websocket_auth(
+    websocket: WebSocket,
+    db: Session = Depends(get_db)
+) -> Optional[WebSocketAuth]:
+    """
+    Get the active user behind a WebSocket handshake and when their token expires, or None.
+
+    The access token comes in an ``Authorization: Bearer`` header or, from
+    browsers, as the subprotocol after ``bearer``; never in the URL, which
+    ends up in access and proxy logs. The session is closed once the user is
+    loaded, so a long-lived stream does not hold a pooled connection.
+    """
+    subprotocols = websocket.scope.get("subprotocols") or []
+    subprotocol = token = None
+    if len(subprotocols) >= 2 and subprotocols[0] == WEBSOCKET_AUTH_PROTOCOL:
+        subprotocol, token = WEBSOCKET_AUTH_PROTOCOL, subprotocols[1]
+    else:
+        scheme, _, token = websocket.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer":
+            token = None
+    payload = decode_token(token) if token else None
+    if not payload or payload.get("user_id") is None or payload.get("exp") is None:
+        db.close()
+        return None
+    user = db.query(User).filter(User.id == payload["user_id"]).first()
+    db.close()
+
+    if user is None or not user.is_active:
+        return None
+    return WebSocketAuth(user, float(payload["exp"]), subprotocol)
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
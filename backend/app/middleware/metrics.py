@@ -0,0 +1,46 @@
+"""
+ASGI middleware recording per-route request latency and in-flight requests,
+and emitting the (sampled) API access log.
+"""
+from time import perf_counter
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.logging import log_api_request
+from app.utils.metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+# Label used for requests that did not match any route, to bound cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so the per-request cost stays in the microseconds."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels()
+        in_flight.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            in_flight.dec()
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else UNMATCHED_ROUTE, str(status_code))
+            HTTP_REQUEST_DURATION.labels(*labels).observe(elapsed)
+            HTTP_REQUESTS.labels(*labels).inc()
+            log_api_request(scope["path"], scope["method"], status_code=status_code,
+                            duration_ms=round(elapsed * 1000, 2))
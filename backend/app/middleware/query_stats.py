@@ -0,0 +1,64 @@
+"""
+ASGI middleware reporting SQL query counts and flagging likely N+1 patterns.
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.logging import get_logger
+from app.utils.metrics import DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST, DB_REPEATED_QUERY_REQUESTS
+from app.utils.query_stats import start_query_stats, stop_query_stats
+
+logger = get_logger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+REPEATED_QUERIES_HEADER = "X-DB-Repeated-Queries"
+
+
+class QueryStatsMiddleware:
+    """
+    Collect per-request query statistics.
+
+    Totals always feed the metrics registry. With ``expose_headers`` set
+    (debug mode) they are also returned as response headers, and any
+    statement repeated ``repeat_threshold`` times or more is logged.
+    """
+
+    def __init__(self, app: ASGIApp, expose_headers: bool = False, repeat_threshold: int = 5):
+        self.app = app
+        self.expose_headers = expose_headers
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_query_stats()
+
+        async def send_wrapper(message: Message) -> None:
+            if self.expose_headers and message["type"] == "http.response.start":
+                repeated = stats.repeated(self.repeat_threshold)
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()))
+                headers.append((QUERY_TIME_HEADER.lower().encode(), f"{stats.total_time * 1000:.2f}".encode()))
+                headers.append((REPEATED_QUERIES_HEADER.lower().encode(), str(len(repeated)).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop_query_stats(token)
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            DB_QUERIES_PER_REQUEST.labels(route_path).observe(stats.count)
+            DB_TIME_PER_REQUEST.labels(route_path).observe(stats.total_time)
+
+            repeated = stats.repeated(self.repeat_threshold)
+            if repeated:
+                DB_REPEATED_QUERY_REQUESTS.labels(route_path).inc()
+                if self.expose_headers:
+                    sql, count = repeated[0]
+                    logger.warning(
+                        "Possible N+1 on %s %s: statement executed %d times: %.200s",
+                        scope["method"], route_path, count, sql
+                    )
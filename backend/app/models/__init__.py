@@ -4,7 +4,14 @@ from app.models.account import Account, AccountStatus
 from app.models.transaction import Transaction, TransactionType, TransactionStatus
 from app.models.trade import Trade, TradeType, OrderType, TradeStatus
 from app.models.product_spread import ProductSpread
+from app.models.liquidity_provider import LiquidityProvider, LPStatus, LPType
+from app.models.routing_rule import RoutingRule, RoutingType, RoutingPriority
 from app.models.kyc_document import KYCDocument, DocumentType, DocumentStatus
+from app.models.balance_history import BalanceHistory
+from app.models.account_monthly_summary import AccountMonthlySummary
+from app.models.branch_daily_stats import BranchDailyStats, BranchDailyClient
+from app.models.swap_rollover import SwapRollover
+from app.models.hedge_order import HedgeOrder, HedgeOrderStatus
 
 __all__ = [
     "User",
@@ -22,7 +29,20 @@ __all__ = [
     "OrderType",
     "TradeStatus",
     "ProductSpread",
+    "LiquidityProvider",
+    "LPStatus",
+    "LPType",
+    "RoutingRule",
+    "RoutingType",
+    "RoutingPriority",
     "KYCDocument",
     "DocumentType",
     "DocumentStatus",
+    "BalanceHistory",
+    "AccountMonthlySummary",
+    "BranchDailyStats",
+    "BranchDailyClient",
+    "SwapRollover",
+    "HedgeOrder",
+    "HedgeOrderStatus",
 ]
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class AccountMonthlySummary(Base):
+    """Per-account, per-month statement totals maintained as transactions post."""
+    __tablename__ = "account_monthly_summaries"
+    __table_args__ = (
+        UniqueConstraint("account_id", "month", name="uq_account_monthly_summary"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)  # leads uq_account_monthly_summary
+    month = Column(String(7), nullable=False)  # e.g., "2025-01"
+
+    # Balances - Using Numeric for financial precision
+    opening_balance = Column(Numeric(precision=15, scale=2), nullable=False, default=0.0)
+    closing_balance = Column(Numeric(precision=15, scale=2), nullable=False, default=0.0)
+
+    # Totals by category (withdrawals and commissions are positive amounts)
+    deposits = Column(Numeric(precision=15, scale=2), nullable=False, default=0.0)
+    withdrawals = Column(Numeric(precision=15, scale=2), nullable=False, default=0.0)
+    trade_pnl = Column(Numeric(precision=15, scale=2), nullable=False, default=0.0)
+    commissions = Column(Numeric(precision=15, scale=2), nullable=False, default=0.0)
+    other = Column(Numeric(precision=15, scale=2), nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<AccountMonthlySummary account={self.account_id} {self.month}>"
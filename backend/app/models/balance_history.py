@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, DateTime, Numeric, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class BalanceHistory(Base):
+    """Periodic snapshot of an account's balance, equity and margin."""
+    __tablename__ = "balance_history"
+    __table_args__ = (
+        # History for one account over a time range, and its latest snapshot
+        Index("ix_balance_history_account_recorded_at", "account_id", "recorded_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+
+    # Snapshot values - Using Numeric for financial precision
+    balance = Column(Numeric(precision=20, scale=2), nullable=False)
+    equity = Column(Numeric(precision=20, scale=2), nullable=False)
+    margin = Column(Numeric(precision=20, scale=2), nullable=False)
+    free_margin = Column(Numeric(precision=20, scale=2), nullable=False)
+    margin_level = Column(Numeric(precision=10, scale=2), nullable=False)
+
+    # Timestamps
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    # Relationships
+    account = relationship("Account")
+
+    def __repr__(self):
+        return f"<BalanceHistory account={self.account_id} equity={self.equity} at {self.recorded_at}>"
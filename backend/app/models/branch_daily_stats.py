@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class BranchDailyStats(Base):
+    """Closed-trade totals per branch, symbol and day, maintained as trades close and commission posts."""
+    __tablename__ = "branch_daily_stats"
+    __table_args__ = (
+        UniqueConstraint("day", "branch_id", "symbol", name="uq_branch_daily_stats"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)  # leads uq_branch_daily_stats, so date-range reads use it
+    branch_id = Column(Integer, ForeignKey("branches.id", ondelete="CASCADE"), nullable=False)
+    symbol = Column(String, nullable=False)
+
+    # Totals - Using Numeric for financial precision
+    trades_closed = Column(Integer, nullable=False, default=0)
+    volume_lots = Column(Numeric(precision=15, scale=2), nullable=False, default=0.0)
+    profit_loss = Column(Numeric(precision=15, scale=2), nullable=False, default=0.0)
+    commission = Column(Numeric(precision=15, scale=2), nullable=False, default=0.0)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<BranchDailyStats branch={self.branch_id} {self.symbol} {self.day}>"
+
+
+class BranchDailyClient(Base):
+    """One row per client that closed a trade in a symbol on a day; counted for active-client figures."""
+    __tablename__ = "branch_daily_clients"
+    __table_args__ = (
+        UniqueConstraint("day", "branch_id", "symbol", "user_id", name="uq_branch_daily_client"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    branch_id = Column(Integer, ForeignKey("branches.id", ondelete="CASCADE"), nullable=False)
+    symbol = Column(String, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    def __repr__(self):
+        return f"<BranchDailyClient branch={self.branch_id} {self.symbol} {self.day} user={self.user_id}>"
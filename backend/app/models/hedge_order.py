@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Numeric, ForeignKey, Enum as SQLEnum, Text, Index
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.trade import TradeType
+import enum
+
+
+class HedgeOrderStatus(str, enum.Enum):
+    FILLED = "filled"
+    FAILED = "failed"
+    UNKNOWN = "unknown"  # timed out: may still fill at the LP, resolved by a status query
+
+
+class HedgeOrder(Base):
+    """One attempt to offset B-Book exposure with an order at a liquidity provider."""
+    __tablename__ = "hedge_orders"
+    __table_args__ = (
+        # Net hedged position per symbol, summed over filled orders
+        Index("ix_hedge_orders_symbol_status", "symbol", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    lp_id = Column(Integer, ForeignKey("liquidity_providers.id"), nullable=False)
+    # Sent with the order: the LP executes an id once, and it is how a later status query finds the order
+    client_order_id = Column(String(32), unique=True, nullable=False)
+
+    # Order details
+    symbol = Column(String, nullable=False)
+    side = Column(SQLEnum(TradeType), nullable=False)
+    lots = Column(Numeric(precision=10, scale=2), nullable=False)
+    filled_lots = Column(Numeric(precision=10, scale=2), nullable=False, default=0)
+    status = Column(SQLEnum(HedgeOrderStatus), nullable=False)
+    error = Column(Text, nullable=True)
+
+    # Execution quality: requested price is the last quote on the side we trade
+    requested_price = Column(Numeric(precision=20, scale=5), nullable=True)
+    fill_price = Column(Numeric(precision=20, scale=5), nullable=True)
+    slippage_pips = Column(Float, nullable=True)  # positive: filled worse than requested
+    max_slippage_pips = Column(Float, nullable=True)  # from the symbol's routing rule
+    latency_ms = Column(Float, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<HedgeOrder {self.side} {self.lots} {self.symbol} @ LP {self.lp_id} - {self.status}>"
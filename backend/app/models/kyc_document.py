@@ -22,7 +22,7 @@ class KYCDocument(Base):
     __tablename__ = "kyc_documents"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     document_type = Column(SQLEnum(DocumentType), nullable=False)
     file_path = Column(String, nullable=False)
     original_filename = Column(String, nullable=False)
@@ -39,7 +39,7 @@ class KYCDocument(Base):
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    user = relationship("User", back_populates="kyc_documents")
+    user = relationship("User", foreign_keys=[user_id], back_populates="kyc_documents")
 
     def __repr__(self):
         return f"<KYCDocument {self.document_type} for User {self.user_id}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Enum as SQLEnum, Index, text
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -23,6 +23,11 @@ class LPType(str, enum.Enum):
 class LiquidityProvider(Base):
     """Liquidity Provider model for managing LP connections."""
     __tablename__ = "liquidity_providers"
+    __table_args__ = (
+        # Active providers in failover order
+        Index("ix_liquidity_providers_active_priority", "priority", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, unique=True)
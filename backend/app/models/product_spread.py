@@ -14,6 +14,10 @@ class ProductSpread(Base):
     base_spread = Column(Numeric(precision=10, scale=5), default=0.0)  # Base spread from liquidity provider
     extra_spread = Column(Numeric(precision=10, scale=5), default=0.0)  # Additional spread added by platform
 
+    # Overnight swap per lot in account currency, by position side (negative: charged to the client)
+    swap_long = Column(Numeric(precision=10, scale=4), default=0.0)
+    swap_short = Column(Numeric(precision=10, scale=4), default=0.0)
+
     # Product metadata
     category = Column(String, default="forex")  # forex, commodity, crypto
     is_active = Column(Boolean, default=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Enum as SQLEnum, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Enum as SQLEnum, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -22,6 +22,11 @@ class RoutingPriority(str, enum.Enum):
 class RoutingRule(Base):
     """Routing Rule model for order routing configuration."""
     __tablename__ = "routing_rules"
+    __table_args__ = (
+        # Active rules in evaluation order
+        Index("ix_routing_rules_active_priority", "priority", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
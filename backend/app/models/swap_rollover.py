@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Date, DateTime, Numeric
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SwapRollover(Base):
+    """One row per trading day whose overnight swap has been applied to open positions."""
+    __tablename__ = "swap_rollovers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, unique=True, nullable=False)  # unique: a day is rolled over at most once
+    multiplier = Column(Integer, nullable=False)  # nights charged: 0 on weekends, 3 on the triple-swap day
+
+    # Results - Using Numeric for financial precision
+    positions = Column(Integer, nullable=False, default=0)
+    total_swap = Column(Numeric(precision=15, scale=2), nullable=False, default=0.0)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<SwapRollover {self.day} x{self.multiplier} - {self.positions} positions>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum as SQLEnum, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -25,6 +25,16 @@ class TradeStatus(str, enum.Enum):
 
 class Trade(Base):
     __tablename__ = "trades"
+    __table_args__ = (
+        # Statements: a user's trades in time order
+        Index("ix_trades_user_opened_at", "user_id", "opened_at", "id"),
+        # Open positions per user; closed trades, the bulk of the table, stay out of it
+        Index("ix_trades_open_by_user", "user_id",
+              postgresql_where=text("status = 'OPEN'"), sqlite_where=text("status = 'OPEN'")),
+        # Commission sweep: recently closed trades
+        Index("ix_trades_closed_updated_at", "updated_at",
+              postgresql_where=text("status = 'CLOSED'"), sqlite_where=text("status = 'CLOSED'")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
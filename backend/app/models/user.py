@@ -60,7 +60,7 @@ class User(Base):
     accounts = relationship("Account", back_populates="user", cascade="all, delete-orphan")
     transactions = relationship("Transaction", foreign_keys="Transaction.user_id", back_populates="user", cascade="all, delete-orphan")
     trades = relationship("Trade", back_populates="user", cascade="all, delete-orphan")
-    kyc_documents = relationship("KYCDocument", back_populates="user", cascade="all, delete-orphan")
+    kyc_documents = relationship("KYCDocument", foreign_keys="KYCDocument.user_id", back_populates="user", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<User {self.email} - {self.role}>"
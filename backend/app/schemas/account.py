@@ -39,3 +39,30 @@ class AccountUpdate(BaseModel):
     balance: Optional[float] = None
     leverage: Optional[int] = Field(None, ge=1, le=1000)
     status: Optional[AccountStatus] = None
+
+
+class BalanceSnapshotResponse(BaseModel):
+    balance: float
+    equity: float
+    margin: float
+    free_margin: float
+    margin_level: float
+    recorded_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class MonthlySummaryResponse(BaseModel):
+    month: str
+    opening_balance: float
+    closing_balance: float
+    deposits: float
+    withdrawals: float
+    trade_pnl: float
+    commissions: float
+    other: float
+    transaction_count: int
+
+    class Config:
+        from_attributes = True
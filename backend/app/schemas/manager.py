@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
 from enum import Enum
 
 
@@ -37,6 +37,8 @@ class ProductSpreadBase(BaseModel):
     name: str
     base_spread: float = 0.0
     extra_spread: float = 0.0
+    swap_long: float = 0.0
+    swap_short: float = 0.0
     category: str = "forex"
     is_active: bool = True
 
@@ -48,6 +50,8 @@ class ProductSpreadCreate(ProductSpreadBase):
 class ProductSpreadUpdate(BaseModel):
     extra_spread: Optional[float] = None
     base_spread: Optional[float] = None
+    swap_long: Optional[float] = None
+    swap_short: Optional[float] = None
     is_active: Optional[bool] = None
 
 
@@ -83,6 +87,13 @@ class BranchResponse(BaseModel):
         from_attributes = True
 
 
+class BranchCommissionTotals(BaseModel):
+    branch_id: int
+    trades: int
+    lots: float
+    commission: float
+
+
 # Liquidity Provider Schemas
 class LiquidityProviderBase(BaseModel):
     name: str
@@ -200,3 +211,72 @@ class RoutingRuleResponse(RoutingRuleBase):
 
     class Config:
         from_attributes = True
+
+
+# Bulk Upsert Schemas
+MAX_BULK_ITEMS = 500
+
+
+class ProductSpreadBulkUpsert(BaseModel):
+    items: List[ProductSpreadCreate] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class LiquidityProviderBulkUpsert(BaseModel):
+    items: List[LiquidityProviderCreate] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class RoutingRuleBulkItem(RoutingRuleBase):
+    id: Optional[int] = None  # Update an existing rule when set, otherwise create
+
+
+class RoutingRuleBulkUpsert(BaseModel):
+    items: List[RoutingRuleBulkItem] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class BulkItemResult(BaseModel):
+    key: str
+    id: Optional[int] = None
+    status: str  # created, updated, error
+    detail: Optional[str] = None
+
+
+class BulkUpsertResponse(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+# Audit Log Schemas
+class AuditEventResponse(BaseModel):
+    seq: int
+    timestamp: datetime
+    category: str
+    event: str
+    user_id: Optional[int] = None
+    data: Dict[str, Any]
+
+
+class AnalyticsRow(BaseModel):
+    """Closed-trade totals for one group; dimensions not grouped by are omitted."""
+    day: Optional[date] = None
+    branch_id: Optional[int] = None
+    symbol: Optional[str] = None
+    trades_closed: int
+    volume_lots: float
+    profit_loss: float
+    commission: float
+    active_clients: int
+
+
+class ExposureRow(BaseModel):
+    """Open-position exposure for one group; dimensions not grouped by are omitted."""
+    symbol: Optional[str] = None
+    branch_id: Optional[int] = None
+    routing_type: Optional[RoutingType] = None
+    positions: int
+    long_lots: float
+    short_lots: float
+    net_lots: float
+    notional: float
+    unrealized_pnl: float
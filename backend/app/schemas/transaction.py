@@ -19,11 +19,15 @@ class TransactionCreate(BaseModel):
 
 
 class DepositRequest(BaseModel):
+    account_id: int
     amount: float = Field(..., gt=0)
+    description: Optional[str] = None
 
 
 class WithdrawRequest(BaseModel):
+    account_id: int
     amount: float = Field(..., gt=0)
+    description: Optional[str] = None
 
 
 class TransferRequest(BaseModel):
@@ -0,0 +1,291 @@
+"""
+Pre-forking production launcher.
+
+    python -m app.server --workers 4
+
+The parent process imports the application once, warms the cached spread,
+branch, liquidity provider and routing rule lists, binds the listening
+socket and then forks the workers. Everything loaded before the fork
+(modules, pydantic validators, SQLAlchemy's compiled statement cache, the
+warmed responses) is shared copy-on-write instead of being rebuilt by every
+worker, and each worker is pinned to one core.
+
+The parent only supervises:
+
+- a worker that exits is replaced,
+- SIGHUP re-warms the caches and restarts the workers one at a time, and
+- SIGTERM / SIGINT stop every worker gracefully.
+
+A stopping worker stops accepting, finishes in-flight requests for up to the
+graceful timeout and closes WebSockets with code 1012 (service restart). The
+parent keeps the listening socket open, so during a rolling restart new
+connections, including reconnecting streams, are accepted by the workers
+still running or wait in the backlog for the replacement; only one worker
+is down at a time. SIGHUP reuses the code loaded at startup; deploying new
+code needs a new launcher.
+
+Only worker 0 runs balance snapshots, and with several workers each one
+writes its own audit log under ``AUDIT_LOG_DIR/worker-<n>``, since an audit
+log has a single writer.
+"""
+import argparse
+import asyncio
+import inspect
+import os
+import select
+import signal
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+from starlette.requests import Request
+
+from app.config import settings
+from app.utils.logging import get_logger, shutdown_logging
+
+logger = get_logger(__name__)
+
+# Seconds a new worker has to start accepting connections
+STARTUP_TIMEOUT_SECONDS = 30
+# Pause after a worker fails to start, so a broken deploy does not fork in a tight loop
+RESPAWN_BACKOFF_SECONDS = 1.0
+# Extra seconds past the graceful timeout before a stopping worker is killed
+KILL_GRACE_SECONDS = 5
+
+
+def available_cpus() -> List[int]:
+    """Cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def warm_caches() -> List[str]:
+    """
+    Build and cache the default first page of each cached manager list.
+
+    Returns the names of the endpoints that were warmed; a failure is logged
+    and leaves that list to be built by the first request instead.
+    """
+    from app.api import manager
+    from app.database import SessionLocal
+    from app.utils.http_cache import resource_cache
+    from app.utils.pagination import DEFAULT_PAGE_SIZE, PageParams
+
+    endpoints = (
+        manager.get_all_spreads,
+        manager.get_all_branches,
+        manager.get_all_liquidity_providers,
+        manager.get_all_routing_rules,
+    )
+
+    async def warm(db) -> List[str]:
+        warmed = []
+        for endpoint in endpoints:
+            # Filters unset, as in a request without a query string
+            arguments = dict.fromkeys(inspect.signature(endpoint).parameters)
+            arguments.update(
+                request=Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": []}),
+                page=PageParams(cursor=None, limit=DEFAULT_PAGE_SIZE, fields=None),
+                db=db,
+            )
+            try:
+                await endpoint(**arguments)
+                warmed.append(endpoint.__name__)
+            except Exception as e:
+                db.rollback()
+                logger.warning("Cache warm-up failed for %s: %s", endpoint.__name__, e)
+        return warmed
+
+    resource_cache.clear()
+    with SessionLocal() as db:
+        return asyncio.run(warm(db))
+
+
+def release_connections() -> None:
+    """Close pooled connections so no worker inherits a socket another process uses."""
+    from app.utils.db_pool import ENGINES
+
+    for engine in ENGINES.values():
+        engine.dispose()
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server that tells the launcher once it is accepting connections."""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self.ready_fd, b"1")
+        os.close(self.ready_fd)
+
+
+class PreforkServer:
+    """Forks and supervises uvicorn workers that share one listening socket."""
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        workers: int,
+        cpus: Optional[List[int]] = None,
+        graceful_timeout: float = 30
+    ):
+        self.config = config
+        self.workers = workers
+        self.cpus = cpus
+        self.graceful_timeout = graceful_timeout
+        self.pids: Dict[int, int] = {}  # worker slot -> pid
+        self.socket = None
+        self._signals: List[int] = []
+
+    # ==================== Parent ====================
+
+    def run(self) -> None:
+        self.prepare()
+        self.socket = self.config.bind_socket()
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, self._on_signal)
+        try:
+            for slot in range(self.workers):
+                self.spawn(slot)
+            self._supervise()
+        finally:
+            self._terminate(list(self.pids))
+            self.socket.close()
+        logger.info("Launcher stopped")
+
+    def prepare(self) -> None:
+        """Warm the caches the workers will inherit and drop the connections used to do it."""
+        started = time.perf_counter()
+        warmed = warm_caches()
+        release_connections()
+        logger.info("Warmed %s in %.0f ms", ", ".join(warmed) or "no caches", (time.perf_counter() - started) * 1000)
+
+    def reload(self) -> None:
+        """Re-warm the caches and replace the workers one at a time."""
+        logger.info("Rolling restart of %d workers", len(self.pids))
+        self.prepare()
+        for slot in sorted(self.pids):
+            self._terminate([slot])
+            self.spawn(slot)
+
+    def spawn(self, slot: int) -> bool:
+        """Fork the worker for ``slot`` and wait until it accepts connections."""
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            self._worker_main(slot, write_fd)
+        os.close(write_fd)
+        self.pids[slot] = pid
+
+        readable, _, _ = select.select([read_fd], [], [], STARTUP_TIMEOUT_SECONDS)
+        ready = bool(readable) and os.read(read_fd, 1) == b"1"
+        os.close(read_fd)
+        if ready:
+            logger.info("Worker %d started (pid %d, cpu %s)", slot, pid, self._cpu(slot))
+        else:
+            logger.error("Worker %d (pid %d) failed to start", slot, pid)
+            time.sleep(RESPAWN_BACKOFF_SECONDS)
+        return ready
+
+    def _on_signal(self, signum, frame) -> None:
+        self._signals.append(signum)
+
+    def _supervise(self) -> None:
+        while True:
+            while self._signals:
+                if self._signals.pop(0) != signal.SIGHUP:
+                    return
+                self.reload()
+            self._replace_exited()
+            time.sleep(0.2)
+
+    def _replace_exited(self) -> None:
+        for slot, pid in list(self.pids.items()):
+            finished, status = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                logger.warning("Worker %d (pid %d) exited with code %d, replacing it",
+                               slot, pid, os.waitstatus_to_exitcode(status))
+                del self.pids[slot]
+                self.spawn(slot)
+
+    def _terminate(self, slots: List[int]) -> None:
+        """Stop the workers in ``slots`` gracefully, killing any that outlive the graceful timeout."""
+        pids = [self.pids.pop(slot) for slot in slots]
+        for pid in pids:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + KILL_GRACE_SECONDS
+        while pids and time.monotonic() < deadline:
+            pids = [pid for pid in pids if os.waitpid(pid, os.WNOHANG)[0] == 0]
+            time.sleep(0.05)
+        for pid in pids:
+            logger.error("Worker pid %d did not stop in time, killing it", pid)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+    def _cpu(self, slot: int) -> Optional[int]:
+        return self.cpus[slot % len(self.cpus)] if self.cpus else None
+
+    # ==================== Worker ====================
+
+    def _worker_main(self, slot: int, ready_fd: int) -> None:
+        """Run one worker in the forked child; never returns."""
+        code = 0
+        try:
+            for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+                signal.signal(signum, signal.SIG_DFL)
+            cpu = self._cpu(slot)
+            if cpu is not None:
+                os.sched_setaffinity(0, {cpu})
+            if slot > 0:
+                # Singleton jobs run in worker 0 only. Commission batches lock trades with
+                # SELECT ... FOR UPDATE, which SQLite ignores, so two workers could charge the
+                # same trade; worker 0's sweep charges trades closed in the other workers.
+                settings.BALANCE_SNAPSHOT_ENABLED = False
+                settings.COMMISSION_ACCRUAL_ENABLED = False
+                settings.HEDGING_ENABLED = False
+            if self.workers > 1:
+                settings.AUDIT_LOG_DIR = os.path.join(settings.AUDIT_LOG_DIR, f"worker-{slot}")
+            WorkerServer(self.config, ready_fd).run(sockets=[self.socket])
+        except BaseException:
+            logger.exception("Worker %d crashed", slot)
+            code = 1
+        finally:
+            shutdown_logging()
+            os._exit(code)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.WORKERS, help="0: one per available core")
+    parser.add_argument("--graceful-timeout", type=float, default=settings.WORKER_GRACEFUL_TIMEOUT_SECONDS)
+    parser.add_argument("--no-pin", action="store_true", help="Let the OS schedule workers on any core")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    from app.main import app, configure_logging
+
+    # The launcher's own log lines; each worker sets logging up again in its lifespan
+    configure_logging()
+    cpus = available_cpus()
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    pin = not args.no_pin and hasattr(os, "sched_setaffinity")
+    PreforkServer(config, args.workers or len(cpus), cpus=cpus if pin else None,
+                  graceful_timeout=args.graceful_timeout).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Background engines and batch services
+"""
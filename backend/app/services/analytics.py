@@ -0,0 +1,226 @@
+"""
+Branch analytics rollups for the manager dashboard.
+
+``branch_daily_stats`` holds closed-trade count, volume, P&L and commission
+per branch, symbol and day. ``branch_daily_clients`` records which clients
+closed a trade in each of those buckets, so active-client counts stay exact
+when buckets are combined across symbols or days. Both are maintained in
+the same database transaction as the change they summarize:
+
+- a trade committed as CLOSED adds to its bucket when the session flushes,
+- a COMMISSION posting adds each charged trade's commission to the bucket
+  the trade closed in (see ``record_commissions``).
+
+The analytics API reads only these tables. ``rebuild_rollups`` recomputes
+both from ``trades`` with one grouped ``INSERT ... SELECT`` per table:
+
+    python -m app.services.analytics --rebuild
+"""
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, cast, delete, distinct, event, func, insert, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.branch_daily_stats import BranchDailyClient, BranchDailyStats
+from app.models.trade import Trade, TradeStatus
+from app.models.user import User
+from app.utils.bulk import accumulate_statement
+
+BUCKET_COLUMNS = ("day", "branch_id", "symbol")
+
+# Dimensions the analytics API can group by, and the rollup column behind each
+DIMENSIONS = {"day": "day", "branch": "branch_id", "symbol": "symbol"}
+
+# (day, branch id, symbol)
+Bucket = Tuple[date, int, str]
+
+
+def trade_day(closed_at: Optional[datetime]) -> date:
+    """UTC day a trade closed on; trades closed without a timestamp count as closed today."""
+    if closed_at is None:
+        return datetime.now(timezone.utc).date()
+    if closed_at.tzinfo is not None:
+        closed_at = closed_at.astimezone(timezone.utc)
+    return closed_at.date()
+
+
+def closed_trades(session: Session) -> List[Trade]:
+    """Trades in the session that are being inserted as, or changed to, CLOSED."""
+    closed = [trade for trade in session.new
+              if isinstance(trade, Trade) and trade.status == TradeStatus.CLOSED]
+    closed.extend(
+        trade for trade in session.dirty
+        if isinstance(trade, Trade) and trade.status == TradeStatus.CLOSED
+        and inspect(trade).attrs.status.history.has_changes()
+    )
+    return closed
+
+
+def _empty_bucket(bucket: Bucket) -> dict:
+    return {
+        "day": bucket[0], "branch_id": bucket[1], "symbol": bucket[2],
+        "trades_closed": 0, "volume_lots": Decimal("0"), "profit_loss": Decimal("0"), "commission": Decimal("0"),
+    }
+
+
+def record_closes(conn: Connection, trades: Sequence[Trade]) -> None:
+    """Add closed ``trades`` to their buckets; trades of users without a branch are not rolled up."""
+    branches = dict(conn.execute(
+        select(User.id, User.branch_id)
+        .where(User.id.in_({trade.user_id for trade in trades}), User.branch_id.is_not(None))
+    ).all())
+
+    stats: Dict[Bucket, dict] = {}
+    clients = set()
+    for trade in trades:
+        branch_id = branches.get(trade.user_id)
+        if branch_id is None:
+            continue
+        bucket = (trade_day(trade.closed_at), branch_id, trade.symbol)
+        row = stats.setdefault(bucket, _empty_bucket(bucket))
+        row["trades_closed"] += 1
+        row["volume_lots"] += Decimal(str(trade.lots or 0))
+        row["profit_loss"] += Decimal(str(trade.profit_loss or 0))
+        row["commission"] += Decimal(str(trade.commission or 0))
+        clients.add(bucket + (trade.user_id,))
+
+    if stats:
+        conn.execute(accumulate_statement(conn, BranchDailyStats, list(stats.values()), BUCKET_COLUMNS))
+        conn.execute(accumulate_statement(
+            conn, BranchDailyClient,
+            [dict(zip(BUCKET_COLUMNS + ("user_id",), client)) for client in sorted(clients)],
+            BUCKET_COLUMNS + ("user_id",)
+        ))
+
+
+def record_commissions(db: Session, charges: Iterable[Tuple[Bucket, Decimal]]) -> None:
+    """Add commission charged on closed trades to the buckets those trades closed in."""
+    totals: Dict[Bucket, Decimal] = {}
+    for bucket, amount in charges:
+        totals[bucket] = totals.get(bucket, Decimal("0")) + amount
+    if totals:
+        db.execute(accumulate_statement(
+            db, BranchDailyStats,
+            [{"day": day, "branch_id": branch_id, "symbol": symbol, "commission": amount}
+             for (day, branch_id, symbol), amount in sorted(totals.items())],
+            BUCKET_COLUMNS
+        ))
+
+
+@event.listens_for(Session, "after_flush")
+def _roll_up_trade_closes(session: Session, flush_context) -> None:
+    trades = closed_trades(session)
+    if trades:
+        record_closes(session.connection(), trades)
+
+
+# ==================== Reads ====================
+
+def query_rollups(
+    db: Session,
+    group_by: Sequence[str],
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    branch_id: Optional[int] = None,
+    symbol: Optional[str] = None
+) -> List[dict]:
+    """Rollup totals grouped by ``group_by`` (names from ``DIMENSIONS``), ordered by those dimensions."""
+    def grouped(model, *aggregates):
+        columns = [getattr(model, DIMENSIONS[name]) for name in group_by]
+        statement = select(*columns, *aggregates).group_by(*columns).order_by(*columns)
+        if date_from is not None:
+            statement = statement.where(model.day >= date_from)
+        if date_to is not None:
+            statement = statement.where(model.day <= date_to)
+        if branch_id is not None:
+            statement = statement.where(model.branch_id == branch_id)
+        if symbol is not None:
+            statement = statement.where(model.symbol == symbol)
+        return statement
+
+    active_clients = {
+        tuple(row[:-1]): row[-1]
+        for row in db.execute(grouped(BranchDailyClient, func.count(distinct(BranchDailyClient.user_id))))
+    }
+    rows = []
+    for row in db.execute(grouped(
+        BranchDailyStats,
+        func.sum(BranchDailyStats.trades_closed),
+        func.sum(BranchDailyStats.volume_lots),
+        func.sum(BranchDailyStats.profit_loss),
+        func.sum(BranchDailyStats.commission),
+    )):
+        key = tuple(row[:len(group_by)])
+        trades, volume, profit_loss, commission = row[len(group_by):]
+        rows.append({
+            **{DIMENSIONS[name]: value for name, value in zip(group_by, key)},
+            "trades_closed": int(trades or 0),
+            "volume_lots": float(volume or 0),
+            "profit_loss": float(profit_loss or 0),
+            "commission": float(commission or 0),
+            "active_clients": active_clients.get(key, 0),
+        })
+    return rows
+
+
+# ==================== Rebuild ====================
+
+def day_expression(db: Session, timestamp):
+    """SQL expression for the UTC calendar day of ``timestamp``."""
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.timezone("UTC", timestamp), Date)
+    return func.date(timestamp)
+
+
+def rebuild_rollups(db: Session) -> int:
+    """Recompute both rollup tables from ``trades`` in two set-based passes. Returns buckets written."""
+    closed = (
+        select(
+            day_expression(db, func.coalesce(Trade.closed_at, Trade.updated_at, Trade.opened_at)).label("day"),
+            User.branch_id.label("branch_id"),
+            Trade.symbol.label("symbol"),
+            Trade.user_id.label("user_id"),
+            Trade.lots.label("lots"),
+            func.coalesce(Trade.profit_loss, 0).label("profit_loss"),
+            func.coalesce(Trade.commission, 0).label("commission"),
+        )
+        .join(User, User.id == Trade.user_id)
+        .where(Trade.status == TradeStatus.CLOSED, User.branch_id.is_not(None))
+        .subquery()
+    )
+    bucket = [closed.c.day, closed.c.branch_id, closed.c.symbol]
+
+    db.execute(delete(BranchDailyClient))
+    db.execute(delete(BranchDailyStats))
+    written = db.execute(insert(BranchDailyStats).from_select(
+        [*BUCKET_COLUMNS, "trades_closed", "volume_lots", "profit_loss", "commission"],
+        select(*bucket, func.count(), func.sum(closed.c.lots), func.sum(closed.c.profit_loss),
+               func.sum(closed.c.commission)).group_by(*bucket)
+    )).rowcount
+    db.execute(insert(BranchDailyClient).from_select(
+        [*BUCKET_COLUMNS, "user_id"],
+        select(*bucket, closed.c.user_id).distinct()
+    ))
+    db.commit()
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the branch analytics rollups")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every rollup from trades")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error("nothing to do; pass --rebuild")
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        buckets = rebuild_rollups(db)
+    print(f"✓ Rebuilt {buckets} rollup buckets in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,191 @@
+"""
+Periodic balance snapshots into ``balance_history``.
+
+Every interval the snapshotter computes balance, equity, margin and free margin
+for all active accounts with a single aggregate query, drops accounts whose
+figures have not moved since their last snapshot, and writes the rest with one
+multi-row INSERT. History readers query the snapshots instead of replaying the
+transaction ledger.
+
+Trades belong to a user, not an account, so open positions are counted
+against the user's oldest active account (the one commissions are charged
+to); the user's other accounts carry their balance only.
+"""
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.models.account import Account, AccountStatus
+from app.models.balance_history import BalanceHistory
+from app.models.product_spread import ProductSpread
+from app.models.trade import Trade, TradeStatus
+from app.services.instruments import contract_size_expr
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+CENT = Decimal("0.01")
+
+# (balance, equity, margin) as of the last snapshot written for an account
+SnapshotKey = Tuple[Decimal, Decimal, Decimal]
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class BalanceSnapshotter:
+    """Computes and persists balance snapshots for all active accounts."""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._last: Dict[int, SnapshotKey] = {}
+        self._primed = False
+
+    def compute(self, db: Session) -> List[dict]:
+        """Balance, equity, margin and free margin for every active account in one query."""
+        open_positions = (
+            select(
+                Trade.user_id.label("user_id"),
+                func.sum(func.coalesce(Trade.profit_loss, 0) + func.coalesce(Trade.swap, 0)).label("floating"),
+                func.sum(
+                    Trade.lots * Trade.open_price * contract_size_expr(ProductSpread.category)
+                ).label("notional"),
+            )
+            .select_from(Trade)
+            .outerjoin(ProductSpread, ProductSpread.symbol == Trade.symbol)
+            .where(Trade.status == TradeStatus.OPEN)
+            .group_by(Trade.user_id)
+            .subquery()
+        )
+        # Each user's open positions go to their oldest active account only
+        position_accounts = (
+            select(func.min(Account.id).label("account_id"), Account.user_id)
+            .where(Account.status == AccountStatus.ACTIVE)
+            .group_by(Account.user_id)
+            .subquery()
+        )
+
+        statement = (
+            select(
+                Account.id,
+                Account.balance,
+                Account.leverage,
+                func.coalesce(open_positions.c.floating, 0),
+                func.coalesce(open_positions.c.notional, 0),
+            )
+            .outerjoin(position_accounts, position_accounts.c.account_id == Account.id)
+            .outerjoin(open_positions, open_positions.c.user_id == position_accounts.c.user_id)
+            .where(Account.status == AccountStatus.ACTIVE)
+        )
+
+        snapshots = []
+        for account_id, balance, leverage, floating, notional in db.execute(statement):
+            balance = _money(balance)
+            equity = _money(balance + Decimal(str(floating)))
+            margin = _money(Decimal(str(notional)) / Decimal(leverage or 1))
+            margin_level = _money(equity / margin * 100) if margin else Decimal("0.00")
+            snapshots.append({
+                "account_id": account_id,
+                "balance": balance,
+                "equity": equity,
+                "margin": margin,
+                "free_margin": equity - margin,
+                "margin_level": margin_level,
+            })
+        return snapshots
+
+    def snapshot(self, db: Session, recorded_at: Optional[datetime] = None) -> int:
+        """Write snapshots for accounts that changed since their last one. Returns rows written."""
+        if not self._primed:
+            self._prime(db)
+
+        recorded_at = recorded_at or datetime.now(timezone.utc)
+        rows = []
+        for snapshot in self.compute(db):
+            key = (snapshot["balance"], snapshot["equity"], snapshot["margin"])
+            if self._last.get(snapshot["account_id"]) == key:
+                continue
+            snapshot["recorded_at"] = recorded_at
+            rows.append(snapshot)
+
+        if rows:
+            # executemany with a single statement; rendered as one multi-row INSERT
+            db.execute(insert(BalanceHistory), rows)
+            db.commit()
+            for row in rows:
+                self._last[row["account_id"]] = (row["balance"], row["equity"], row["margin"])
+
+        return len(rows)
+
+    def run_once(self) -> int:
+        """Open a session, take one snapshot pass and close it."""
+        db = self.session_factory()
+        try:
+            written = self.snapshot(db)
+            logger.info(f"Balance snapshot written for {written} accounts")
+            return written
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _prime(self, db: Session) -> None:
+        """Load the latest snapshot per account so restarts don't rewrite unchanged accounts."""
+        latest = (
+            select(BalanceHistory.account_id, func.max(BalanceHistory.recorded_at).label("recorded_at"))
+            .group_by(BalanceHistory.account_id)
+            .subquery()
+        )
+        statement = select(
+            BalanceHistory.account_id, BalanceHistory.balance, BalanceHistory.equity, BalanceHistory.margin
+        ).join(
+            latest,
+            (latest.c.account_id == BalanceHistory.account_id) & (latest.c.recorded_at == BalanceHistory.recorded_at),
+        )
+        for account_id, balance, equity, margin in db.execute(statement):
+            self._last[account_id] = (_money(balance), _money(equity), _money(margin))
+        self._primed = True
+
+
+async def run_balance_snapshots(snapshotter: BalanceSnapshotter, interval_seconds: int) -> None:
+    """Take a snapshot every ``interval_seconds`` until cancelled."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(snapshotter.run_once)
+        except Exception as e:
+            logger.error(f"Balance snapshot failed: {str(e)}")
+
+
+def downsample(rows: Iterable[BalanceHistory], bucket_seconds: int) -> Iterator[BalanceHistory]:
+    """
+    Keep the last snapshot in each ``bucket_seconds`` window.
+
+    ``rows`` must be ordered by ``recorded_at`` ascending; it is consumed lazily.
+    """
+    if bucket_seconds <= 0:
+        yield from rows
+        return
+
+    current_bucket = None
+    pending = None
+    for row in rows:
+        bucket = int(row.recorded_at.timestamp()) // bucket_seconds
+        if pending is not None and bucket != current_bucket:
+            yield pending
+        current_bucket = bucket
+        pending = row
+    if pending is not None:
+        yield pending
+
+
+# Process-wide snapshotter started by the application
+balance_snapshotter = BalanceSnapshotter()
@@ -0,0 +1,305 @@
+"""
+Branch commission accrual for closed trades.
+
+Committing a trade as CLOSED only queues its id in memory. Every batch
+interval the engine charges everything queued since the last batch, plus
+any trade closed in the last ``sweep_hours`` that is still uncharged, so
+trades queued by a worker that died before its batch are charged by the
+next batch of any worker:
+
+- each trade costs ``lots * commission_per_lot`` of its user's branch, with
+  rates cached per branch for ``rate_ttl`` seconds (a worker drops its
+  cached rate as soon as a manager changes it there),
+- the amounts are written to ``trades.commission``, and
+- each account gets one COMMISSION transaction for the whole batch, instead
+  of one per trade.
+
+Only trades still at zero commission are charged, so a trade queued twice
+or also found by the sweep is charged once. Charges are made against the
+user's oldest active account.
+
+Per-branch totals (trades charged, lots, commission) are kept in memory for
+the manager dashboard. They are loaded from ``trades`` on first use and
+reloaded every ``totals_refresh`` seconds to pick up charges made by other
+workers; this worker's own charges are added as they are posted.
+
+The queue is per process and flushed on shutdown. Workers started with
+``COMMISSION_ACCRUAL_ENABLED`` off queue nothing; the sweep charges their
+closes.
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from sqlalchemy import and_, event, func, or_, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.account import Account, AccountStatus
+from app.models.branch import Branch
+from app.models.trade import Trade, TradeStatus
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.models.user import User
+from app.services.analytics import closed_trades, record_commissions, trade_day
+from app.services.statements import record_transaction
+from app.utils.logging import get_logger, log_transaction
+
+logger = get_logger(__name__)
+
+CENT = Decimal("0.01")
+
+
+class BranchTotals(NamedTuple):
+    trades: int
+    lots: Decimal
+    commission: Decimal
+
+
+EMPTY_TOTALS = BranchTotals(0, Decimal("0"), Decimal("0"))
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class CommissionEngine:
+    """Queues closed trades and charges their branch commission in batches."""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        rate_ttl: float = 300.0,
+        totals_refresh: float = 300.0,
+        sweep_hours: float = 24.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.session_factory = session_factory
+        self.rate_ttl = rate_ttl
+        self.totals_refresh = totals_refresh
+        self.sweep_hours = sweep_hours
+        self.clock = clock
+
+        self._pending: Set[int] = set()
+        self._rates: Dict[int, tuple] = {}  # branch id -> (rate, expires at)
+        self._totals: Dict[int, BranchTotals] = {}
+        self._totals_loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    # ==================== Queue ====================
+
+    def record_closes(self, trade_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._pending.update(trade_ids)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    # ==================== Rates ====================
+
+    def invalidate_rate(self, branch_id: int) -> None:
+        self._rates.pop(branch_id, None)
+
+    def rates(self, db: Session, branch_ids: Iterable[int]) -> Dict[int, Decimal]:
+        """Commission per lot for ``branch_ids``, loading expired or missing rates in one query."""
+        now = self.clock()
+        rates, missing = {}, []
+        for branch_id in set(branch_ids):
+            cached = self._rates.get(branch_id)
+            if cached is not None and cached[1] > now:
+                rates[branch_id] = cached[0]
+            else:
+                missing.append(branch_id)
+        if missing:
+            for branch_id, rate in db.execute(
+                select(Branch.id, Branch.commission_per_lot).where(Branch.id.in_(missing))
+            ):
+                rates[branch_id] = Decimal(str(rate or 0))
+                self._rates[branch_id] = (rates[branch_id], now + self.rate_ttl)
+        return rates
+
+    # ==================== Charging ====================
+
+    def flush(self) -> int:
+        """Charge every queued trade and every recently closed one still uncharged; returns the number charged."""
+        with self._lock:
+            trade_ids, self._pending = self._pending, set()
+
+        db = self.session_factory()
+        try:
+            charged, postings = self._charge(db, trade_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.record_closes(trade_ids)
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            for branch_id, totals in charged.items():
+                current = self._totals.get(branch_id, EMPTY_TOTALS)
+                self._totals[branch_id] = BranchTotals(
+                    current.trades + totals.trades,
+                    current.lots + totals.lots,
+                    current.commission + totals.commission,
+                )
+        for user_id, amount, transaction_id, details in postings:
+            log_transaction(TransactionType.COMMISSION.value, user_id, float(amount),
+                            transaction_id=transaction_id, details=details)
+        return sum(totals.trades for totals in charged.values())
+
+    def _charge(self, db: Session, trade_ids: Set[int]):
+        swept_since = datetime.now(timezone.utc) - timedelta(hours=self.sweep_hours)
+        trades = db.execute(
+            select(Trade.id, Trade.user_id, Trade.symbol, Trade.lots, Trade.closed_at, User.branch_id)
+            .join(User, User.id == Trade.user_id)
+            .where(
+                # Closed recently, i.e. COALESCE(updated_at, closed_at) >= swept_since written out so the
+                # updated_at index still applies; a trade inserted already closed has no updated_at
+                or_(Trade.id.in_(trade_ids), Trade.updated_at >= swept_since,
+                    and_(Trade.updated_at.is_(None), Trade.closed_at >= swept_since)),
+                Trade.status == TradeStatus.CLOSED,
+                func.coalesce(Trade.commission, 0) == 0,
+                User.branch_id.is_not(None),
+            )
+            .with_for_update(of=Trade)
+        ).all()
+        if not trades:
+            return {}, []
+
+        rates = self.rates(db, (trade.branch_id for trade in trades))
+        accounts = {
+            account.user_id: account
+            for account in db.query(Account)
+            .filter(
+                Account.id.in_(
+                    select(func.min(Account.id))
+                    .where(Account.user_id.in_({trade.user_id for trade in trades}),
+                           Account.status == AccountStatus.ACTIVE)
+                    .group_by(Account.user_id)
+                )
+            )
+            .with_for_update()
+        }
+
+        trade_updates: List[dict] = []
+        rollup_charges = []
+        per_account: Dict[int, List] = {}
+        charged: Dict[int, BranchTotals] = {}
+        for trade in trades:
+            account = accounts.get(trade.user_id)
+            amount = _money(Decimal(str(trade.lots)) * rates.get(trade.branch_id, 0))
+            if account is None or not amount:
+                continue
+            trade_updates.append({"id": trade.id, "commission": amount})
+            rollup_charges.append(((trade_day(trade.closed_at), trade.branch_id, trade.symbol), amount))
+            entry = per_account.setdefault(account.id, [account, 0, Decimal("0"), Decimal("0")])
+            entry[1] += 1
+            entry[2] += Decimal(str(trade.lots))
+            entry[3] += amount
+            totals = charged.get(trade.branch_id, EMPTY_TOTALS)
+            charged[trade.branch_id] = BranchTotals(totals.trades + 1, totals.lots + Decimal(str(trade.lots)),
+                                                    totals.commission + amount)
+
+        if trade_updates:
+            db.execute(update(Trade), trade_updates)
+            record_commissions(db, rollup_charges)
+
+        postings = []
+        for account, count, lots, amount in per_account.values():
+            balance_before = Decimal(account.balance or 0)
+            account.balance = balance_before - amount
+            account.wallet_balance = Decimal(account.wallet_balance or 0) - amount
+            details = f"Commission on {count} closed trades ({lots} lots)"
+            transaction = Transaction(
+                user_id=account.user_id,
+                account_id=account.id,
+                transaction_type=TransactionType.COMMISSION,
+                amount=amount,
+                balance_before=balance_before,
+                balance_after=account.balance,
+                description=details,
+                status=TransactionStatus.COMPLETED
+            )
+            db.add(transaction)
+            record_transaction(db, transaction)
+            postings.append((transaction, f"Account: {account.account_number}. {details}"))
+
+        db.flush()
+        return charged, [(transaction.user_id, transaction.amount, transaction.id, details)
+                         for transaction, details in postings]
+
+    # ==================== Totals ====================
+
+    def branch_totals(self, db: Session) -> Dict[int, BranchTotals]:
+        """Commission charged so far, by branch id; ``db`` is only used when the totals are due a reload."""
+        loaded_at = self._totals_loaded_at
+        if loaded_at is None or self.clock() - loaded_at >= self.totals_refresh:
+            self.reload_totals(db)
+        return dict(self._totals)
+
+    def reload_totals(self, db: Session) -> None:
+        """Recompute the per-branch totals from ``trades``."""
+        rows = db.execute(
+            select(User.branch_id, func.count(Trade.id), func.sum(Trade.lots), func.sum(Trade.commission))
+            .join(User, User.id == Trade.user_id)
+            .where(Trade.status == TradeStatus.CLOSED, Trade.commission > 0, User.branch_id.is_not(None))
+            .group_by(User.branch_id)
+        ).all()
+        with self._lock:
+            self._totals = {
+                branch_id: BranchTotals(count, Decimal(str(lots or 0)), _money(commission))
+                for branch_id, count, lots, commission in rows
+            }
+            self._totals_loaded_at = self.clock()
+
+
+commission_engine = CommissionEngine(
+    rate_ttl=settings.COMMISSION_RATE_TTL_SECONDS,
+    totals_refresh=settings.COMMISSION_TOTALS_REFRESH_SECONDS,
+    sweep_hours=settings.COMMISSION_SWEEP_HOURS
+)
+
+
+async def run_commission_accrual(engine: CommissionEngine, interval_seconds: int) -> None:
+    """Charge queued trades every ``interval_seconds`` until cancelled, then once more."""
+    try:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await run_in_threadpool(engine.flush)
+            except Exception as e:
+                logger.error(f"Commission accrual failed: {str(e)}")
+    finally:
+        # Charge what was queued since the last batch before the worker exits
+        try:
+            engine.flush()
+        except Exception as e:
+            logger.error(f"Final commission accrual failed: {str(e)}")
+
+
+# ==================== Trade close tracking ====================
+
+@event.listens_for(Session, "after_flush")
+def _record_trade_closes(session: Session, flush_context) -> None:
+    closed = closed_trades(session)
+    if closed:
+        session.info.setdefault("closed_trade_ids", set()).update(trade.id for trade in closed)
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_trade_closes(session: Session) -> None:
+    closed = session.info.pop("closed_trade_ids", None)
+    # Workers without an accrual task leave their closes to another worker's sweep
+    if closed and settings.COMMISSION_ACCRUAL_ENABLED:
+        commission_engine.record_closes(closed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_trade_closes(session: Session) -> None:
+    session.info.pop("closed_trade_ids", None)
@@ -0,0 +1,351 @@
+"""
+Live net exposure for the dealing desk.
+
+Open positions are aggregated in memory into buckets of (symbol, branch,
+routing type). Each bucket is a slot in a set of parallel arrays holding
+long and short lots, the lots-weighted open prices of each side, the open
+position count and unrealized P&L, so an update touches a handful of array
+cells and reads never look at ``trades``:
+
+- a trade committed as OPEN adds to its bucket, and a committed close (or
+  cancel, or delete) takes out exactly what it added,
+- a price tick revalues only the buckets of its symbol: longs at the bid,
+  shorts at the ask, times the symbol's contract size.
+
+A trade's routing type is that of the first active routing rule, by
+priority, whose symbol and lot range match it when it opens (A-Book when
+none does).
+
+State is loaded from the open positions on first use and reloaded every
+``resync_seconds`` to pick up trades opened or closed in other worker
+processes; this worker's own commits are applied as they happen. Every
+bucket carries the version at which it last changed, so streaming clients
+receive only the buckets that moved since their last update. A reload keeps
+every bucket seen so far, so one emptied by another worker is sent as a
+zeroed row rather than silently dropped.
+"""
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.product_spread import ProductSpread
+from app.models.routing_rule import RoutingRule, RoutingType
+from app.models.trade import Trade, TradeStatus, TradeType
+from app.models.user import User
+from app.services.instruments import contract_size
+
+# Dimensions the exposure API can group by, and the field each one reports
+DIMENSIONS = {"symbol": "symbol", "branch": "branch_id", "routing": "routing_type"}
+
+# (symbol, branch id, routing type)
+Bucket = Tuple[str, Optional[int], RoutingType]
+
+
+class Position(NamedTuple):
+    trade_id: int
+    symbol: str
+    branch_id: Optional[int]
+    is_long: bool
+    lots: float
+    open_price: float
+
+
+class _Book:
+    """Slot-indexed accumulators for every bucket seen so far."""
+
+    def __init__(self):
+        self.slots: Dict[Bucket, int] = {}
+        self.buckets: List[Bucket] = []
+        self.by_symbol: Dict[str, List[int]] = {}
+        self.long_lots = array("d")
+        self.short_lots = array("d")
+        self.long_cost = array("d")  # sum of lots * open price
+        self.short_cost = array("d")
+        self.unrealized = array("d")
+        self.positions = array("q")
+        self.versions = array("Q")
+        # trade id -> (slot, is long, lots, open price), so a close removes what its open added
+        self.open_trades: Dict[int, Tuple[int, bool, float, float]] = {}
+
+    def slot(self, bucket: Bucket) -> int:
+        slot = self.slots.get(bucket)
+        if slot is None:
+            slot = self.slots[bucket] = len(self.buckets)
+            self.buckets.append(bucket)
+            self.by_symbol.setdefault(bucket[0], []).append(slot)
+            for accumulator in (self.long_lots, self.short_lots, self.long_cost, self.short_cost,
+                                self.unrealized, self.positions, self.versions):
+                accumulator.append(0)
+        return slot
+
+    def add(self, trade_id: int, slot: int, is_long: bool, lots: float, open_price: float, sign: int) -> None:
+        if is_long:
+            self.long_lots[slot] += sign * lots
+            self.long_cost[slot] += sign * lots * open_price
+        else:
+            self.short_lots[slot] += sign * lots
+            self.short_cost[slot] += sign * lots * open_price
+        self.positions[slot] += sign
+        if sign > 0:
+            self.open_trades[trade_id] = (slot, is_long, lots, open_price)
+
+
+class ExposureAggregator:
+    """Net lots, notional and unrealized P&L of open positions by symbol, branch and routing type."""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        resync_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.session_factory = session_factory
+        self.resync_seconds = resync_seconds
+        self.clock = clock
+
+        self._book = _Book()
+        self._prices: Dict[str, Tuple[float, float]] = {}  # symbol -> (bid, ask)
+        self._contract_sizes: Dict[str, int] = {}
+        self._rules: List[tuple] = []  # (symbol, min lots, max lots, routing type), in priority order
+        self._version = 0
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    # ==================== Loading ====================
+
+    def ensure_loaded(self) -> None:
+        """Load on first use and reload once ``resync_seconds`` have passed."""
+        loaded_at = self._loaded_at
+        if loaded_at is None or self.clock() - loaded_at >= self.resync_seconds:
+            self.reload()
+
+    def reload(self) -> None:
+        """Rebuild every bucket from the open positions, keeping the last known prices and buckets."""
+        with self.session_factory() as db:
+            rules = [
+                (symbol, min_lots, max_lots, routing_type)
+                for symbol, min_lots, max_lots, routing_type in db.execute(
+                    select(RoutingRule.symbol, RoutingRule.min_lot_size, RoutingRule.max_lot_size,
+                           RoutingRule.routing_type)
+                    .where(RoutingRule.is_active.is_(True))
+                    .order_by(RoutingRule.priority, RoutingRule.id)
+                )
+            ]
+            sizes = {symbol: contract_size(category)
+                     for symbol, category in db.execute(select(ProductSpread.symbol, ProductSpread.category))}
+            positions = [
+                _position(trade_id, symbol, branch_id, trade_type, lots, open_price)
+                for trade_id, symbol, branch_id, trade_type, lots, open_price in db.execute(
+                    select(Trade.id, Trade.symbol, User.branch_id, Trade.trade_type, Trade.lots, Trade.open_price)
+                    .join(User, User.id == Trade.user_id)
+                    .where(Trade.status == TradeStatus.OPEN)
+                )
+            ]
+
+        with self._lock:
+            self._rules = rules
+            self._contract_sizes = sizes
+            book = _Book()
+            for bucket in self._book.buckets:
+                book.slot(bucket)
+            self._book = book
+            self._version += 1
+            self._open(positions)
+            for slot in range(len(self._book.buckets)):
+                self._book.versions[slot] = self._version
+            self._loaded_at = self.clock()
+
+    # ==================== Updates ====================
+
+    def open_positions(self, positions: Iterable[Position]) -> None:
+        with self._lock:
+            self._version += 1
+            self._open(positions)
+
+    def close_positions(self, trade_ids: Iterable[int]) -> None:
+        with self._lock:
+            book = self._book
+            self._version += 1
+            for trade_id in trade_ids:
+                opened = book.open_trades.pop(trade_id, None)
+                if opened is None:
+                    continue
+                slot, is_long, lots, open_price = opened
+                book.add(trade_id, slot, is_long, lots, open_price, -1)
+                self._revalue(slot)
+
+    def on_tick(self, symbol: str, bid: float, ask: float) -> None:
+        """Record a price and revalue the buckets of ``symbol``."""
+        with self._lock:
+            self._prices[symbol] = (bid, ask)
+            slots = self._book.by_symbol.get(symbol)
+            if slots:
+                self._version += 1
+                for slot in slots:
+                    self._revalue(slot)
+
+    def price(self, symbol: str) -> Optional[Tuple[float, float]]:
+        """Last (bid, ask) received for ``symbol``."""
+        return self._prices.get(symbol)
+
+    def routing_type(self, symbol: str, lots: float) -> RoutingType:
+        for rule_symbol, min_lots, max_lots, routing_type in self._rules:
+            if rule_symbol is not None and rule_symbol != symbol:
+                continue
+            if (min_lots is not None and lots < min_lots) or (max_lots is not None and lots > max_lots):
+                continue
+            return routing_type
+        return RoutingType.A_BOOK
+
+    def _open(self, positions: Iterable[Position]) -> None:
+        book = self._book
+        for position in positions:
+            if position.trade_id in book.open_trades:
+                continue
+            bucket = (position.symbol, position.branch_id, self.routing_type(position.symbol, position.lots))
+            slot = book.slot(bucket)
+            book.add(position.trade_id, slot, position.is_long, position.lots, position.open_price, 1)
+            self._revalue(slot)
+
+    def _revalue(self, slot: int) -> None:
+        book = self._book
+        symbol = book.buckets[slot][0]
+        price = self._prices.get(symbol)
+        if price is not None:
+            bid, ask = price
+            size = self._contract_sizes.get(symbol) or contract_size(None)
+            book.unrealized[slot] = size * (
+                (bid * book.long_lots[slot] - book.long_cost[slot])
+                + (book.short_cost[slot] - ask * book.short_lots[slot])
+            )
+        book.versions[slot] = self._version
+
+    # ==================== Reads ====================
+
+    def snapshot(
+        self,
+        group_by: Sequence[str] = tuple(DIMENSIONS),
+        symbol: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        routing_type: Optional[RoutingType] = None
+    ) -> List[dict]:
+        """Exposure grouped by ``group_by`` (names from ``DIMENSIONS``), ordered by those dimensions."""
+        with self._lock:
+            rows = [
+                self._row(slot) for slot, bucket in enumerate(self._book.buckets)
+                if (symbol is None or bucket[0] == symbol)
+                and (branch_id is None or bucket[1] == branch_id)
+                and (routing_type is None or bucket[2] == routing_type)
+            ]
+        if list(group_by) == list(DIMENSIONS):
+            grouped = rows
+        else:
+            totals: Dict[tuple, dict] = {}
+            for row in rows:
+                key = tuple(row[DIMENSIONS[name]] for name in group_by)
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = {**{DIMENSIONS[name]: value for name, value in zip(group_by, key)},
+                                   **{field: row[field] for field in _TOTAL_FIELDS}}
+                else:
+                    for field in _TOTAL_FIELDS:
+                        total[field] += row[field]
+            grouped = list(totals.values())
+        return sorted(grouped, key=lambda row: tuple(_sort_key(row[DIMENSIONS[name]]) for name in group_by))
+
+    def changes_since(self, version: int) -> Tuple[int, List[dict]]:
+        """Current version, and every (symbol, branch, routing) bucket that changed after ``version``."""
+        with self._lock:
+            book = self._book
+            return self._version, [self._row(slot) for slot in range(len(book.buckets))
+                                   if book.versions[slot] > version]
+
+    def _row(self, slot: int) -> dict:
+        book = self._book
+        symbol, branch_id, routing_type = book.buckets[slot]
+        size = self._contract_sizes.get(symbol) or contract_size(None)
+        return {
+            "symbol": symbol,
+            "branch_id": branch_id,
+            "routing_type": routing_type.value,
+            "positions": book.positions[slot],
+            "long_lots": round(book.long_lots[slot], 2),
+            "short_lots": round(book.short_lots[slot], 2),
+            "net_lots": round(book.long_lots[slot] - book.short_lots[slot], 2),
+            "notional": round(size * (book.long_cost[slot] - book.short_cost[slot]), 2),
+            "unrealized_pnl": round(book.unrealized[slot], 2),
+        }
+
+
+_TOTAL_FIELDS = ("positions", "long_lots", "short_lots", "net_lots", "notional", "unrealized_pnl")
+
+
+def _sort_key(value) -> tuple:
+    # Positions of users without a branch sort first
+    return (value is not None, value if value is not None else 0)
+
+
+def _position(trade_id, symbol, branch_id, trade_type, lots, open_price) -> Position:
+    return Position(trade_id, symbol, branch_id, trade_type == TradeType.BUY, float(lots), float(open_price))
+
+
+exposure_aggregator = ExposureAggregator(resync_seconds=settings.EXPOSURE_RESYNC_SECONDS)
+
+
+# ==================== Trade open/close tracking ====================
+
+def _status_changed(trade: Trade) -> bool:
+    return inspect(trade).attrs.status.history.has_changes()
+
+
+@event.listens_for(Session, "after_flush")
+def _record_position_changes(session: Session, flush_context) -> None:
+    if not exposure_aggregator.loaded:
+        # Nothing to keep current until the first read loads the book
+        return
+    opened = [trade for trade in session.new if isinstance(trade, Trade) and trade.status == TradeStatus.OPEN]
+    opened.extend(
+        trade for trade in session.dirty
+        if isinstance(trade, Trade) and trade.status == TradeStatus.OPEN and _status_changed(trade)
+    )
+    closed = [trade.id for trade in session.dirty
+              if isinstance(trade, Trade) and trade.status != TradeStatus.OPEN and _status_changed(trade)]
+    closed.extend(trade.id for trade in session.deleted if isinstance(trade, Trade))
+
+    if opened:
+        branches = dict(session.connection().execute(
+            select(User.id, User.branch_id).where(User.id.in_({trade.user_id for trade in opened}))
+        ).all())
+        session.info.setdefault("opened_positions", []).extend(
+            _position(trade.id, trade.symbol, branches.get(trade.user_id), trade.trade_type,
+                      trade.lots, trade.open_price)
+            for trade in opened
+        )
+    if closed:
+        session.info.setdefault("closed_positions", []).extend(closed)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_position_changes(session: Session) -> None:
+    opened = session.info.pop("opened_positions", None)
+    closed = session.info.pop("closed_positions", None)
+    if opened:
+        exposure_aggregator.open_positions(opened)
+    if closed:
+        exposure_aggregator.close_positions(closed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_position_changes(session: Session) -> None:
+    session.info.pop("opened_positions", None)
+    session.info.pop("closed_positions", None)
@@ -0,0 +1,429 @@
+"""
+Automatic hedging of B-Book exposure at A-Book liquidity providers.
+
+Clients' net B-Book position per symbol comes from the live exposure book.
+The hedge engine keeps the platform's own net position at the LPs (from
+filled ``hedge_orders``) and, once per window, sends an offsetting order
+for every symbol whose unhedged difference has reached the threshold:
+
+    unhedged = client net B-Book lots - hedged lots
+
+A positive difference is bought at an LP and a negative one sold. Client
+trades inside one window are therefore netted into a single order, and
+differences below the threshold wait until they add up.
+
+Each order goes to the best eligible provider: active, supporting the
+symbol and the lot size, ordered by priority and then health (success rate,
+then average latency). A provider that rejects the order or cannot be
+reached is skipped and the next one tried. An order that times out may
+still fill, so it is recorded as UNKNOWN instead and not sent anywhere else:
+the symbol is held until a status query (by the order's client order id,
+which the provider also uses to execute a retried order only once) reports
+whether it filled. Every attempt is recorded with its latency and, for
+fills, its slippage in pips against the last quote, compared with the
+``max_slippage_pips`` of the symbol's routing rule; each provider's
+``avg_latency_ms`` and ``success_rate`` are updated from what was observed.
+
+Orders reach providers through a ``HedgeGateway``, which only has to turn
+(provider, symbol, side, lots, client order id) into a fill and report the
+fill of an earlier order.
+"""
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+from typing import Callable, Dict, List, NamedTuple, Optional, Protocol, Sequence, Set, Tuple
+
+from sqlalchemy import case, func, or_, select, update
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.hedge_order import HedgeOrder, HedgeOrderStatus
+from app.models.liquidity_provider import LiquidityProvider, LPStatus
+from app.models.product_spread import ProductSpread
+from app.models.routing_rule import RoutingRule, RoutingType
+from app.models.trade import TradeType
+from app.services.exposure import ExposureAggregator, exposure_aggregator
+from app.services.instruments import pip_size
+from app.utils.logging import get_logger
+from app.utils.metrics import HEDGE_LATENCY, HEDGE_ORDERS, HEDGE_SLIPPAGE_BREACHES, HEDGE_SLIPPAGE_PIPS
+
+logger = get_logger(__name__)
+
+# Weight of the latest observation in a provider's running latency and success rate
+HEALTH_SMOOTHING = 0.2
+
+
+class Venue(NamedTuple):
+    """A liquidity provider as seen by hedge routing."""
+    id: int
+    code: str
+    priority: int
+    min_lots: float
+    max_lots: float
+    symbols: Optional[frozenset]  # None: every symbol
+    avg_latency_ms: float
+    success_rate: float
+
+    def accepts(self, symbol: str, lots: float) -> bool:
+        return (self.symbols is None or symbol in self.symbols) and lots >= self.min_lots
+
+
+class HedgeFill(NamedTuple):
+    lots: float
+    price: float
+
+
+class HedgeOutcomeUnknown(Exception):
+    """An order may have reached the provider, but whether it was executed is not known (yet)."""
+
+
+class HedgeGateway(Protocol):
+    async def send_order(
+        self, venue: Venue, symbol: str, side: TradeType, lots: float, client_order_id: str
+    ) -> HedgeFill:
+        """Execute a market order at ``venue``, once per ``client_order_id``; raise if it is rejected or cannot
+        be sent, and ``HedgeOutcomeUnknown`` if it may have been executed anyway."""
+
+    async def order_status(self, venue: Venue, client_order_id: str) -> Optional[HedgeFill]:
+        """The fill of an order sent earlier, None if it was not executed; raise while that is not known."""
+
+
+class HedgeAttempt(NamedTuple):
+    venue: Venue
+    symbol: str
+    side: TradeType
+    lots: float
+    client_order_id: str
+    status: HedgeOrderStatus
+    fill: Optional[HedgeFill]
+    error: Optional[str]
+    requested_price: Optional[float]
+    slippage_pips: Optional[float]
+    max_slippage_pips: Optional[float]
+    latency_ms: float
+
+
+def parse_symbols(value: Optional[str]) -> Optional[frozenset]:
+    """Symbols in a provider's comma-separated ``supported_symbols``; None when it supports every symbol."""
+    symbols = frozenset(s.strip().upper() for s in (value or "").split(",") if s.strip())
+    return symbols or None
+
+
+VENUE_COLUMNS = (
+    LiquidityProvider.id, LiquidityProvider.code, LiquidityProvider.priority, LiquidityProvider.min_lot_size,
+    LiquidityProvider.max_lot_size, LiquidityProvider.supported_symbols, LiquidityProvider.avg_latency_ms,
+    LiquidityProvider.success_rate,
+)
+
+
+def venue_from_row(row) -> Venue:
+    return Venue(row.id, row.code, row.priority or 0, row.min_lot_size or 0.0, row.max_lot_size or float("inf"),
+                 parse_symbols(row.supported_symbols), row.avg_latency_ms or 0.0,
+                 100.0 if row.success_rate is None else row.success_rate)
+
+
+def load_venues(db) -> List[Venue]:
+    """Providers that are enabled and in the active state."""
+    return [
+        venue_from_row(row)
+        for row in db.execute(
+            select(*VENUE_COLUMNS)
+            .where(LiquidityProvider.is_active.is_(True), LiquidityProvider.status == LPStatus.ACTIVE)
+        )
+    ]
+
+
+def rank_venues(venues: Sequence[Venue], symbol: str, lots: float) -> List[Venue]:
+    """Providers that can take ``lots`` of ``symbol``, best first: by priority, then health."""
+    return sorted(
+        (venue for venue in venues if venue.accepts(symbol, lots)),
+        key=lambda venue: (venue.priority, -venue.success_rate, venue.avg_latency_ms, venue.id)
+    )
+
+
+def slippage_pips(side: TradeType, requested: float, filled: float, pip: float) -> float:
+    """Slippage of a fill in pips; positive when it is worse than the requested price."""
+    moved = filled - requested if side == TradeType.BUY else requested - filled
+    return round(moved / pip, 2)
+
+
+class HedgeEngine:
+    """Offsets net B-Book exposure per symbol with orders at liquidity providers."""
+
+    def __init__(
+        self,
+        gateway: HedgeGateway,
+        aggregator: ExposureAggregator = exposure_aggregator,
+        session_factory=SessionLocal,
+        threshold_lots: float = settings.HEDGE_THRESHOLD_LOTS,
+        order_timeout: float = settings.HEDGE_ORDER_TIMEOUT_SECONDS,
+        clock: Callable[[], float] = time.perf_counter
+    ):
+        self.gateway = gateway
+        self.aggregator = aggregator
+        self.session_factory = session_factory
+        self.threshold_lots = threshold_lots
+        self.order_timeout = order_timeout
+        self.clock = clock
+
+        self._hedged: Optional[Dict[str, float]] = None
+
+    # ==================== Positions ====================
+
+    def hedged(self) -> Dict[str, float]:
+        """Net lots held at providers per symbol (positive: long), loaded from filled orders on first use."""
+        if self._hedged is None:
+            signed = case((HedgeOrder.side == TradeType.BUY, HedgeOrder.filled_lots), else_=-HedgeOrder.filled_lots)
+            with self.session_factory() as db:
+                self._hedged = {
+                    symbol: float(lots or 0)
+                    for symbol, lots in db.execute(
+                        select(HedgeOrder.symbol, func.sum(signed))
+                        .where(HedgeOrder.status == HedgeOrderStatus.FILLED)
+                        .group_by(HedgeOrder.symbol)
+                    )
+                }
+        return dict(self._hedged)
+
+    def unhedged(self) -> Dict[str, float]:
+        """Client net B-Book lots not yet offset at a provider, per symbol."""
+        self.aggregator.ensure_loaded()
+        hedged = self.hedged()
+        exposure = {row["symbol"]: row["net_lots"]
+                    for row in self.aggregator.snapshot(["symbol"], routing_type=RoutingType.B_BOOK)}
+        return {
+            symbol: round(exposure.get(symbol, 0.0) - hedged.get(symbol, 0.0), 2)
+            for symbol in set(exposure) | set(hedged)
+        }
+
+    def due_orders(self, unhedged: Dict[str, float]) -> List[Tuple[str, TradeType, float]]:
+        return [
+            (symbol, TradeType.BUY if lots > 0 else TradeType.SELL, abs(lots))
+            for symbol, lots in sorted(unhedged.items())
+            if abs(lots) >= self.threshold_lots
+        ]
+
+    def _add_fill(self, symbol: str, side: TradeType, fill: HedgeFill) -> None:
+        signed = fill.lots if side == TradeType.BUY else -fill.lots
+        self._hedged[symbol] = round(self._hedged.get(symbol, 0.0) + signed, 2)
+
+    # ==================== Hedging ====================
+
+    async def rebalance(self) -> List[HedgeAttempt]:
+        """Send one order for every symbol whose unhedged lots reached the threshold; returns every attempt.
+
+        Symbols with an order of unknown outcome are left alone until it is resolved."""
+        unresolved = await self.resolve()
+        orders = [order for order in self.due_orders(await run_in_threadpool(self.unhedged))
+                  if order[0] not in unresolved]
+        if not orders:
+            return []
+
+        venues, instruments = await run_in_threadpool(self._load_routing, {symbol for symbol, _, _ in orders})
+        attempts = []
+        for batch in await asyncio.gather(*(
+            self._hedge(symbol, side, lots, venues, *instruments.get(symbol, (pip_size(symbol, None), None)))
+            for symbol, side, lots in orders
+        )):
+            attempts.extend(batch)
+        await run_in_threadpool(self._record, attempts)
+        return attempts
+
+    async def _hedge(
+        self,
+        symbol: str,
+        side: TradeType,
+        lots: float,
+        venues: Sequence[Venue],
+        pip: float,
+        max_slippage: Optional[float]
+    ) -> List[HedgeAttempt]:
+        candidates = rank_venues(venues, symbol, lots)
+        if not candidates:
+            logger.warning("No liquidity provider can hedge %s %s lots of %s", side.value, lots, symbol)
+            return []
+
+        quote = self.aggregator.price(symbol)
+        requested = None if quote is None else (quote[1] if side == TradeType.BUY else quote[0])
+        attempts = []
+        for venue in candidates:
+            size = min(lots, venue.max_lots)
+            client_order_id = uuid.uuid4().hex
+            started = self.clock()
+            try:
+                fill = await asyncio.wait_for(
+                    self.gateway.send_order(venue, symbol, side, size, client_order_id), self.order_timeout
+                )
+            except (asyncio.TimeoutError, HedgeOutcomeUnknown) as e:
+                # It may still fill at this provider: sending it to the next one could hedge twice
+                latency_ms = (self.clock() - started) * 1000
+                error = str(e) or type(e).__name__
+                logger.error("Hedge %s %s %s at %s has an unknown outcome (%s); holding %s until it is resolved",
+                             side.value, size, symbol, venue.code, error, symbol)
+                attempts.append(HedgeAttempt(venue, symbol, side, size, client_order_id, HedgeOrderStatus.UNKNOWN,
+                                             None, error, requested, None, max_slippage, latency_ms))
+                break
+            except Exception as e:
+                latency_ms = (self.clock() - started) * 1000
+                error = str(e) or type(e).__name__
+                logger.warning("Hedge %s %s %s at %s failed: %s", side.value, size, symbol, venue.code, error)
+                attempts.append(HedgeAttempt(venue, symbol, side, size, client_order_id, HedgeOrderStatus.FAILED,
+                                             None, error, requested, None, max_slippage, latency_ms))
+                continue
+
+            latency_ms = (self.clock() - started) * 1000
+            slipped = None if requested is None else slippage_pips(side, requested, fill.price, pip)
+            attempts.append(HedgeAttempt(venue, symbol, side, size, client_order_id, HedgeOrderStatus.FILLED,
+                                         fill, None, requested, slipped, max_slippage, latency_ms))
+            self._add_fill(symbol, side, fill)
+            break
+        return attempts
+
+    async def resolve(self) -> Set[str]:
+        """Ask providers how orders of unknown outcome ended; returns the symbols still waiting for an answer."""
+        pending = await run_in_threadpool(self._load_unknown)
+        if not pending:
+            return set()
+
+        # The position must be loaded before late fills are added to it
+        await run_in_threadpool(self.hedged)
+        unresolved, resolved = set(), []
+        for row in pending:
+            venue = venue_from_row(row)
+            try:
+                fill = await asyncio.wait_for(
+                    self.gateway.order_status(venue, row.client_order_id), self.order_timeout
+                )
+            except Exception as e:
+                logger.warning("Hedge %s of %s at %s is still unresolved: %s", row.client_order_id, row.symbol,
+                               venue.code, str(e) or type(e).__name__)
+                unresolved.add(row.symbol)
+                continue
+
+            logger.info("Hedge %s of %s at %s resolved: %s", row.client_order_id, row.symbol, venue.code,
+                        "filled" if fill is not None else "not executed")
+            resolved.append((row, fill))
+            if fill is not None:
+                self._add_fill(row.symbol, row.side, fill)
+        if resolved:
+            await run_in_threadpool(self._record_resolved, resolved)
+        return unresolved
+
+    # ==================== Persistence ====================
+
+    def _load_routing(self, symbols) -> Tuple[List[Venue], Dict[str, Tuple[float, Optional[float]]]]:
+        """Eligible providers, and (pip size, max slippage pips) for each of ``symbols``."""
+        with self.session_factory() as db:
+            venues = load_venues(db)
+            categories = dict(db.execute(
+                select(ProductSpread.symbol, ProductSpread.category).where(ProductSpread.symbol.in_(sorted(symbols)))
+            ).all())
+            rules = db.execute(
+                select(RoutingRule.symbol, RoutingRule.max_slippage_pips)
+                .where(RoutingRule.is_active.is_(True), RoutingRule.max_slippage_pips.is_not(None),
+                       or_(RoutingRule.symbol.in_(sorted(symbols)), RoutingRule.symbol.is_(None)))
+                .order_by(RoutingRule.priority, RoutingRule.id)
+            ).all()
+
+        instruments = {}
+        for symbol in symbols:
+            limit = next((pips for rule_symbol, pips in rules if rule_symbol in (None, symbol)), None)
+            instruments[symbol] = (pip_size(symbol, categories.get(symbol)), limit)
+        return venues, instruments
+
+    def _record(self, attempts: Sequence[HedgeAttempt]) -> None:
+        """Store the attempts, update provider health and export latency and slippage."""
+        health: Dict[int, List[float]] = {}
+        for attempt in attempts:
+            venue = attempt.venue
+            HEDGE_ORDERS.labels(venue.code, attempt.status.value).inc()
+            HEDGE_LATENCY.labels(venue.code).observe(attempt.latency_ms / 1000)
+            if attempt.slippage_pips is not None:
+                HEDGE_SLIPPAGE_PIPS.labels(attempt.symbol).observe(attempt.slippage_pips)
+                if attempt.max_slippage_pips is not None and attempt.slippage_pips > attempt.max_slippage_pips:
+                    HEDGE_SLIPPAGE_BREACHES.labels(attempt.symbol).inc()
+                    logger.warning("Hedge of %s at %s slipped %.1f pips (limit %.1f)", attempt.symbol,
+                                   venue.code, attempt.slippage_pips, attempt.max_slippage_pips)
+
+            latency, success = health.get(venue.id, (venue.avg_latency_ms, venue.success_rate))
+            if attempt.fill is not None:
+                latency += HEALTH_SMOOTHING * (attempt.latency_ms - latency)
+            success += HEALTH_SMOOTHING * ((100.0 if attempt.fill is not None else 0.0) - success)
+            health[venue.id] = [latency, success]
+
+        with self.session_factory() as db:
+            db.add_all(HedgeOrder(
+                lp_id=attempt.venue.id,
+                client_order_id=attempt.client_order_id,
+                symbol=attempt.symbol,
+                side=attempt.side,
+                lots=Decimal(str(attempt.lots)),
+                filled_lots=Decimal(str(attempt.fill.lots)) if attempt.fill is not None else Decimal("0"),
+                status=attempt.status,
+                error=attempt.error,
+                requested_price=attempt.requested_price,
+                fill_price=attempt.fill.price if attempt.fill is not None else None,
+                slippage_pips=attempt.slippage_pips,
+                max_slippage_pips=attempt.max_slippage_pips,
+                latency_ms=round(attempt.latency_ms, 3),
+            ) for attempt in attempts)
+            if health:
+                db.execute(update(LiquidityProvider), [
+                    {"id": lp_id, "avg_latency_ms": round(latency, 3), "success_rate": round(success, 3)}
+                    for lp_id, (latency, success) in health.items()
+                ])
+            db.commit()
+
+    def _load_unknown(self):
+        """Orders of unknown outcome with their provider, and the symbol's category for its pip size."""
+        with self.session_factory() as db:
+            return db.execute(
+                select(HedgeOrder.id.label("order_id"), HedgeOrder.symbol, HedgeOrder.side,
+                       HedgeOrder.client_order_id, HedgeOrder.requested_price, HedgeOrder.max_slippage_pips,
+                       ProductSpread.category, *VENUE_COLUMNS)
+                .join(LiquidityProvider, LiquidityProvider.id == HedgeOrder.lp_id)
+                .outerjoin(ProductSpread, ProductSpread.symbol == HedgeOrder.symbol)
+                .where(HedgeOrder.status == HedgeOrderStatus.UNKNOWN)
+                .order_by(HedgeOrder.id)
+            ).all()
+
+    def _record_resolved(self, resolved) -> None:
+        """Store how orders of unknown outcome ended, with the slippage of late fills."""
+        changes = []
+        for row, fill in resolved:
+            status = HedgeOrderStatus.FILLED if fill is not None else HedgeOrderStatus.FAILED
+            slipped = None
+            if fill is not None and row.requested_price is not None:
+                slipped = slippage_pips(row.side, float(row.requested_price), fill.price,
+                                        pip_size(row.symbol, row.category))
+                HEDGE_SLIPPAGE_PIPS.labels(row.symbol).observe(slipped)
+                if row.max_slippage_pips is not None and slipped > row.max_slippage_pips:
+                    HEDGE_SLIPPAGE_BREACHES.labels(row.symbol).inc()
+            changes.append({
+                "id": row.order_id,
+                "status": status,
+                "filled_lots": Decimal(str(fill.lots)) if fill is not None else Decimal("0"),
+                "fill_price": fill.price if fill is not None else None,
+                "slippage_pips": slipped,
+            })
+
+        with self.session_factory() as db:
+            db.execute(update(HedgeOrder), changes)
+            db.commit()
+
+
+async def run_hedging(engine: HedgeEngine, window_seconds: float) -> None:
+    """Rebalance hedges every ``window_seconds`` until cancelled, letting a running rebalance finish."""
+    while True:
+        await asyncio.sleep(window_seconds)
+        rebalance = asyncio.ensure_future(engine.rebalance())
+        try:
+            await asyncio.shield(rebalance)
+        except asyncio.CancelledError:
+            # Its orders may already be filled at a provider; record them before the worker exits
+            await asyncio.gather(rebalance, return_exceptions=True)
+            raise
+        except Exception as e:
+            logger.error(f"Hedge rebalance failed: {str(e)}")
@@ -0,0 +1,43 @@
+"""
+Instrument reference data shared by the margin, exposure and swap engines.
+"""
+from sqlalchemy import case, literal
+from sqlalchemy.sql.elements import ColumnElement
+
+
+# Units per 1.0 lot, keyed by ProductSpread.category
+CONTRACT_SIZE_BY_CATEGORY = {
+    "forex": 100000,
+    "commodity": 100,
+    "crypto": 1,
+}
+DEFAULT_CONTRACT_SIZE = 100000
+
+# Price move of one pip, keyed by ProductSpread.category (JPY-quoted forex pairs use 0.01)
+PIP_SIZE_BY_CATEGORY = {
+    "forex": 0.0001,
+    "commodity": 0.01,
+    "crypto": 1.0,
+}
+
+
+def contract_size(category: str) -> int:
+    """Contract size for a product category."""
+    return CONTRACT_SIZE_BY_CATEGORY.get(category or "", DEFAULT_CONTRACT_SIZE)
+
+
+def pip_size(symbol: str, category: str) -> float:
+    """Size of one pip for a symbol of a product category."""
+    category = category or "forex"
+    if category == "forex" and symbol.endswith("JPY"):
+        return 0.01
+    return PIP_SIZE_BY_CATEGORY.get(category, PIP_SIZE_BY_CATEGORY["forex"])
+
+
+def contract_size_expr(category_column) -> ColumnElement:
+    """SQL CASE expression mapping a category column to its contract size."""
+    return case(
+        {category: literal(size) for category, size in CONTRACT_SIZE_BY_CATEGORY.items()},
+        value=category_column,
+        else_=literal(DEFAULT_CONTRACT_SIZE),
+    )
@@ -0,0 +1,301 @@
+"""
+Connections to liquidity providers: orders over pooled HTTP, quotes over
+persistent WebSockets.
+
+Every active provider gets one ``LPConnector`` built from its
+``api_endpoint``, ``api_key`` and ``websocket_url``:
+
+- Orders share one ``httpx.AsyncClient`` per provider, so connections are
+  kept alive and reused rather than opened per order. Up to
+  ``LP_MAX_CONCURRENCY`` orders are in flight at once over at most
+  ``LP_MAX_CONNECTIONS`` connections (or multiplexed on a single HTTP/2
+  connection with ``LP_HTTP2``); further orders wait for a free slot instead
+  of piling more sockets onto the provider. Every order carries the hedge
+  engine's client order id: the provider executes an id only once, and
+  ``GET /orders/{client_order_id}`` reports how it ended. An order whose
+  request may have reached the provider (a read timeout, a dropped
+  connection) raises ``HedgeOutcomeUnknown`` rather than ``LPError``.
+- Quotes arrive over one WebSocket per provider, held open for the life of
+  the process. A lost or refused connection is retried after an exponential
+  backoff with jitter, from ``LP_RECONNECT_MIN_SECONDS`` up to
+  ``LP_RECONNECT_MAX_SECONDS``.
+
+``LPConnector`` speaks a plain JSON protocol (``benchmarks.lp_simulator``
+implements the provider side). A provider with a different wire format gets
+a subclass overriding the request and message hooks, registered for its
+``LPType`` with ``register_connector``.
+
+``LPGateway`` holds the connectors of all active providers. It is the
+``HedgeGateway`` the hedge engine sends orders through, and feeds the
+exposure book each symbol's quotes from the highest-priority provider that is
+currently connected, falling back to the next one while it is down.
+"""
+import asyncio
+import random
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+import httpx
+import orjson
+import websockets
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.liquidity_provider import LiquidityProvider, LPStatus, LPType
+from app.models.product_spread import ProductSpread
+from app.models.trade import TradeType
+from app.services.exposure import exposure_aggregator
+from app.services.hedging import HedgeFill, HedgeOutcomeUnknown, Venue, parse_symbols
+from app.utils.logging import get_logger
+from app.utils.metrics import LP_ORDERS_IN_FLIGHT, LP_RECONNECTS
+
+logger = get_logger(__name__)
+
+QuoteHandler = Callable[[str, float, float], None]
+
+
+class LPError(Exception):
+    """A liquidity provider rejected an order or could not be reached."""
+
+
+# The request never left: the order certainly was not executed
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+CONNECTORS: Dict[LPType, Type["LPConnector"]] = {}
+
+
+def register_connector(*lp_types: LPType):
+    """Class decorator making the class the connector for providers of ``lp_types``."""
+    def register(cls):
+        for lp_type in lp_types:
+            CONNECTORS[lp_type] = cls
+        return cls
+    return register
+
+
+def connector_class(lp_type: LPType) -> Type["LPConnector"]:
+    return CONNECTORS.get(lp_type, LPConnector)
+
+
+def backoff_delay(attempt: int, minimum: float, maximum: float, rng: Callable[[], float] = random.random) -> float:
+    """Seconds to wait before reconnect ``attempt`` (0-based): doubling, capped, with up to 50% jitter."""
+    return min(maximum, minimum * 2 ** attempt) * (0.5 + rng() / 2)
+
+
+class LPConnector:
+    """Order entry and market data for one liquidity provider."""
+
+    def __init__(
+        self,
+        code: str,
+        api_endpoint: Optional[str],
+        api_key: Optional[str] = None,
+        websocket_url: Optional[str] = None,
+        max_connections: int = settings.LP_MAX_CONNECTIONS,
+        max_concurrency: int = settings.LP_MAX_CONCURRENCY,
+        timeout: float = settings.LP_HTTP_TIMEOUT_SECONDS,
+        http2: bool = settings.LP_HTTP2,
+        reconnect_min: float = settings.LP_RECONNECT_MIN_SECONDS,
+        reconnect_max: float = settings.LP_RECONNECT_MAX_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        connect: Callable = websockets.connect
+    ):
+        self.code = code
+        self.api_key = api_key
+        self.websocket_url = websocket_url
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.connected = False
+
+        self._connect = connect
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._http = httpx.AsyncClient(
+            base_url=api_endpoint or "",
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else None,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            http2=http2,
+            transport=transport
+        )
+
+    # ==================== Wire format hooks ====================
+
+    def order_request(self, symbol: str, side: TradeType, lots: float, client_order_id: str) -> dict:
+        """Arguments for ``httpx.AsyncClient.request`` placing a market order."""
+        return {"method": "POST", "url": "/orders", "json": {
+            "symbol": symbol, "side": side.value, "lots": lots, "client_order_id": client_order_id
+        }}
+
+    def parse_fill(self, response: httpx.Response) -> HedgeFill:
+        payload = response.json()
+        if response.is_error or payload.get("status") != "filled":
+            raise LPError(payload.get("detail") or f"{payload.get('status') or 'HTTP'} {response.status_code}")
+        return HedgeFill(float(payload["filled_lots"]), float(payload["price"]))
+
+    def status_request(self, client_order_id: str) -> dict:
+        """Arguments for ``httpx.AsyncClient.request`` asking how an earlier order ended."""
+        return {"method": "GET", "url": f"/orders/{client_order_id}"}
+
+    def parse_status(self, response: httpx.Response) -> Optional[HedgeFill]:
+        if response.status_code == 404:
+            return None  # never received
+        payload = response.json()
+        if response.is_error or payload.get("status") == "pending":
+            raise HedgeOutcomeUnknown(payload.get("detail") or f"{payload.get('status') or 'HTTP'} "
+                                      f"{response.status_code}")
+        if payload.get("status") != "filled":
+            return None
+        return HedgeFill(float(payload["filled_lots"]), float(payload["price"]))
+
+    def subscribe_message(self, symbols: Iterable[str]) -> str:
+        return orjson.dumps({"action": "subscribe", "api_key": self.api_key, "symbols": sorted(symbols)}).decode()
+
+    def parse_quotes(self, message) -> Iterable[Tuple[str, float, float]]:
+        """(symbol, bid, ask) for each quote in a market data message."""
+        data = orjson.loads(message)
+        for quote in data if isinstance(data, list) else [data]:
+            if "bid" in quote and "ask" in quote:
+                yield quote["symbol"], float(quote["bid"]), float(quote["ask"])
+
+    # ==================== Orders ====================
+
+    async def send_order(self, symbol: str, side: TradeType, lots: float, client_order_id: str) -> HedgeFill:
+        """Place a market order; raises ``LPError`` if it is rejected or the provider cannot be reached, and
+        ``HedgeOutcomeUnknown`` if it was sent but no answer came back."""
+        async with self._slots:
+            in_flight = LP_ORDERS_IN_FLIGHT.labels(self.code)
+            in_flight.inc()
+            try:
+                response = await self._http.request(**self.order_request(symbol, side, lots, client_order_id))
+            except NOT_SENT_ERRORS as e:
+                raise LPError(str(e) or type(e).__name__) from e
+            except httpx.HTTPError as e:
+                raise HedgeOutcomeUnknown(str(e) or type(e).__name__) from e
+            finally:
+                in_flight.dec()
+        try:
+            return self.parse_fill(response)
+        except (ValueError, KeyError, TypeError) as e:
+            raise HedgeOutcomeUnknown(f"Unreadable order response (HTTP {response.status_code})") from e
+
+    async def order_status(self, client_order_id: str) -> Optional[HedgeFill]:
+        """The fill of an earlier order, None if it was not executed; raises ``HedgeOutcomeUnknown`` while the
+        provider cannot tell."""
+        try:
+            response = await self._http.request(**self.status_request(client_order_id))
+        except httpx.HTTPError as e:
+            raise HedgeOutcomeUnknown(str(e) or type(e).__name__) from e
+        try:
+            return self.parse_status(response)
+        except (ValueError, KeyError, TypeError) as e:
+            raise HedgeOutcomeUnknown(f"Unreadable status response (HTTP {response.status_code})") from e
+
+    # ==================== Market data ====================
+
+    async def stream_quotes(self, symbols: Iterable[str], on_quote: QuoteHandler) -> None:
+        """Pass every quote for ``symbols`` to ``on_quote`` until cancelled, reconnecting as needed."""
+        symbols = list(symbols)
+        attempt = 0
+        while True:
+            try:
+                async with self._connect(self.websocket_url) as ws:
+                    await ws.send(self.subscribe_message(symbols))
+                    self.connected = True
+                    attempt = 0
+                    logger.info("Market data from %s connected (%d symbols)", self.code, len(symbols))
+                    async for message in ws:
+                        for symbol, bid, ask in self.parse_quotes(message):
+                            on_quote(symbol, bid, ask)
+                reason = "closed by provider"
+            except Exception as e:
+                reason = str(e) or type(e).__name__
+            finally:
+                self.connected = False
+
+            delay = backoff_delay(attempt, self.reconnect_min, self.reconnect_max)
+            attempt += 1
+            LP_RECONNECTS.labels(self.code).inc()
+            logger.warning("Market data from %s lost (%s); reconnecting in %.1fs", self.code, reason, delay)
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+class LPGateway:
+    """Connectors for every active liquidity provider: hedge order routing and the exposure book's quotes."""
+
+    def __init__(self, session_factory=SessionLocal, aggregator=exposure_aggregator, **connector_options):
+        self.session_factory = session_factory
+        self.aggregator = aggregator
+        self.connector_options = connector_options
+        self.connectors: Dict[int, LPConnector] = {}
+
+        self._quote_sources: Dict[str, List[int]] = {}  # symbol -> streaming providers, best first
+        self._tasks: List[asyncio.Task] = []
+
+    def _load(self):
+        with self.session_factory() as db:
+            providers = db.execute(
+                select(LiquidityProvider.id, LiquidityProvider.code, LiquidityProvider.lp_type,
+                       LiquidityProvider.api_endpoint, LiquidityProvider.api_key,
+                       LiquidityProvider.websocket_url, LiquidityProvider.supported_symbols)
+                .where(LiquidityProvider.is_active.is_(True), LiquidityProvider.status == LPStatus.ACTIVE)
+                .order_by(LiquidityProvider.priority, LiquidityProvider.id)
+            ).all()
+            symbols = db.scalars(
+                select(ProductSpread.symbol).where(ProductSpread.is_active.is_(True)).order_by(ProductSpread.symbol)
+            ).all()
+        return providers, symbols
+
+    async def start(self) -> None:
+        """Connect to every active provider and start streaming its quotes."""
+        providers, symbols = await run_in_threadpool(self._load)
+        for provider in providers:
+            self.connectors[provider.id] = connector_class(provider.lp_type)(
+                provider.code, provider.api_endpoint, provider.api_key, provider.websocket_url,
+                **self.connector_options
+            )
+            if not provider.websocket_url:
+                continue
+            supported = parse_symbols(provider.supported_symbols)
+            quoted = [symbol for symbol in symbols if supported is None or symbol in supported]
+            for symbol in quoted:
+                self._quote_sources.setdefault(symbol, []).append(provider.id)
+            self._tasks.append(asyncio.create_task(
+                self.connectors[provider.id].stream_quotes(quoted, partial(self._forward, provider.id))
+            ))
+        logger.info("Connected to %d liquidity providers (%d streaming quotes)", len(self.connectors), len(self._tasks))
+
+    def _forward(self, lp_id: int, symbol: str, bid: float, ask: float) -> None:
+        for source in self._quote_sources.get(symbol, ()):
+            if self.connectors[source].connected:
+                if source == lp_id:
+                    self.aggregator.on_tick(symbol, bid, ask)
+                return
+
+    async def send_order(
+        self, venue: Venue, symbol: str, side: TradeType, lots: float, client_order_id: str
+    ) -> HedgeFill:
+        connector = self.connectors.get(venue.id)
+        if connector is None:
+            raise LPError(f"Not connected to {venue.code}")
+        return await connector.send_order(symbol, side, lots, client_order_id)
+
+    async def order_status(self, venue: Venue, client_order_id: str) -> Optional[HedgeFill]:
+        connector = self.connectors.get(venue.id)
+        if connector is None:
+            raise HedgeOutcomeUnknown(f"Not connected to {venue.code}")
+        return await connector.order_status(client_order_id)
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await asyncio.gather(*(connector.aclose() for connector in self.connectors.values()))
+        self._tasks.clear()
+        self.connectors.clear()
+        self._quote_sources.clear()
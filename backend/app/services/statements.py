@@ -0,0 +1,283 @@
+"""
+Account statements: streaming export and precomputed monthly summaries.
+
+Exports read transactions and trades through server-side cursors
+(``yield_per``) and merge them by time, so memory stays flat no matter how
+long an account's history is. Monthly totals live in
+``account_monthly_summaries`` and are updated in the same database
+transaction as each posting, so statement headers never rescan history.
+"""
+import csv
+import heapq
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.account import Account
+from app.models.account_monthly_summary import AccountMonthlySummary
+from app.models.trade import Trade
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+
+# Rows fetched per server-side cursor round trip
+STREAM_BATCH_SIZE = 1000
+# Rows serialized per chunk handed to the response
+CHUNK_ROWS = 500
+
+STATEMENT_COLUMNS = [
+    "record_type",
+    "id",
+    "time",
+    "type",
+    "symbol",
+    "lots",
+    "open_price",
+    "close_price",
+    "amount",
+    "balance_after",
+    "status",
+    "reference",
+    "description",
+]
+
+STATEMENT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+# ==================== Streaming export ====================
+
+def iter_statement_rows(
+    db: Session,
+    account: Account,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Iterator[dict]:
+    """Yield the account's transactions and trades merged in time order."""
+    tx_stmt = select(
+        Transaction.id,
+        Transaction.created_at,
+        Transaction.transaction_type,
+        Transaction.amount,
+        Transaction.balance_after,
+        Transaction.status,
+        Transaction.reference,
+        Transaction.description,
+    ).where(Transaction.account_id == account.id)
+
+    trade_stmt = select(
+        Trade.id,
+        Trade.opened_at,
+        Trade.trade_type,
+        Trade.symbol,
+        Trade.lots,
+        Trade.open_price,
+        Trade.close_price,
+        Trade.profit_loss,
+        Trade.status,
+        Trade.comment,
+    ).where(Trade.user_id == account.user_id)
+
+    if start is not None:
+        tx_stmt = tx_stmt.where(Transaction.created_at >= start)
+        trade_stmt = trade_stmt.where(Trade.opened_at >= start)
+    if end is not None:
+        tx_stmt = tx_stmt.where(Transaction.created_at < end)
+        trade_stmt = trade_stmt.where(Trade.opened_at < end)
+
+    tx_stmt = tx_stmt.order_by(Transaction.created_at, Transaction.id).execution_options(yield_per=STREAM_BATCH_SIZE)
+    trade_stmt = trade_stmt.order_by(Trade.opened_at, Trade.id).execution_options(yield_per=STREAM_BATCH_SIZE)
+
+    transactions = (
+        {
+            "record_type": "transaction",
+            "id": row.id,
+            "time": row.created_at,
+            "type": row.transaction_type.value,
+            "symbol": None,
+            "lots": None,
+            "open_price": None,
+            "close_price": None,
+            "amount": row.amount,
+            "balance_after": row.balance_after,
+            "status": row.status.value if row.status else None,
+            "reference": row.reference,
+            "description": row.description,
+        }
+        for row in db.execute(tx_stmt)
+    )
+    trades = (
+        {
+            "record_type": "trade",
+            "id": row.id,
+            "time": row.opened_at,
+            "type": row.trade_type.value,
+            "symbol": row.symbol,
+            "lots": row.lots,
+            "open_price": row.open_price,
+            "close_price": row.close_price,
+            "amount": row.profit_loss,
+            "balance_after": None,
+            "status": row.status.value if row.status else None,
+            "reference": None,
+            "description": row.comment,
+        }
+        for row in db.execute(trade_stmt)
+    )
+
+    return heapq.merge(transactions, trades, key=lambda row: (row["time"], row["record_type"], row["id"]))
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(rows: Iterable[dict]) -> Iterator[str]:
+    """Serialize statement rows as CSV, yielding one chunk per CHUNK_ROWS rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(STATEMENT_COLUMNS)
+
+    pending = 0
+    for row in rows:
+        writer.writerow([_plain(row[column]) for column in STATEMENT_COLUMNS])
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue()
+
+
+def ndjson_chunks(rows: Iterable[dict]) -> Iterator[str]:
+    """Serialize statement rows as newline-delimited JSON."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({column: _plain(row[column]) for column in STATEMENT_COLUMNS}))
+        if len(lines) >= CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+# ==================== Monthly summaries ====================
+
+def month_key(moment: datetime) -> str:
+    """Summary bucket for a timestamp, e.g. ``2025-01``."""
+    return moment.strftime("%Y-%m")
+
+
+def _new_summary(account_id: int, month: str, opening_balance: Decimal, factory=AccountMonthlySummary):
+    return factory(
+        account_id=account_id,
+        month=month,
+        opening_balance=opening_balance,
+        closing_balance=opening_balance,
+        deposits=Decimal("0"),
+        withdrawals=Decimal("0"),
+        trade_pnl=Decimal("0"),
+        commissions=Decimal("0"),
+        other=Decimal("0"),
+        transaction_count=0,
+    )
+
+
+def _apply(summary: AccountMonthlySummary, transaction_type: TransactionType, amount,
+           balance_before, balance_after) -> None:
+    amount = Decimal(str(amount))
+    if transaction_type == TransactionType.DEPOSIT:
+        summary.deposits = Decimal(str(summary.deposits)) + amount
+    elif transaction_type == TransactionType.WITHDRAW:
+        summary.withdrawals = Decimal(str(summary.withdrawals)) + amount
+    elif transaction_type == TransactionType.TRADE_PROFIT:
+        summary.trade_pnl = Decimal(str(summary.trade_pnl)) + amount
+    elif transaction_type == TransactionType.TRADE_LOSS:
+        summary.trade_pnl = Decimal(str(summary.trade_pnl)) - amount
+    elif transaction_type == TransactionType.COMMISSION:
+        summary.commissions = Decimal(str(summary.commissions)) + amount
+    else:
+        summary.other = Decimal(str(summary.other)) + Decimal(str(balance_after)) - Decimal(str(balance_before))
+
+    summary.closing_balance = Decimal(str(balance_after))
+    summary.transaction_count = (summary.transaction_count or 0) + 1
+
+
+def record_transaction(db: Session, transaction: Transaction, posted_at: Optional[datetime] = None) -> None:
+    """
+    Fold a completed transaction into its account's monthly summary.
+
+    Call before committing the posting so both land atomically.
+    """
+    if transaction.status != TransactionStatus.COMPLETED:
+        return
+
+    month = month_key(posted_at or datetime.now(timezone.utc))
+    summary = db.query(AccountMonthlySummary).filter(
+        AccountMonthlySummary.account_id == transaction.account_id,
+        AccountMonthlySummary.month == month
+    ).with_for_update().first()
+
+    if summary is None:
+        summary = _new_summary(transaction.account_id, month, Decimal(str(transaction.balance_before)))
+        db.add(summary)
+
+    _apply(summary, transaction.transaction_type, transaction.amount,
+           transaction.balance_before, transaction.balance_after)
+
+
+def rebuild_monthly_summaries(db: Session, account_id: Optional[int] = None) -> int:
+    """Recompute monthly summaries from the ledger in one streaming pass. Returns rows written."""
+    scope = delete(AccountMonthlySummary)
+    stmt = select(
+        Transaction.account_id,
+        Transaction.created_at,
+        Transaction.transaction_type,
+        Transaction.amount,
+        Transaction.balance_before,
+        Transaction.balance_after,
+    ).where(Transaction.status == TransactionStatus.COMPLETED)
+
+    if account_id is not None:
+        scope = scope.where(AccountMonthlySummary.account_id == account_id)
+        stmt = stmt.where(Transaction.account_id == account_id)
+
+    db.execute(scope)
+
+    stmt = stmt.order_by(Transaction.account_id, Transaction.created_at, Transaction.id)
+    written = 0
+    batch = []
+    current = None
+    # Totals are accumulated on plain objects and written with multi-row
+    # inserts; ORM instances would dominate the cost on large ledgers
+    for row in db.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE)):
+        month = month_key(row.created_at)
+        if current is None or current.account_id != row.account_id or current.month != month:
+            current = _new_summary(row.account_id, month, Decimal(str(row.balance_before)), factory=SimpleNamespace)
+            batch.append(current)
+        _apply(current, row.transaction_type, row.amount, row.balance_before, row.balance_after)
+
+        if len(batch) > STREAM_BATCH_SIZE:
+            # Keep the in-progress summary; flush the completed ones
+            db.execute(insert(AccountMonthlySummary), [vars(summary) for summary in batch[:-1]])
+            written += len(batch) - 1
+            batch = batch[-1:]
+
+    if batch:
+        db.execute(insert(AccountMonthlySummary), [vars(summary) for summary in batch])
+    written += len(batch)
+    db.commit()
+    return written
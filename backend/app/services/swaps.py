@@ -0,0 +1,163 @@
+"""
+Nightly swap (rollover) accrual for open positions.
+
+Once per trading day every position still open and opened on or before that
+day accrues ``lots * rate`` into ``trades.swap``, where the rate is its
+symbol's ``swap_long`` or ``swap_short`` from ``product_spreads``. Weekend
+days roll nothing over, and the rollover on ``SWAP_TRIPLE_WEEKDAY``
+(Wednesday by default) charges three nights to cover the weekend. Swap is
+part of a position's floating P&L, so it shows up in equity immediately and
+in the balance when the position closes.
+
+Positions are read in keyset chunks of bare columns (id, symbol, side,
+lots), never as ORM objects. Each chunk is priced column by column against
+per-symbol rates loaded once per run, and written back with a single
+``UPDATE trades ... FROM (VALUES (id, amount), ...)``. The whole rollover is
+one transaction together with its ``swap_rollovers`` row, whose unique day
+makes a repeated run a no-op:
+
+    python -m app.services.swaps               # today (UTC)
+    python -m app.services.swaps --day 2025-03-12
+"""
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, Numeric, column, func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.product_spread import ProductSpread
+from app.models.swap_rollover import SwapRollover
+from app.models.trade import Trade, TradeStatus, TradeType
+from app.utils.bulk import values_source
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0")
+
+# Open positions priced and written back per UPDATE
+SWAP_CHUNK_ROWS = 5000
+
+SWAP_CHARGE_COLUMNS = (column("id", Integer), column("amount", Numeric(precision=15, scale=2)))
+
+
+class RolloverResult(NamedTuple):
+    day: date
+    multiplier: int
+    positions: int
+    total_swap: Decimal
+    seconds: float
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def swap_multiplier(day: date, triple_weekday: int = settings.SWAP_TRIPLE_WEEKDAY) -> int:
+    """Nights of swap charged by the rollover at the end of ``day``."""
+    if day.weekday() >= 5:
+        return 0
+    return 3 if day.weekday() == triple_weekday else 1
+
+
+def swap_rates(db: Session) -> Dict[TradeType, Dict[str, Decimal]]:
+    """Swap per lot by position side, then symbol."""
+    rates: Dict[TradeType, Dict[str, Decimal]] = {TradeType.BUY: {}, TradeType.SELL: {}}
+    for symbol, swap_long, swap_short in db.execute(
+        select(ProductSpread.symbol, ProductSpread.swap_long, ProductSpread.swap_short)
+    ):
+        rates[TradeType.BUY][symbol] = Decimal(str(swap_long or 0))
+        rates[TradeType.SELL][symbol] = Decimal(str(swap_short or 0))
+    return rates
+
+
+def price_chunk(
+    rows: Sequence[tuple],
+    rates: Dict[TradeType, Dict[str, Decimal]],
+    multiplier: int
+) -> List[Tuple[int, Decimal]]:
+    """(trade id, swap amount) for each row of (id, symbol, side, lots) that accrues a non-zero swap."""
+    ids, symbols, sides, lots = zip(*rows)
+    per_lot = [rates[side].get(symbol, ZERO) * multiplier for side, symbol in zip(sides, symbols)]
+    amounts = [_money(Decimal(str(size)) * rate) for size, rate in zip(lots, per_lot)]
+    return [(trade_id, amount) for trade_id, amount in zip(ids, amounts) if amount]
+
+
+def apply_swaps(
+    db: Session,
+    day: date,
+    triple_weekday: int = settings.SWAP_TRIPLE_WEEKDAY,
+    chunk_rows: int = SWAP_CHUNK_ROWS
+) -> Optional[RolloverResult]:
+    """Accrue ``day``'s swap on every open position; returns None if ``day`` was already rolled over."""
+    started = time.perf_counter()
+    if db.execute(select(SwapRollover.id).where(SwapRollover.day == day)).first() is not None:
+        return None
+
+    multiplier = swap_multiplier(day, triple_weekday)
+    rollover = SwapRollover(day=day, multiplier=multiplier, positions=0, total_swap=ZERO)
+    db.add(rollover)
+    db.flush()
+
+    positions, total = 0, ZERO
+    if multiplier:
+        rates = swap_rates(db)
+        cutoff = datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        trades = Trade.__table__
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(Trade.id, Trade.symbol, Trade.trade_type, Trade.lots)
+                .where(Trade.status == TradeStatus.OPEN, Trade.opened_at < cutoff, Trade.id > last_id)
+                .order_by(Trade.id)
+                .limit(chunk_rows)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            charges = price_chunk(rows, rates, multiplier)
+            if charges:
+                source = values_source(db, "swap_charges", SWAP_CHARGE_COLUMNS, charges)
+                db.execute(
+                    update(trades)
+                    .where(trades.c.id == source.c.id)
+                    .values(swap=func.coalesce(trades.c.swap, 0) + source.c.amount)
+                )
+                positions += len(charges)
+                total += sum(amount for _, amount in charges)
+
+    rollover.positions = positions
+    rollover.total_swap = total
+    db.commit()
+
+    result = RolloverResult(day, multiplier, positions, total, time.perf_counter() - started)
+    logger.info(
+        "Swap rollover for %s (x%d): %d positions, %s total in %.2fs",
+        day, multiplier, positions, total, result.seconds
+    )
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Accrue overnight swap on open positions")
+    parser.add_argument("--day", type=date.fromisoformat, default=None,
+                        help="Trading day to roll over, YYYY-MM-DD (default: today, UTC)")
+    args = parser.parse_args()
+    day = args.day or datetime.now(timezone.utc).date()
+
+    with SessionLocal() as db:
+        result = apply_swaps(db, day)
+    if result is None:
+        print(f"Swap for {day} was already applied; nothing to do")
+    else:
+        print(f"✓ Rolled over {day} (x{result.multiplier}): {result.positions} positions, "
+              f"{result.total_swap} total swap in {result.seconds:.1f}s")
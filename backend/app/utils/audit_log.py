@@ -0,0 +1,512 @@
+"""
+Append-only, hash-chained audit log for security and transaction events.
+
+Events are stored in segment files under a directory. Each segment starts
+with a header carrying the chain hash at the point the segment was opened,
+followed by length-prefixed records::
+
+    header: MAGIC | prev_hash (32 bytes)
+    record: length (uint32, big endian) | payload (JSON) | hash (32 bytes)
+
+where ``hash = sha256(prev_hash + payload)``. Changing, removing or
+reordering any record breaks the chain from that point on, which ``verify``
+reports.
+
+Callers only enqueue; a single writer thread drains the queue, writes
+everything that has accumulated in one ``write`` and makes it durable with
+one ``fsync`` (group commit), so the cost on the request path is a queue put
+regardless of disk latency.
+
+A failed write is cut back to the last durable record and retried; if it
+keeps failing the writer stops and further ``append`` calls raise, rather
+than silently dropping events. On startup a record torn by a crash at the end
+of the last segment is truncated, but a complete record that fails the hash
+chain is never removed: the store refuses to open until it is investigated.
+
+Every ``index_interval`` records form a block. Once a block is durable a line
+describing it (byte range, sequence range, time range and the user ids it
+contains) is appended to the segment's ``.idx`` side file. Lookups by user id
+or time range read only the blocks that can match. The index is derived data:
+it is rebuilt from the segment on startup if it is missing or behind.
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set
+
+from app.utils.metrics import Counter
+
+
+MAGIC = b"AUDITLOG1\n"
+HASH_SIZE = 32
+GENESIS_HASH = b"\x00" * HASH_SIZE
+HEADER_SIZE = len(MAGIC) + HASH_SIZE
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct(">I")
+_STOP = object()
+
+# Attempts at writing one batch before the writer gives up
+WRITE_ATTEMPTS = 3
+
+AUDIT_EVENTS_WRITTEN = Counter("audit_events_written_total", "Audit events made durable")
+AUDIT_FSYNCS = Counter("audit_fsyncs_total", "Group commits (fsync calls) made by the audit log writer")
+
+
+class AuditLogError(RuntimeError):
+    """The audit log cannot be written, or a stored record fails the hash chain."""
+
+
+class AuditRecord(NamedTuple):
+    seq: int
+    timestamp: float
+    category: str
+    event: str
+    user_id: Optional[int]
+    data: Dict[str, Any]
+
+
+class AuditVerification(NamedTuple):
+    ok: bool
+    records: int
+    error: Optional[str] = None
+
+
+class _Block:
+    """A run of consecutive records in one segment."""
+
+    __slots__ = ("offset", "end", "first_seq", "last_seq", "ts_min", "ts_max", "users", "hash", "count")
+
+    def __init__(self, offset: int, first_seq: int, prev_hash: bytes):
+        self.offset = offset
+        self.end = offset
+        self.first_seq = first_seq
+        self.last_seq = first_seq - 1
+        self.ts_min = float("inf")
+        self.ts_max = float("-inf")
+        self.users: Set[int] = set()
+        self.hash = prev_hash
+        self.count = 0
+
+    def add(self, seq: int, timestamp: float, user_id: Optional[int], end: int, chain_hash: bytes) -> None:
+        self.last_seq = seq
+        self.end = end
+        self.ts_min = min(self.ts_min, timestamp)
+        self.ts_max = max(self.ts_max, timestamp)
+        if user_id is not None:
+            self.users.add(user_id)
+        self.hash = chain_hash
+        self.count += 1
+
+    def matches(self, user_id: Optional[int], start: Optional[float], end: Optional[float]) -> bool:
+        if self.count == 0:
+            return False
+        if user_id is not None and user_id not in self.users:
+            return False
+        if start is not None and self.ts_max < start:
+            return False
+        if end is not None and self.ts_min > end:
+            return False
+        return True
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "offset": self.offset, "end": self.end,
+            "first_seq": self.first_seq, "last_seq": self.last_seq,
+            "ts_min": self.ts_min, "ts_max": self.ts_max,
+            "users": sorted(self.users), "hash": self.hash.hex(),
+        }, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line: str) -> "_Block":
+        raw = json.loads(line)
+        block = cls(raw["offset"], raw["first_seq"], bytes.fromhex(raw["hash"]))
+        block.end = raw["end"]
+        block.last_seq = raw["last_seq"]
+        block.ts_min = raw["ts_min"]
+        block.ts_max = raw["ts_max"]
+        block.users = set(raw["users"])
+        block.count = block.last_seq - block.first_seq + 1
+        return block
+
+
+class _Segment:
+    def __init__(self, path: Path):
+        self.path = path
+        self.index_path = path.with_suffix(".idx")
+        self.blocks: List[_Block] = []
+        self.open_block: Optional[_Block] = None
+        self.size = HEADER_SIZE
+
+
+def _segment_name(first_seq: int) -> str:
+    return f"audit-{first_seq:020d}.log"
+
+
+def _read_records(path: Path, offset: int, end: Optional[int] = None) -> Iterator[tuple]:
+    """Yield ``(payload, chain_hash, record_end)`` for complete records between offset and end."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        position = offset
+        while end is None or position < end:
+            prefix = f.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                return
+            (length,) = _LENGTH.unpack(prefix)
+            body = f.read(length + HASH_SIZE)
+            if len(body) < length + HASH_SIZE:
+                return
+            position += _LENGTH.size + length + HASH_SIZE
+            yield body[:length], body[length:], position
+
+
+def _decode(payload: bytes) -> AuditRecord:
+    raw = json.loads(payload)
+    return AuditRecord(raw["seq"], raw["ts"], raw["category"], raw["event"], raw.get("user_id"), raw.get("data", {}))
+
+
+class AuditLogStore:
+    """Segmented, hash-chained audit log with a background group-commit writer."""
+
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        index_interval: int = 256,
+        max_batch: int = 4096
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.index_interval = index_interval
+        self.max_batch = max_batch
+
+        self._lock = threading.Lock()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._segments: List[_Segment] = []
+        self._next_seq = 1
+        self._hash = GENESIS_HASH
+        self._error: Optional[BaseException] = None
+        self._recover()
+
+        self._file = open(self._segments[-1].path, "ab", buffering=0)
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    # ==================== Writing ====================
+
+    def append(self, category: str, event: str, user_id: Optional[int] = None, **data: Any) -> None:
+        """Enqueue an event; it becomes durable with the writer's next group commit."""
+        if self._error is not None:
+            raise AuditLogError(f"Audit log writer stopped: {self._error}")
+        self._queue.put((time.time(), category, event, user_id, data))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every event appended so far is on disk; False if that did not happen."""
+        if self._error is not None:
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout) and self._error is None
+
+    def close(self) -> None:
+        """Write out pending events and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._file.close()
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            events = [item for item in items if isinstance(item, tuple)]
+            if events:
+                try:
+                    self._write_batch(events)
+                except Exception as e:
+                    self._error = e
+                    logger.critical("Audit log writer stopped, %d events not written: %s", len(events), e)
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if self._error is not None or any(item is _STOP for item in items):
+                return
+
+    def _write_batch(self, events: List[tuple]) -> None:
+        segment = self._segments[-1]
+        block = segment.open_block
+        chunks = []
+        closed: List[_Block] = []
+        position = segment.size
+        chain_hash = self._hash
+        next_seq = self._next_seq
+
+        for timestamp, category, event, user_id, data in events:
+            seq = next_seq
+            next_seq += 1
+            payload = json.dumps({
+                "seq": seq, "ts": timestamp, "category": category,
+                "event": event, "user_id": user_id, "data": data,
+            }, separators=(",", ":"), default=str).encode("utf-8")
+            chain_hash = hashlib.sha256(chain_hash + payload).digest()
+            chunks.append(_LENGTH.pack(len(payload)))
+            chunks.append(payload)
+            chunks.append(chain_hash)
+            record_start = position
+            position += _LENGTH.size + len(payload) + HASH_SIZE
+
+            if block is None:
+                block = _Block(record_start, seq, chain_hash)
+            block.add(seq, timestamp, user_id, position, chain_hash)
+            if block.count >= self.index_interval:
+                closed.append(block)
+                block = None
+
+        self._write_durable(b"".join(chunks), segment.size)
+        AUDIT_FSYNCS.inc()
+        AUDIT_EVENTS_WRITTEN.inc(len(events))
+
+        self._hash, self._next_seq = chain_hash, next_seq
+        with self._lock:
+            segment.size = position
+            segment.blocks.extend(closed)
+            segment.open_block = block
+        if closed:
+            with open(segment.index_path, "a", encoding="utf-8") as index:
+                index.write("".join(b.to_json() + "\n" for b in closed))
+
+        if position >= self.segment_max_bytes:
+            self._roll_segment()
+
+    def _write_durable(self, data: bytes, size: int) -> None:
+        """Append ``data`` to the open segment, now ``size`` bytes long, and fsync it."""
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[self._file.write(view):]
+                os.fsync(self._file.fileno())
+                return
+            except OSError as e:
+                logger.error("Audit log write failed (attempt %d of %d): %s", attempt, WRITE_ATTEMPTS, e)
+                error = e
+                try:
+                    # Leave no partial record behind to break the offsets of the next ones
+                    os.ftruncate(self._file.fileno(), size)
+                except OSError as truncate_error:
+                    raise AuditLogError(f"cannot cut back a failed write: {truncate_error}") from e
+                time.sleep(0.05 * attempt)
+        raise AuditLogError(f"write failed {WRITE_ATTEMPTS} times: {error}") from error
+
+    def _roll_segment(self) -> None:
+        segment = self._segments[-1]
+        with self._lock:
+            if segment.open_block is not None:
+                closing = segment.open_block
+                segment.blocks.append(closing)
+                segment.open_block = None
+            else:
+                closing = None
+        if closing is not None:
+            with open(segment.index_path, "a", encoding="utf-8") as index:
+                index.write(closing.to_json() + "\n")
+
+        self._file.close()
+        new_segment = self._create_segment(self._next_seq, self._hash)
+        with self._lock:
+            self._segments.append(new_segment)
+        self._file = open(new_segment.path, "ab", buffering=0)
+
+    def _create_segment(self, first_seq: int, prev_hash: bytes) -> _Segment:
+        segment = _Segment(self.directory / _segment_name(first_seq))
+        with open(segment.path, "wb") as f:
+            f.write(MAGIC + prev_hash)
+            f.flush()
+            os.fsync(f.fileno())
+        return segment
+
+    # ==================== Recovery ====================
+
+    def _recover(self) -> None:
+        paths = sorted(self.directory.glob("audit-*.log"))
+        if not paths:
+            self._segments.append(self._create_segment(1, GENESIS_HASH))
+            return
+
+        for path in paths:
+            segment = _Segment(path)
+            segment.size = path.stat().st_size
+            if segment.index_path.exists():
+                with open(segment.index_path, encoding="utf-8") as index:
+                    for line in index:
+                        try:
+                            segment.blocks.append(_Block.from_json(line))
+                        except (ValueError, KeyError):
+                            break  # torn index line; the tail scan below rebuilds it
+            self._segments.append(segment)
+
+        # Only the last segment can have records beyond its index or a torn tail
+        segment = self._segments[-1]
+        segment.blocks = [b for b in segment.blocks if b.end <= segment.size]
+        if segment.blocks:
+            last = segment.blocks[-1]
+            offset, self._hash, self._next_seq = last.end, last.hash, last.last_seq + 1
+        else:
+            with open(segment.path, "rb") as f:
+                header = f.read(HEADER_SIZE)
+            offset, self._hash = HEADER_SIZE, header[len(MAGIC):]
+            self._next_seq = int(segment.path.stem.split("-")[1])
+
+        block = None
+        rebuilt: List[_Block] = []
+        valid_end = offset
+        for payload, chain_hash, end in _read_records(segment.path, offset):
+            try:
+                if hashlib.sha256(self._hash + payload).digest() != chain_hash:
+                    raise ValueError("hash mismatch")
+                record = _decode(payload)
+            except (ValueError, KeyError) as e:
+                # A complete record that does not verify was altered, not torn: keep it as evidence
+                logger.error("Audit log %s: record %d fails verification", segment.path.name, self._next_seq)
+                raise AuditLogError(
+                    f"{segment.path.name}: record {self._next_seq} fails verification ({e}); "
+                    f"refusing to open a tampered audit log"
+                ) from e
+            if block is None:
+                block = _Block(valid_end, record.seq, chain_hash)
+            block.add(record.seq, record.timestamp, record.user_id, end, chain_hash)
+            self._hash, self._next_seq, valid_end = chain_hash, record.seq + 1, end
+            if block.count >= self.index_interval:
+                rebuilt.append(block)
+                block = None
+
+        if valid_end < segment.size:
+            # Only a short record is left here: one torn by a crash mid-write
+            with open(segment.path, "r+b") as f:
+                f.truncate(valid_end)
+        segment.size = valid_end
+        segment.open_block = block
+        segment.blocks.extend(rebuilt)
+        with open(segment.index_path, "w", encoding="utf-8") as index:
+            index.write("".join(b.to_json() + "\n" for b in segment.blocks))
+
+    # ==================== Reading ====================
+
+    def query(
+        self,
+        user_id: Optional[int] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[AuditRecord]:
+        """Durable events for ``user_id`` and/or within ``[start, end]``, oldest first."""
+        with self._lock:
+            candidates = []
+            for segment in self._segments:
+                blocks = list(segment.blocks)
+                if segment.open_block is not None:
+                    blocks.append(segment.open_block)
+                candidates.extend(
+                    (segment.path, block.offset, block.end)
+                    for block in blocks if block.matches(user_id, start, end)
+                )
+
+        returned = 0
+        for path, offset, block_end in candidates:
+            for payload, _, _ in _read_records(path, offset, block_end):
+                record = _decode(payload)
+                if user_id is not None and record.user_id != user_id:
+                    continue
+                if start is not None and record.timestamp < start:
+                    continue
+                if end is not None and record.timestamp > end:
+                    continue
+                yield record
+                returned += 1
+                if limit is not None and returned >= limit:
+                    return
+
+    def verify(self) -> AuditVerification:
+        """Recompute the hash chain over every durable record."""
+        return verify_audit_log(self.directory)
+
+
+def verify_audit_log(directory: str) -> AuditVerification:
+    """Check every segment in ``directory`` for a broken hash chain or sequence gap."""
+    expected_hash = GENESIS_HASH
+    expected_seq = 1
+    records = 0
+    for path in sorted(Path(directory).glob("audit-*.log")):
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if header[:len(MAGIC)] != MAGIC:
+            return AuditVerification(False, records, f"{path.name}: bad segment header")
+        if header[len(MAGIC):] != expected_hash:
+            return AuditVerification(False, records, f"{path.name}: chain does not continue from previous segment")
+
+        for payload, chain_hash, _ in _read_records(path, HEADER_SIZE):
+            expected_hash = hashlib.sha256(expected_hash + payload).digest()
+            if expected_hash != chain_hash:
+                return AuditVerification(False, records, f"{path.name}: hash mismatch at record {expected_seq}")
+            try:
+                seq = _decode(payload).seq
+            except (ValueError, KeyError):
+                return AuditVerification(False, records, f"{path.name}: unreadable record {expected_seq}")
+            if seq != expected_seq:
+                return AuditVerification(False, records, f"{path.name}: expected record {expected_seq}, found {seq}")
+            expected_seq += 1
+            records += 1
+
+    return AuditVerification(True, records)
+
+
+# ==================== Process-wide store ====================
+
+_store: Optional[AuditLogStore] = None
+
+
+def open_audit_log(directory: str, **options) -> AuditLogStore:
+    """Open the process-wide audit log that the logging helpers record into."""
+    global _store
+    if _store is None:
+        _store = AuditLogStore(directory, **options)
+    return _store
+
+
+def close_audit_log() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+def get_audit_log() -> Optional[AuditLogStore]:
+    return _store
+
+
+def record_audit_event(category: str, event: str, user_id: Optional[int] = None, **data: Any) -> None:
+    """Append to the process-wide audit log, if one is open."""
+    if _store is not None:
+        _store.append(category, event, user_id, **data)
+
+
+if __name__ == "__main__":
+    import sys
+
+    result = verify_audit_log(sys.argv[1] if len(sys.argv) > 1 else "audit_logs")
+    print(f"{'OK' if result.ok else 'TAMPERED'}: {result.records} records verified"
+          + (f" ({result.error})" if result.error else ""))
+    sys.exit(0 if result.ok else 1)
@@ -0,0 +1,117 @@
+"""
+Dialect-aware bulk write helpers.
+
+``INSERT ... ON CONFLICT DO UPDATE`` is spelled the same way by PostgreSQL and
+SQLite but SQLAlchemy exposes it through dialect-specific ``insert``
+constructs; this module picks the right one for the session's bind. It also
+builds the ``(VALUES ...)`` source for bulk ``UPDATE ... FROM`` statements.
+"""
+from typing import Dict, Iterable, List, Sequence, Union
+
+from sqlalchemy import bindparam, func, text, values
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ColumnClause
+
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def _dialect(bind: Union[Session, Connection]) -> str:
+    return (bind.dialect if isinstance(bind, Connection) else bind.get_bind().dialect).name
+
+
+def _insert(bind: Union[Session, Connection], model):
+    dialect = _dialect(bind)
+    if dialect not in _INSERTS:
+        raise NotImplementedError(f"Bulk upsert is not supported on {dialect}")
+    return _INSERTS[dialect](model)
+
+
+def upsert_statement(
+    db: Session,
+    model,
+    rows: List[Dict],
+    conflict_columns: Sequence[str],
+    returning: Iterable = (),
+):
+    """
+    Build a multi-row ``INSERT ... ON CONFLICT (conflict_columns) DO UPDATE``.
+
+    Every column present in ``rows`` (other than the conflict columns) is
+    overwritten from the incoming row, and ``updated_at`` is refreshed when
+    the model has one.
+    """
+    statement = _insert(db, model).values(rows)
+    update_columns = {
+        name: statement.excluded[name]
+        for name in rows[0]
+        if name not in conflict_columns
+    }
+    if "updated_at" in model.__table__.c:
+        update_columns["updated_at"] = func.now()
+
+    statement = statement.on_conflict_do_update(index_elements=list(conflict_columns), set_=update_columns)
+    returning = list(returning)
+    if returning:
+        statement = statement.returning(*returning)
+    return statement
+
+
+def accumulate_statement(
+    bind: Union[Session, Connection],
+    model,
+    rows: List[Dict],
+    conflict_columns: Sequence[str],
+):
+    """
+    Build a multi-row ``INSERT ... ON CONFLICT (conflict_columns) DO UPDATE`` that adds up.
+
+    Every column present in ``rows`` (other than the conflict columns) is
+    incremented by the incoming value instead of overwritten. Rows carrying
+    only the conflict columns become ``DO NOTHING`` inserts.
+    """
+    statement = _insert(bind, model).values(rows)
+    table = model.__table__
+    update_columns = {
+        name: table.c[name] + statement.excluded[name]
+        for name in rows[0]
+        if name not in conflict_columns
+    }
+    if not update_columns:
+        return statement.on_conflict_do_nothing(index_elements=list(conflict_columns))
+    if "updated_at" in table.c:
+        update_columns["updated_at"] = func.now()
+    return statement.on_conflict_do_update(index_elements=list(conflict_columns), set_=update_columns)
+
+
+def values_source(
+    bind: Union[Session, Connection],
+    name: str,
+    columns: Sequence[ColumnClause],
+    rows: Sequence[tuple],
+):
+    """
+    ``(VALUES ...) AS name (columns)`` to join against, e.g. in ``UPDATE ... FROM``.
+
+    SQLite cannot name the columns of a VALUES list, so there the list is
+    wrapped in ``SELECT column1 AS ..., column2 AS ...`` instead.
+    """
+    if _dialect(bind) != "sqlite":
+        return values(*columns, name=name).data(list(rows))
+
+    params = [
+        bindparam(f"{name}_{i}_{j}", value, type_=columns[j].type)
+        for i, row in enumerate(rows)
+        for j, value in enumerate(row)
+    ]
+    tuples = ", ".join(
+        "(" + ", ".join(f":{name}_{i}_{j}" for j in range(len(columns))) + ")"
+        for i in range(len(rows))
+    )
+    select_list = ", ".join(f"column{j + 1} AS {column.name}" for j, column in enumerate(columns))
+    return text(f"SELECT {select_list} FROM (VALUES {tuples})").bindparams(*params).columns(*columns).subquery(name)
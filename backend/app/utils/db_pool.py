@@ -0,0 +1,209 @@
+"""
+Engine factory with instrumented connection pools.
+
+Every engine the application opens goes through ``create_pooled_engine`` so
+pool size, overflow, checkout timeout and recycle age are applied the same
+way everywhere. Each pool is registered under a name ("primary",
+"replica", ...) that labels its metrics:
+
+- checkout wait time, checkouts, timeouts and slow checkouts,
+- how long connections are held, and
+- live gauges for checked-out connections, pool size and overflow.
+
+Checkouts slower than the slow-checkout threshold are logged with the pool's
+occupancy at the time, and ``pool_status`` summarizes saturation for the
+``/health/db`` endpoint.
+"""
+from time import perf_counter
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, event, exc, make_url, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.utils.logging import get_logger
+from app.utils.metrics import (
+    DB_POOL_CHECKOUTS,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_CHECKOUT_TIMEOUTS,
+    DB_POOL_SLOW_CHECKOUTS,
+    DB_POOL_CONNECTION_HOLD,
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_SIZE,
+    DB_POOL_OVERFLOW
+)
+
+logger = get_logger(__name__)
+
+# Engines created by create_pooled_engine, by pool name
+ENGINES: Dict[str, Engine] = {}
+
+# Pools above this fraction of their capacity are reported as saturated
+SATURATION_WARNING = 0.9
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time, timeouts and slow checkouts."""
+    pool_name = "primary"
+    slow_checkout_seconds = 0.1
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_CHECKOUT_WAIT.labels(self.pool_name).observe(perf_counter() - start)
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(self.pool_name).inc()
+            logger.error(
+                "Database pool %s checkout timed out after %.1fs with %d/%d connections in use",
+                self.pool_name, self._timeout, self.checkedout(), self.size() + max(self._max_overflow, 0)
+            )
+            raise
+        waited = perf_counter() - start
+        DB_POOL_CHECKOUT_WAIT.labels(self.pool_name).observe(waited)
+        if waited >= self.slow_checkout_seconds:
+            DB_POOL_SLOW_CHECKOUTS.labels(self.pool_name).inc()
+            logger.warning(
+                "Slow database pool %s checkout: waited %.0f ms with %d/%d connections in use",
+                self.pool_name, waited * 1000, self.checkedout(), self.size() + max(self._max_overflow, 0)
+            )
+        return connection
+
+
+def is_memory_database(url: str) -> bool:
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def create_pooled_engine(
+    url: str,
+    name: str = "primary",
+    pool_size: int = 20,
+    max_overflow: int = 10,
+    pool_timeout: float = 30,
+    pool_recycle: int = 3600,
+    slow_checkout_ms: float = 100,
+    echo: bool = False,
+    **kwargs
+) -> Engine:
+    """
+    Create an engine with every pool setting applied and its pool instrumented.
+
+    In-memory SQLite keeps its data on a single connection and cannot use a
+    QueuePool, so it gets SQLAlchemy's default pool and no pool settings.
+    """
+    if is_memory_database(url):
+        engine = create_engine(url, echo=echo, **kwargs)
+    else:
+        poolclass = type("InstrumentedQueuePool", (InstrumentedQueuePool,), {
+            "pool_name": name,
+            "slow_checkout_seconds": slow_checkout_ms / 1000,
+        })
+        engine = create_engine(
+            url,
+            poolclass=poolclass,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=True,
+            echo=echo,
+            **kwargs
+        )
+    _instrument(engine, name)
+    ENGINES[name] = engine
+    return engine
+
+
+def _instrument(engine: Engine, name: str) -> None:
+    checkouts = DB_POOL_CHECKOUTS.labels(name)
+    hold = DB_POOL_CONNECTION_HOLD.labels(name)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = perf_counter()
+        checkouts.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            hold.observe(perf_counter() - checked_out_at)
+
+    if isinstance(engine.pool, QueuePool):
+        # engine.pool is replaced on dispose(), so look it up on every scrape
+        DB_POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout(), name)
+        DB_POOL_SIZE.set_function(lambda: engine.pool.size(), name)
+        DB_POOL_OVERFLOW.set_function(lambda: max(engine.pool.overflow(), 0), name)
+
+
+def _wait_percentile(name: str, fraction: float) -> Optional[float]:
+    """Upper bucket bound below which ``fraction`` of checkout waits fell, in seconds."""
+    series = DB_POOL_CHECKOUT_WAIT.labels(name)
+    if not series.count:
+        return None
+    target = series.count * fraction
+    cumulative = 0
+    for bound, count in zip(series.upper_bounds + (float("inf"),), series.counts):
+        cumulative += count
+        if cumulative >= target:
+            return bound
+    return float("inf")
+
+
+def pool_status(name: str, engine: Engine) -> dict:
+    """Occupancy, saturation and checkout wait statistics for one pool."""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if not isinstance(pool, QueuePool):
+        return status
+
+    size = pool.size()
+    max_overflow = pool._max_overflow
+    checked_out = pool.checkedout()
+    capacity = size + max_overflow if max_overflow >= 0 else None
+    waits = DB_POOL_CHECKOUT_WAIT.labels(name)
+    p95 = _wait_percentile(name, 0.95)
+    status.update({
+        "size": size,
+        "max_overflow": max_overflow,
+        "timeout_seconds": pool._timeout,
+        "recycle_seconds": pool._recycle,
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "capacity": capacity,
+        "saturation": round(checked_out / capacity, 3) if capacity else None,
+        "checkouts": int(DB_POOL_CHECKOUTS.labels(name).value),
+        "checkout_timeouts": int(DB_POOL_CHECKOUT_TIMEOUTS.labels(name).value),
+        "slow_checkouts": int(DB_POOL_SLOW_CHECKOUTS.labels(name).value),
+        "checkout_wait_mean_ms": round(waits.sum / waits.count * 1000, 3) if waits.count else None,
+        "checkout_wait_p95_ms": None if p95 is None else (None if p95 == float("inf") else p95 * 1000),
+    })
+    return status
+
+
+def database_health() -> dict:
+    """
+    Ping every registered engine and report its pool status.
+
+    ``status`` is "down" if any database is unreachable, "degraded" if a pool
+    is above ``SATURATION_WARNING`` of its capacity, and "ok" otherwise.
+    """
+    overall = "ok"
+    pools = {}
+    for name, engine in list(ENGINES.items()):
+        report = pool_status(name, engine)
+        start = perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            report["reachable"] = True
+            report["ping_ms"] = round((perf_counter() - start) * 1000, 3)
+        except Exception as e:
+            logger.error("Database health check failed for pool %s: %s", name, e)
+            report["reachable"] = False
+            overall = "down"
+        if overall == "ok" and (report.get("saturation") or 0) >= SATURATION_WARNING:
+            overall = "degraded"
+        pools[name] = report
+    return {"status": overall, "pools": pools}
@@ -9,9 +9,9 @@ from datetime import datetime
 from typing import Optional
 
 
-# KYC document storage path - should be outside web root in production
+# KYC document storage path - should be outside web root in production.
+# Created on first upload rather than at import, so workers start without touching the disk.
 KYC_STORAGE_PATH = Path("secure_storage/kyc_documents")
-KYC_STORAGE_PATH.mkdir(parents=True, exist_ok=True)
 
 
 def save_kyc_document(
@@ -44,7 +44,7 @@ def save_kyc_document(
     
     # Create user directory
     user_dir = KYC_STORAGE_PATH / str(user_id)
-    user_dir.mkdir(exist_ok=True)
+    user_dir.mkdir(parents=True, exist_ok=True)
     
     # Save file
     file_path = user_dir / secure_filename
@@ -0,0 +1,176 @@
+"""
+Conditional GET support for rarely-changing configuration resources.
+
+Serialized list responses of each cached resource (a table) are cached per
+query string and carry a strong ETag built from the table's state and a
+digest of the body. The state is one aggregate read of the table (row count,
+highest id and latest ``updated_at``/``created_at``), so a write committed in
+any worker changes it; a cached page is served, or a matching
+``If-None-Match`` answered with ``304 Not Modified``, only while the state is
+unchanged, without reading the rows themselves.
+
+Each process also keeps a version counter per resource, bumped when one of
+its sessions commits a change, and entries expire after a short TTL. Together
+they catch writes the state misses, e.g. two updates to the same row within
+the one-second resolution of SQLite's ``CURRENT_TIMESTAMP``.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response, status
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+
+CACHED_TABLES = {
+    "product_spreads",
+    "branches",
+    "liquidity_providers",
+    "routing_rules",
+}
+CACHE_TTL_SECONDS = 30.0
+MAX_VARIANTS_PER_RESOURCE = 256
+
+# (etag, body, extra headers)
+CachedResponse = Tuple[str, bytes, Dict[str, str]]
+
+
+class ResourceCache:
+    """Per-resource version counters and cached serialized responses."""
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS, max_variants: int = MAX_VARIANTS_PER_RESOURCE):
+        self.ttl = ttl
+        self.max_variants = max_variants
+        self._versions: Dict[str, int] = {}
+        # resource -> variant -> (version, table state, expires at, response)
+        self._entries: Dict[str, "OrderedDict[str, Tuple[int, str, float, CachedResponse]]"] = {}
+        self._lock = threading.Lock()
+
+    def version(self, resource: str) -> int:
+        return self._versions.get(resource, 0)
+
+    def bump(self, *resources: str) -> None:
+        """Invalidate everything cached for ``resources``."""
+        with self._lock:
+            for resource in resources:
+                self._versions[resource] = self._versions.get(resource, 0) + 1
+                self._entries.pop(resource, None)
+
+    def get(self, resource: str, variant: str, state: str) -> Optional[CachedResponse]:
+        entries = self._entries.get(resource)
+        if not entries:
+            return None
+        entry = entries.get(variant)
+        if entry is None:
+            return None
+        version, cached_state, expires_at, cached = entry
+        if version != self.version(resource) or cached_state != state or expires_at <= time.monotonic():
+            return None
+        return cached
+
+    def set(self, resource: str, variant: str, version: int, state: str, cached: CachedResponse) -> None:
+        with self._lock:
+            if version != self.version(resource):
+                # A write committed while this response was being built
+                return
+            entries = self._entries.setdefault(resource, OrderedDict())
+            entries[variant] = (version, state, time.monotonic() + self.ttl, cached)
+            entries.move_to_end(variant)
+            while len(entries) > self.max_variants:
+                entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            self._entries.clear()
+
+
+resource_cache = ResourceCache()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison is correct for If-None-Match on GET
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def table_state(db: Session, model) -> str:
+    """A short digest of ``model``'s row count, highest id and latest change time."""
+    table = model.__table__
+    row = db.execute(
+        select(func.count(), func.max(table.c.id), func.max(func.coalesce(table.c.updated_at, table.c.created_at)))
+    ).one()
+    return hashlib.sha256(repr(tuple(row)).encode()).hexdigest()[:12]
+
+
+def conditional_response(
+    request: Request,
+    db: Session,
+    model,
+    build: Callable[[], Tuple[object, Dict[str, str]]]
+) -> Response:
+    """
+    Serve a cached, ETag-tagged JSON response for ``model``'s table.
+
+    ``build`` runs only on a cache miss and returns the JSON-serializable
+    content (datetimes may be left as objects) plus any extra response
+    headers to cache alongside it.
+    """
+    resource = model.__tablename__
+    variant = request.url.query
+    state = table_state(db, model)
+    cached = resource_cache.get(resource, variant, state)
+
+    if cached is None:
+        version = resource_cache.version(resource)
+        content, headers = build()
+        # OPT_UTC_Z writes UTC datetimes with a "Z" suffix, as Pydantic does
+        body = orjson.dumps(content, option=orjson.OPT_UTC_Z)
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        etag = f'"{resource}-{state}-{digest}"'
+        cached = (etag, body, headers)
+        resource_cache.set(resource, variant, version, state, cached)
+
+    etag, body, headers = cached
+    response_headers = {"ETag": etag, "Cache-Control": "private, no-cache", **headers}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=response_headers)
+
+    return Response(content=body, media_type="application/json", headers=response_headers)
+
+
+def _touched_tables(instances: Iterable) -> set:
+    tables = set()
+    for instance in instances:
+        table = getattr(instance, "__tablename__", None)
+        if table in CACHED_TABLES:
+            tables.add(table)
+    return tables
+
+
+@event.listens_for(Session, "after_flush")
+def _record_cached_writes(session: Session, flush_context) -> None:
+    touched = _touched_tables(session.new) | _touched_tables(session.dirty) | _touched_tables(session.deleted)
+    if touched:
+        session.info.setdefault("cached_tables_touched", set()).update(touched)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_cached_versions(session: Session) -> None:
+    touched = session.info.pop("cached_tables_touched", None)
+    if touched:
+        resource_cache.bump(*touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_cached_writes(session: Session) -> None:
+    session.info.pop("cached_tables_touched", None)
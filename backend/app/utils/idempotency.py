@@ -0,0 +1,143 @@
+"""
+Idempotency-key handling for money-moving endpoints.
+
+Clients send an ``Idempotency-Key`` header with each posting. The key is stored
+as ``Transaction.reference`` (unique), so a retried request resolves to the
+transaction created by the first attempt instead of posting twice. Recent
+results are kept in an in-memory TTL cache so retry storms never reach the
+database; the unique constraint remains the source of truth across workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionResponse
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 128
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 600.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = self._clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        now = self._clock()
+        with self._lock:
+            self._data[key] = (now + self.ttl, value)
+            self._data.move_to_end(key)
+            self._evict(now)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _evict(self, now: float) -> None:
+        # Entries are ordered by last write/read; expired ones cluster at the front
+        while self._data:
+            oldest_key, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at > now and len(self._data) <= self.maxsize:
+                break
+            del self._data[oldest_key]
+
+
+class IdempotencyStore:
+    """Resolve idempotency keys to previously posted transaction results."""
+
+    def __init__(self, cache: Optional[TTLCache] = None):
+        self.cache = cache or TTLCache()
+
+    def lookup(self, db: Session, key: str, user_id: int, fingerprint: Dict[str, Any]) -> Optional[dict]:
+        """
+        Return the stored result for ``key`` or None if it has not been used.
+
+        Raises 409 if the key was used by another user or for a different
+        request (amount, type or account mismatch). A key belongs to whoever
+        posted it, so a manager's retry on a client's account is a replay.
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            transaction = db.query(Transaction).filter(Transaction.reference == key).first()
+            if transaction is None:
+                return None
+            entry = self._entry_for(transaction)
+            self.cache.set(key, entry)
+
+        owner_id, stored_fingerprint, result = entry
+        if owner_id != user_id or stored_fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Idempotency key has already been used for a different request"
+            )
+        return result
+
+    def remember(self, transaction: Transaction) -> dict:
+        """Cache the result of a freshly posted transaction and return it."""
+        entry = self._entry_for(transaction)
+        self.cache.set(transaction.reference, entry)
+        return entry[2]
+
+    @staticmethod
+    def _entry_for(transaction: Transaction) -> Tuple[int, Dict[str, Any], dict]:
+        result = TransactionResponse.model_validate(transaction).model_dump(mode="json")
+        return transaction.performed_by_id or transaction.user_id, transaction_fingerprint(
+            transaction.account_id, transaction.transaction_type.value, transaction.amount
+        ), result
+
+
+def transaction_fingerprint(account_id: int, transaction_type: str, amount: Any) -> Dict[str, Any]:
+    """Request parameters that must match for a key to be replayed."""
+    return {
+        "account_id": account_id,
+        "transaction_type": transaction_type,
+        "amount": f"{float(amount):.2f}",
+    }
+
+
+def validate_idempotency_key(key: Optional[str]) -> Optional[str]:
+    """Normalise and validate an Idempotency-Key header value."""
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_HEADER} must be between 1 and {MAX_KEY_LENGTH} characters"
+        )
+    return key
+
+
+# Process-wide store used by the transaction endpoints
+idempotency_store = IdempotencyStore()
@@ -1,35 +1,191 @@
 """
 Logging configuration for the trading platform.
 Provides structured logging for security events, transactions, and system operations.
+
+Records are handed to a bounded in-memory queue by a ``QueueHandler`` and
+written by a ``QueueListener`` thread, so request handlers never wait on
+stdout or disk. Messages use lazy %-style arguments; they are only
+interpolated on the listener thread, and not at all for records that are
+filtered or sampled out. File rotation also happens on the listener thread.
 """
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import sys
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.utils.audit_log import record_audit_event
+from app.utils.metrics import LOG_RECORDS_DROPPED
 
 
 # Configure logging format
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
+# Attributes present on every LogRecord; anything else came from ``extra``
+_RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({})).keys()) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    """Non-empty fields passed to the logging call via ``extra``."""
+    return {
+        key: value for key, value in record.__dict__.items()
+        if key not in _RESERVED_ATTRS and not key.startswith("_") and value is not None
+    }
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra`` fields on the record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update(_extra_fields(record))
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain-text format with ``extra`` fields appended as ``key=value`` pairs."""
+
+    def __init__(self):
+        super().__init__(LOG_FORMAT, DATE_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            text += " - " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
 
-def setup_logging(log_level: str = "INFO") -> None:
+
+class SamplingFilter(logging.Filter):
+    """Pass a random ``rate`` fraction of records below WARNING; always pass warnings and errors."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that neither formats nor blocks in the calling thread.
+
+    The stock ``prepare`` interpolates the message before enqueueing; here the
+    record is passed through untouched so formatting happens on the listener
+    thread. When the queue is full the record is dropped and counted.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def setup_logging(
+    log_level: str = "INFO",
+    json_output: bool = False,
+    log_file: Optional[str] = None,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    queue_size: int = 10000,
+    sample_rates: Optional[Dict[str, float]] = None
+) -> logging.handlers.QueueListener:
     """
     Setup application-wide logging configuration.
 
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        json_output: Emit one JSON object per line instead of plain text
+        log_file: Also write to this file, rotating at ``max_bytes``
+        max_bytes: Size at which the log file is rotated
+        backup_count: Number of rotated files to keep
+        queue_size: Records buffered before new ones are dropped
+        sample_rates: Fraction of sub-WARNING records to keep, by logger name
+
+    Returns:
+        The running queue listener
     """
-    logging.basicConfig(
-        level=getattr(logging, log_level.upper()),
-        format=LOG_FORMAT,
-        datefmt=DATE_FORMAT,
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            # Add file handler in production
-            # logging.FileHandler('app.log'),
-        ]
-    )
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    formatter = JSONFormatter() if json_output else TextFormatter()
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, NonBlockingQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(NonBlockingQueueHandler(log_queue))
+    root.setLevel(getattr(logging, log_level.upper()))
+
+    for name, rate in (sample_rates or {}).items():
+        sampled = logging.getLogger(name)
+        for existing in [f for f in sampled.filters if isinstance(f, SamplingFilter)]:
+            sampled.removeFilter(existing)
+        sampled.addFilter(SamplingFilter(rate))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_listener_in_child() -> None:
+    """
+    Give a forked worker its own queue and listener thread.
+
+    Only the forking thread survives ``fork``, so the inherited listener is
+    dead and its queue may have been left locked.
+    """
+    global _listener
+    if _listener is None:
+        return
+    log_queue: queue.Queue = queue.Queue(maxsize=_listener.queue.maxsize)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -77,20 +233,12 @@ def log_security_event(
         success: Whether the event was successful
         details: Additional details about the event
     """
-    status = "SUCCESS" if success else "FAILED"
-    message = f"{event_type.upper()} - {status}"
-
-    if user_email:
-        message += f" - User: {user_email}"
-    if user_id:
-        message += f" - ID: {user_id}"
-    if details:
-        message += f" - Details: {details}"
-
-    if success:
-        security_logger.info(message)
-    else:
-        security_logger.warning(message)
+    security_logger.log(
+        logging.INFO if success else logging.WARNING,
+        "%s - %s", event_type.upper(), "SUCCESS" if success else "FAILED",
+        extra={"user_email": user_email, "user_id": user_id, "details": details}
+    )
+    record_audit_event("security", event_type, user_id, user_email=user_email, success=success, details=details)
 
 
 def log_transaction(
@@ -112,14 +260,12 @@ def log_transaction(
         status: Transaction status
         details: Additional details
     """
-    message = f"TRANSACTION - {transaction_type.upper()} - User ID: {user_id} - Amount: {amount} - Status: {status}"
-
-    if transaction_id:
-        message += f" - TX ID: {transaction_id}"
-    if details:
-        message += f" - Details: {details}"
-
-    transaction_logger.info(message)
+    transaction_logger.info(
+        "TRANSACTION - %s - Amount: %s - Status: %s", transaction_type.upper(), amount, status,
+        extra={"user_id": user_id, "transaction_id": transaction_id, "details": details}
+    )
+    record_audit_event("transaction", transaction_type, user_id, amount=amount, status=status,
+                       transaction_id=transaction_id, details=details)
 
 
 def log_api_request(
@@ -127,29 +273,30 @@ def log_api_request(
     method: str,
     user_id: Optional[int] = None,
     status_code: int = 200,
-    details: Optional[str] = None
+    details: Optional[str] = None,
+    duration_ms: Optional[float] = None
 ) -> None:
     """
     Log API requests.
 
+    High volume; sample it with ``setup_logging(sample_rates={"api": ...})``.
+
     Args:
         endpoint: API endpoint
         method: HTTP method
         user_id: User's ID
         status_code: HTTP status code
         details: Additional details
+        duration_ms: Time taken to serve the request
     """
-    message = f"API - {method} {endpoint} - Status: {status_code}"
-
-    if user_id:
-        message += f" - User ID: {user_id}"
-    if details:
-        message += f" - Details: {details}"
-
-    if status_code >= 400:
-        api_logger.warning(message)
-    else:
-        api_logger.info(message)
+    level = logging.WARNING if status_code >= 400 else logging.INFO
+    if not api_logger.isEnabledFor(level):
+        return
+    api_logger.log(
+        level,
+        "API - %s %s - Status: %s", method, endpoint, status_code,
+        extra={"user_id": user_id, "details": details, "duration_ms": duration_ms}
+    )
 
 
 def log_kyc_upload(
@@ -171,17 +318,10 @@ def log_kyc_upload(
         file_size: Size of the uploaded file in bytes
         details: Additional details about the upload
     """
-    message = f"KYC_UPLOAD - {doc_type} - User: {user_email}"
-    
-    if user_id:
-        message += f" - ID: {user_id}"
-    
-    message += f" - Size: {file_size} bytes - Status: {'SUCCESS' if success else 'FAILED'}"
-    
-    if details:
-        message += f" - {details}"
-    
-    if success:
-        security_logger.info(message)
-    else:
-        security_logger.warning(message)
+    security_logger.log(
+        logging.INFO if success else logging.WARNING,
+        "KYC_UPLOAD - %s - Status: %s", doc_type, "SUCCESS" if success else "FAILED",
+        extra={"user_email": user_email, "user_id": user_id, "file_size": file_size, "details": details}
+    )
+    record_audit_event("security", "kyc_upload", user_id, user_email=user_email, doc_type=doc_type,
+                       success=success, file_size=file_size, details=details)
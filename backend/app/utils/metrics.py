@@ -0,0 +1,275 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms are plain Python numbers updated in place,
+with no locks on the hot path. Label sets are resolved to a series object
+once and cached, so recording a request costs a dict lookup, a bisect and a
+few additions. Updates made from the event loop thread are exact; concurrent
+updates from worker threads rely on the GIL and may, rarely, drop an
+increment, which is acceptable for monitoring data.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+# Request latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _ValueSeries:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._series: Dict[Tuple[str, ...], _ValueSeries] = {}
+
+    def labels(self, *values: str) -> _ValueSeries:
+        series = self._series.get(values)
+        if series is None:
+            series = self._series.setdefault(values, _ValueSeries())
+        return series
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(series.value)}"
+            for values, series in list(self._series.items())
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, or be read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._callbacks: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set_function(self, callback: Callable[[], float], *values: str) -> None:
+        """Read the value for the ``values`` label set from ``callback`` on every scrape."""
+        self._callbacks[values] = callback
+
+    def _samples(self) -> List[str]:
+        for values, callback in list(self._callbacks.items()):
+            try:
+                self.labels(*values).set(callback())
+            except Exception:
+                pass
+        return super()._samples()
+
+
+class _HistogramSeries:
+    __slots__ = ("upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values per label set."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], _HistogramSeries] = {}
+
+    def labels(self, *values: str) -> _HistogramSeries:
+        series = self._series.get(values)
+        if series is None:
+            series = self._series.setdefault(values, _HistogramSeries(self.upper_bounds))
+        return series
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds + (float("inf"),), series.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{labels} {series.count}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    """All registered metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ==================== Application metrics ====================
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by method, route and status", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method, route and status",
+    ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+)
+
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total", "Connections checked out of the database pool", ["pool"]
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the pool", ["pool"]
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after the pool timeout", ["pool"]
+)
+DB_POOL_SLOW_CHECKOUTS = Counter(
+    "db_pool_slow_checkouts_total", "Checkouts that waited longer than the slow checkout threshold", ["pool"]
+)
+DB_POOL_CONNECTION_HOLD = Histogram(
+    "db_pool_connection_hold_seconds", "Time a connection was held before being returned to the pool", ["pool"]
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool", ["pool"]
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Configured database pool size", ["pool"]
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections opened beyond the pool size", ["pool"]
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ["route"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 250)
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Time spent executing SQL per HTTP request", ["route"]
+)
+DB_REPEATED_QUERY_REQUESTS = Counter(
+    "db_repeated_query_requests_total", "Requests that repeated one SQL statement past the N+1 threshold",
+    ["route"]
+)
+
+DB_READ_ROUTES = Counter(
+    "db_read_routes_total", "Read-only sessions by target database and, for the primary, the fallback reason",
+    ["target", "reason"]
+)
+DB_REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds", "Last measured replication lag of the read replica"
+)
+
+BCRYPT_QUEUE_DEPTH = Gauge(
+    "bcrypt_queue_depth", "Password hash operations waiting for a bcrypt worker"
+)
+BCRYPT_DURATION = Histogram(
+    "bcrypt_duration_seconds", "Time spent in bcrypt hash and verify operations", ["operation"]
+)
+
+UPLOAD_BYTES = Counter(
+    "upload_bytes_total", "Bytes received in file uploads", ["kind"]
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total", "Log records dropped because the logging queue was full"
+)
+
+HEDGE_ORDERS = Counter(
+    "hedge_orders_total", "Hedge orders sent to liquidity providers by LP and outcome", ["lp", "status"]
+)
+HEDGE_LATENCY = Histogram(
+    "hedge_latency_seconds", "Time from sending a hedge order to its fill or failure", ["lp"]
+)
+HEDGE_SLIPPAGE_PIPS = Histogram(
+    "hedge_slippage_pips", "Hedge fill price versus the quoted price, in pips (positive: adverse)", ["symbol"],
+    buckets=(-1, 0, 0.5, 1, 2, 5, 10, 25)
+)
+HEDGE_SLIPPAGE_BREACHES = Counter(
+    "hedge_slippage_breaches_total", "Hedge fills that slipped more than the routing rule allows", ["symbol"]
+)
+LP_ORDERS_IN_FLIGHT = Gauge(
+    "lp_orders_in_flight", "Orders sent to a liquidity provider and not yet answered", ["lp"]
+)
+LP_RECONNECTS = Counter(
+    "lp_reconnects_total", "Market data connections to a liquidity provider lost or refused", ["lp"]
+)
@@ -0,0 +1,89 @@
+"""
+Per-request SQL query statistics.
+
+Cursor execution events on every SQLAlchemy engine are recorded into the
+``QueryStats`` of the current request, held in a context variable set by
+``QueryStatsMiddleware``. Statements are reduced to a fingerprint (literals
+and expanded IN lists collapsed) so the same query issued once per row of a
+result set - the classic lazy-loading N+1 pattern - shows up as a single
+fingerprint with a high repeat count.
+"""
+import re
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from time import perf_counter
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> str:
+    """Normalize a SQL statement so repeated executions compare equal."""
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    return _PLACEHOLDER_LIST.sub("(?...)", normalized)
+
+
+class QueryStats:
+    """Query count, total database time and statement fingerprints for one unit of work."""
+
+    __slots__ = ("count", "total_time", "fingerprints")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Fingerprints executed at least ``threshold`` times, most frequent first."""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats() -> Tuple[QueryStats, object]:
+    """Begin collecting into a fresh ``QueryStats``; returns it and a reset token."""
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def stop_query_stats(token) -> None:
+    _current_stats.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    start_times = conn.info.get("query_start_time")
+    if start_times:
+        stats.record(statement, perf_counter() - start_times.pop())
@@ -0,0 +1,11 @@
+"""
+Application-wide rate limiter.
+
+One ``Limiter`` is shared by the app (``app.state.limiter``) and every router
+that decorates endpoints with ``@limiter.limit(...)``, so limits are counted
+in a single store per worker.
+"""
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+limiter = Limiter(key_func=get_remote_address)
@@ -0,0 +1,187 @@
+"""
+Routing of read-only database sessions between the primary and a replica.
+
+Read-only dependencies ask the router for a session. It hands out a replica
+session unless
+
+- no replica is configured,
+- the replica's replication lag, measured at most once per check interval,
+  exceeds the allowed maximum or cannot be measured, or
+- the requesting user committed a write within the read-your-writes
+  window, so their own change may not have reached the replica yet.
+
+In every other case the read goes to the primary. The read-your-writes
+window is tracked per process; with several workers it only covers follow-up
+requests served by the same worker, and relies on the lag check otherwise.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.utils.logging import get_logger
+from app.utils.metrics import DB_READ_ROUTES, DB_REPLICA_LAG
+from app.utils.security import decode_token
+
+logger = get_logger(__name__)
+
+LagProbe = Callable[[Connection], Optional[float]]
+
+# Seconds since the last replayed transaction, or 0 when everything received has been replayed
+POSTGRES_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+# Prune expired read-your-writes entries once the table grows past this
+STICKY_PRUNE_SIZE = 10000
+
+
+def default_lag_probe(conn: Connection) -> Optional[float]:
+    """Replication lag in seconds; databases without replication report no lag."""
+    if conn.dialect.name == "postgresql":
+        return float(conn.execute(POSTGRES_LAG_QUERY).scalar() or 0)
+    return 0.0
+
+
+class ReplicaRouter:
+    """Chooses the primary or the replica for each read-only session."""
+
+    def __init__(
+        self,
+        primary: sessionmaker,
+        replica: Optional[sessionmaker] = None,
+        max_lag_seconds: float = 5.0,
+        lag_check_interval: float = 1.0,
+        read_your_writes_seconds: float = 10.0,
+        lag_probe: LagProbe = default_lag_probe,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_interval = lag_check_interval
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.lag_probe = lag_probe
+        self.clock = clock
+
+        self._lag: Optional[float] = None
+        self._lag_checked_at: Optional[float] = None
+        self._lag_lock = threading.Lock()
+        self._sticky_until: Dict[int, float] = {}
+
+    # ==================== Read-your-writes ====================
+
+    def record_write(self, user_id: Optional[int]) -> None:
+        """Keep ``user_id``'s reads on the primary for the read-your-writes window."""
+        if user_id is None or self.replica is None:
+            return
+        now = self.clock()
+        if len(self._sticky_until) >= STICKY_PRUNE_SIZE:
+            self._sticky_until = {uid: until for uid, until in self._sticky_until.items() if until > now}
+        self._sticky_until[user_id] = now + self.read_your_writes_seconds
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        until = self._sticky_until.get(user_id)
+        return until is not None and until > self.clock()
+
+    # ==================== Replication lag ====================
+
+    def replica_lag(self) -> Optional[float]:
+        """Last measured replica lag in seconds, re-measured once per check interval; None if unreachable."""
+        now = self.clock()
+        checked_at = self._lag_checked_at
+        if checked_at is not None and now - checked_at < self.lag_check_interval:
+            return self._lag
+        # One thread re-measures; the others keep using the previous value meanwhile
+        if not self._lag_lock.acquire(blocking=checked_at is None):
+            return self._lag
+        try:
+            self._lag = self._measure_lag()
+            self._lag_checked_at = self.clock()
+            if self._lag is not None:
+                DB_REPLICA_LAG.set(self._lag)
+            return self._lag
+        finally:
+            self._lag_lock.release()
+
+    def _measure_lag(self) -> Optional[float]:
+        try:
+            with self.replica.kw["bind"].connect() as conn:  # the replica sessionmaker's engine
+                return self.lag_probe(conn)
+        except Exception as e:
+            logger.warning("Replica lag check failed, reading from the primary: %s", e)
+            return None
+
+    # ==================== Routing ====================
+
+    def route(self, user_id: Optional[int] = None) -> str:
+        """``"replica"`` or ``"primary"`` for a read by ``user_id``."""
+        if self.replica is None:
+            return "primary"
+        if self.is_sticky(user_id):
+            reason = "read_your_writes"
+        else:
+            lag = self.replica_lag()
+            if lag is None:
+                reason = "replica_unavailable"
+            elif lag > self.max_lag_seconds:
+                reason = "replica_lag"
+            else:
+                DB_READ_ROUTES.labels("replica", "").inc()
+                return "replica"
+        DB_READ_ROUTES.labels("primary", reason).inc()
+        return "primary"
+
+    def session(self, user_id: Optional[int] = None) -> Session:
+        """A new read-only session on the engine chosen by ``route``."""
+        db = (self.replica if self.route(user_id) == "replica" else self.primary)()
+        db.info["read_only"] = True
+        return db
+
+
+def request_user_id(request) -> Optional[int]:
+    """User id from the request's bearer token, without loading the user."""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_token(token)
+    return payload.get("user_id") if payload else None
+
+
+# ==================== Write tracking ====================
+
+def track_writes(router_getter: Callable[[], ReplicaRouter]) -> None:
+    """
+    Report committed writes to the router for read-your-writes.
+
+    A session whose ``info["user_id"]`` is set and that flushed or executed an
+    INSERT, UPDATE or DELETE calls ``record_write`` for that user on commit.
+    """
+    @event.listens_for(Session, "after_flush")
+    def _after_flush(session, flush_context):
+        if session.new or session.dirty or session.deleted:
+            session.info["wrote"] = True
+
+    @event.listens_for(Session, "do_orm_execute")
+    def _on_execute(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            orm_execute_state.session.info["wrote"] = True
+
+    @event.listens_for(Session, "after_commit")
+    def _after_commit(session):
+        if session.info.pop("wrote", False):
+            router_getter().record_write(session.info.get("user_id"))
+
+    @event.listens_for(Session, "after_rollback")
+    def _after_rollback(session):
+        session.info.pop("wrote", None)
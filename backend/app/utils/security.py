@@ -1,8 +1,15 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from time import perf_counter
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
 from app.config import settings
+from app.utils.metrics import BCRYPT_QUEUE_DEPTH, BCRYPT_DURATION
+
+# bcrypt is deliberately slow; run it off the event loop on a bounded pool
+_bcrypt_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bcrypt")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -15,6 +22,33 @@ def get_password_hash(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 
+async def _run_bcrypt(operation: str, func, *args):
+    """Run a bcrypt call on the bcrypt pool, recording queue depth and duration."""
+    queue_depth = BCRYPT_QUEUE_DEPTH.labels()
+    duration = BCRYPT_DURATION.labels(operation)
+
+    def timed():
+        queue_depth.dec()
+        start = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            duration.observe(perf_counter() - start)
+
+    queue_depth.inc()
+    return await asyncio.get_running_loop().run_in_executor(_bcrypt_executor, timed)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash without blocking the event loop."""
+    return await _run_bcrypt("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    return await _run_bcrypt("hash", get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -0,0 +1,63 @@
+"""
+Compare two benchmark result files and flag latency regressions.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Exits with status 1 when any scenario's p95 or p99 latency grew by more than
+the threshold, so it can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("p50", "p95", "p99")
+GATED = ("p95", "p99")
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> tuple:
+    """Return (report lines, regressed scenario names)."""
+    lines = [f"{'scenario':<30} " + " ".join(f"{m:>22}" for m in METRICS) + f" {'rps':>18}"]
+    regressions = []
+    for name, new in candidate["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            lines.append(f"{name:<30} (new scenario)")
+            continue
+        cells = []
+        regressed = False
+        for metric in METRICS:
+            before, after = old["latency_ms"][metric], new["latency_ms"][metric]
+            change = (after - before) / before if before else 0.0
+            if metric in GATED and change > threshold:
+                regressed = True
+            cells.append(f"{before:>8.2f}->{after:>8.2f} {change:+5.0%}")
+        rps_change = (new["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] if old["throughput_rps"] else 0.0
+        lines.append(f"{name:<30} " + " ".join(f"{c:>22}" for c in cells)
+                     + f" {new['throughput_rps']:>10.1f} {rps_change:+5.0%}" + ("  REGRESSION" if regressed else ""))
+        if regressed:
+            regressions.append(name)
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed fractional p95/p99 increase")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    lines, regressions = compare(baseline, candidate, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\nRegressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
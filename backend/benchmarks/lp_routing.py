@@ -0,0 +1,174 @@
+"""
+End-to-end hedge routing benchmark against simulated liquidity providers.
+
+Boots ``--providers`` simulators (``benchmarks.lp_simulator``) under uvicorn
+on local ports, registers them as liquidity providers in a throwaway SQLite
+database and connects to them through ``LPGateway``, as the app does.
+``--concurrency`` workers then send ``--orders`` hedge orders, each routed to
+the best provider by priority and failing over to the next one on an error,
+the way the hedge engine routes; an order that times out has an unknown
+outcome and is not sent elsewhere. Order latency (failovers included) and
+throughput are written in the ``benchmarks.compare`` format, together with
+failovers, unknown outcomes, quotes received and what each simulator saw.
+
+Usage:
+    python -m benchmarks.lp_routing --providers 3 --orders 2000 --concurrency 50
+    python -m benchmarks.lp_routing --latency-ms 2-20 --failure-rate 0.05 --lp-concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import tempfile
+import time
+import uuid
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks.lp_simulator import add_simulator_arguments, create_simulator, simulator_options
+from benchmarks.run import BENCHMARK_ENV, _free_port, _git_commit, summarize
+
+SYMBOLS = ("EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "BTCUSD")
+
+
+class QuoteCounter:
+    """Stands in for the exposure book, counting the quotes the gateway forwards."""
+
+    def __init__(self):
+        self.count = 0
+
+    def on_tick(self, symbol: str, bid: float, ask: float) -> None:
+        self.count += 1
+
+
+async def run_routing(args) -> dict:
+    import uvicorn
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.database import Base
+    from app.models import LiquidityProvider, ProductSpread
+    from app.models.liquidity_provider import LPType
+    from app.models.trade import TradeType
+    from app.services.hedging import HedgeOutcomeUnknown, load_venues, rank_venues
+    from app.services.lp_connectors import LPGateway
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+
+    simulators, servers = {}, []
+    with session_factory() as db:
+        db.add_all(ProductSpread(symbol=symbol, name=symbol) for symbol in SYMBOLS)
+        for n in range(1, args.providers + 1):
+            port = _free_port()
+            app = create_simulator(seed=args.seed + n, **simulator_options(args))
+            simulators[f"SIM{n}"] = app.state.simulator
+            servers.append(uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")))
+            db.add(LiquidityProvider(name=f"Simulated {n}", code=f"SIM{n}", lp_type=LPType.ECN, priority=n,
+                                     api_endpoint=f"http://127.0.0.1:{port}",
+                                     websocket_url=f"ws://127.0.0.1:{port}/quotes"))
+        db.commit()
+        venues = load_venues(db)
+
+    serving = [asyncio.create_task(server.serve()) for server in servers]
+    while not all(server.started for server in servers):
+        await asyncio.sleep(0.05)
+
+    quotes = QuoteCounter()
+    gateway = LPGateway(session_factory, quotes, max_concurrency=args.lp_concurrency,
+                        max_connections=args.lp_connections, timeout=args.timeout)
+    latencies: List[float] = []
+    status_codes: Dict[int, int] = {}
+    failovers = unknown = 0
+    remaining = args.orders
+
+    async def worker(worker_id: int):
+        nonlocal failovers, unknown, remaining
+        rng = random.Random(args.seed * 1000 + worker_id)
+        while remaining > 0:
+            remaining -= 1
+            symbol, side, lots = rng.choice(SYMBOLS), rng.choice(list(TradeType)), round(rng.uniform(1, 5), 2)
+            code = 0
+            start = time.perf_counter()
+            for venue in rank_venues(venues, symbol, lots):
+                try:
+                    await gateway.send_order(venue, symbol, side, lots, uuid.uuid4().hex)
+                    code = 200
+                    break
+                except HedgeOutcomeUnknown:
+                    unknown += 1
+                    break
+                except Exception:
+                    failovers += 1
+            latencies.append(time.perf_counter() - start)
+            status_codes[code] = status_codes.get(code, 0) + 1
+
+    try:
+        await gateway.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await gateway.close()
+        for server in servers:
+            server.should_exit = True
+        await asyncio.gather(*serving)
+        engine.dispose()
+
+    routing = {**summarize(latencies, status_codes, elapsed), "failovers": failovers, "unknown": unknown}
+    latency = routing["latency_ms"]
+    print(f"{'hedge_routing':<30} {routing['throughput_rps']:>10.1f} orders/s  p50 {latency['p50']:>8.2f}ms  "
+          f"p95 {latency['p95']:>8.2f}ms  p99 {latency['p99']:>8.2f}ms  failovers {failovers}  unknown {unknown}")
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "providers": args.providers,
+            "orders": args.orders,
+            "concurrency": args.concurrency,
+            "lp_concurrency": args.lp_concurrency,
+            "lp_connections": args.lp_connections,
+            "simulator": simulator_options(args),
+        },
+        "scenarios": {"hedge_routing": routing},
+        "quotes_per_second": round(quotes.count / elapsed, 1) if elapsed else 0.0,
+        "simulators": {code: {k: v for k, v in asdict(state).items() if k != "mids"}
+                       for code, state in simulators.items()},
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark hedge routing against simulated liquidity providers")
+    parser.add_argument("--providers", type=int, default=3)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50, help="Orders sent at once")
+    parser.add_argument("--lp-concurrency", type=int, default=20, help="Orders in flight per provider")
+    parser.add_argument("--lp-connections", type=int, default=10, help="Pooled connections per provider")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Seconds before an order's outcome counts as unknown")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="lp-routing-results.json")
+    add_simulator_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="imtiaz-bench-")
+    args.database_url = f"sqlite:///{workdir}/lp-routing.db"
+    os.environ.update({**BENCHMARK_ENV, "DATABASE_URL": args.database_url, "AUDIT_LOG_DIR": f"{workdir}/audit_logs"})
+
+    report = asyncio.run(run_routing(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
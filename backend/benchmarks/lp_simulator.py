@@ -0,0 +1,210 @@
+"""
+Simulated liquidity provider for local testing and routing benchmarks.
+
+Speaks the JSON protocol of ``app.services.lp_connectors.LPConnector``:
+
+- ``POST /orders`` with {"symbol", "side", "lots", "client_order_id"}
+  answers after a random latency with a fill at the current quote, moved
+  against the taker by up to ``--slippage``; a share of orders fail with 503
+  (``--failure-rate``) or are rejected (``--reject-rate``). An order runs to
+  the end even if the caller gives up on it, and a repeated client order id
+  gets the first order's answer instead of a second execution.
+- ``GET /orders/{client_order_id}`` reports that order's answer, or
+  {"status": "pending"} while it runs; 404 if it was never received.
+- ``WS /quotes`` takes {"action": "subscribe", "symbols": [...]} and streams
+  random-walk {"symbol", "bid", "ask"} quotes every ``--tick-interval``
+  seconds, dropping the connection at random (``--disconnect-rate`` per tick)
+  to exercise reconnects.
+
+Usage:
+    python -m benchmarks.lp_simulator --port 9101 --latency-ms 5-40 --failure-rate 0.05
+"""
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+START_PRICES = {"EURUSD": 1.1, "GBPUSD": 1.27, "USDJPY": 150.0, "XAUUSD": 2000.0, "BTCUSD": 60000.0}
+DEFAULT_START_PRICE = 100.0
+# Spread and per-tick volatility, relative to the mid price
+SPREAD = 0.0001
+VOLATILITY = 0.00005
+
+
+@dataclass
+class SimulatorState:
+    """What the simulator has done, for tests and benchmark reports."""
+    mids: Dict[str, float] = field(default_factory=dict)
+    orders: int = 0
+    fills: int = 0
+    failures: int = 0
+    rejects: int = 0
+    duplicates: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    connections: int = 0
+    disconnects: int = 0
+
+    def quote(self, symbol: str) -> Tuple[float, float]:
+        mid = self.mids.setdefault(symbol, START_PRICES.get(symbol, DEFAULT_START_PRICE))
+        return round(mid * (1 - SPREAD / 2), 6), round(mid * (1 + SPREAD / 2), 6)
+
+
+def create_simulator(
+    latency_ms: Tuple[float, float] = (0.0, 0.0),
+    failure_rate: float = 0.0,
+    reject_rate: float = 0.0,
+    slippage: float = 0.0,
+    tick_interval: float = 0.1,
+    disconnect_rate: float = 0.0,
+    api_key: Optional[str] = None,
+    seed: Optional[int] = None
+):
+    """FastAPI app acting as one liquidity provider; ``app.state.simulator`` records what it did."""
+    from fastapi import FastAPI, Request, WebSocket
+    from fastapi.responses import JSONResponse
+
+    rng = random.Random(seed)
+    state = SimulatorState()
+    app = FastAPI(title="Simulated liquidity provider")
+    app.state.simulator = state
+
+    placed: Dict[str, asyncio.Future] = {}  # client order id -> (status code, answer)
+
+    def authorized(key: Optional[str]) -> bool:
+        return api_key is None or key == api_key
+
+    def bearer(request: Request) -> str:
+        return request.headers.get("authorization", "").removeprefix("Bearer ")
+
+    @app.post("/orders")
+    async def place_order(request: Request):
+        if not authorized(bearer(request)):
+            return JSONResponse({"status": "rejected", "detail": "Invalid API key"}, status_code=401)
+        order = await request.json()
+        client_order_id = order.get("client_order_id")
+        if client_order_id in placed:
+            state.duplicates += 1
+            execution = placed[client_order_id]
+        else:
+            execution = asyncio.ensure_future(execute(order))
+            if client_order_id:
+                placed[client_order_id] = execution
+        status_code, answer = await asyncio.shield(execution)
+        return JSONResponse(answer, status_code=status_code)
+
+    @app.get("/orders/{client_order_id}")
+    async def order_status(client_order_id: str, request: Request):
+        if not authorized(bearer(request)):
+            return JSONResponse({"status": "rejected", "detail": "Invalid API key"}, status_code=401)
+        execution = placed.get(client_order_id)
+        if execution is None:
+            return JSONResponse({"status": "unknown", "detail": "No such order"}, status_code=404)
+        if not execution.done():
+            return {"status": "pending"}
+        return execution.result()[1]
+
+    async def execute(order) -> Tuple[int, dict]:
+        state.orders += 1
+        state.in_flight += 1
+        state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+        try:
+            await asyncio.sleep(rng.uniform(*latency_ms) / 1000)
+        finally:
+            state.in_flight -= 1
+
+        if rng.random() < failure_rate:
+            state.failures += 1
+            return 503, {"status": "error", "detail": "Service unavailable"}
+        if rng.random() < reject_rate:
+            state.rejects += 1
+            return 422, {"status": "rejected", "detail": "No liquidity"}
+
+        bid, ask = state.quote(order["symbol"])
+        moved = rng.uniform(0, slippage)
+        price = ask + moved if order["side"] == "BUY" else bid - moved
+        state.fills += 1
+        return 200, {"status": "filled", "symbol": order["symbol"], "side": order["side"],
+                     "filled_lots": order["lots"], "price": round(price, 6)}
+
+    @app.websocket("/quotes")
+    async def stream_quotes(websocket: WebSocket):
+        await websocket.accept()
+        subscription = await websocket.receive_json()
+        if not authorized(subscription.get("api_key")):
+            await websocket.close(code=1008)
+            return
+        state.connections += 1
+        symbols = subscription.get("symbols") or []
+
+        async def publish():
+            while True:
+                if rng.random() < disconnect_rate:
+                    state.disconnects += 1
+                    await websocket.close(code=1011)
+                    return
+                quotes = []
+                for symbol in symbols:
+                    state.mids[symbol] = state.mids.get(symbol, START_PRICES.get(symbol, DEFAULT_START_PRICE)) \
+                        * (1 + rng.gauss(0, VOLATILITY))
+                    bid, ask = state.quote(symbol)
+                    quotes.append({"symbol": symbol, "bid": bid, "ask": ask})
+                await websocket.send_json(quotes)
+                await asyncio.sleep(tick_interval)
+
+        async def until_disconnected():
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+
+        # Publish until either side closes; a send racing the client's close may fail, which is fine
+        tasks = [asyncio.create_task(publish()), asyncio.create_task(until_disconnected())]
+        _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return app
+
+
+def parse_latency(value: str) -> Tuple[float, float]:
+    """``"20"`` or ``"5-40"`` milliseconds as a (low, high) range."""
+    low, _, high = value.partition("-")
+    return float(low), float(high or low)
+
+
+def add_simulator_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=parse_latency, default=(1.0, 10.0),
+                        help="Order latency in milliseconds, fixed or a low-high range")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of orders failing with 503")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Share of orders rejected")
+    parser.add_argument("--slippage", type=float, default=0.0, help="Largest adverse price move on a fill")
+    parser.add_argument("--tick-interval", type=float, default=0.1, help="Seconds between quote updates")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0,
+                        help="Chance per tick of dropping a market data connection")
+
+
+def simulator_options(args) -> dict:
+    return {"latency_ms": args.latency_ms, "failure_rate": args.failure_rate, "reject_rate": args.reject_rate,
+            "slippage": args.slippage, "tick_interval": args.tick_interval,
+            "disconnect_rate": args.disconnect_rate}
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a simulated liquidity provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9101)
+    parser.add_argument("--api-key", default=None, help="Require this key on orders and subscriptions")
+    parser.add_argument("--seed", type=int, default=None)
+    add_simulator_arguments(parser)
+    args = parser.parse_args(argv)
+
+    app = create_simulator(api_key=args.api_key, seed=args.seed, **simulator_options(args))
+    print(f"Simulated LP on http://{args.host}:{args.port} (orders: POST /orders, quotes: ws /quotes)")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Load-test harness for the FastAPI app.
+
+Seeds a dataset, boots ``app.main:app`` under uvicorn (or drives it
+in-process through httpx's ASGI transport), then runs each scenario for a
+fixed duration with a pool of concurrent async clients. Latency percentiles
+and throughput per scenario are written to a JSON file that
+``benchmarks.compare`` can diff against a previous run.
+
+Usage:
+    python -m benchmarks.run --scale small --output results.json
+    python -m benchmarks.run --database-url postgresql://localhost/bench --scale large --workers 4
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+SCALES = {
+    "tiny": {"branches": 3, "users": 200, "trades": 2000, "transactions": 2000},
+    "small": {"branches": 10, "users": 5000, "trades": 100000, "transactions": 100000},
+    "large": {"branches": 50, "users": 100000, "trades": 2000000, "transactions": 2000000},
+}
+
+# Settings the app refuses to start without; real values are only needed outside benchmarks
+BENCHMARK_ENV = {
+    "SECRET_KEY": "benchmark-secret-key-0123456789-abcdefghij",
+    "ADMIN_EMAIL": "admin@bench.example.com",
+    "ADMIN_PASSWORD": "benchmark-admin-password-1",
+    "DEBUG": "false",
+    "RATELIMIT_ENABLED": "false",
+    "BALANCE_SNAPSHOT_ENABLED": "false",
+    "LOG_JSON": "true",
+    "API_LOG_SAMPLE_RATE": "0",
+}
+
+
+@dataclass
+class Identity:
+    """An authenticated benchmark client identity."""
+    email: str
+    token: str
+    account_id: Optional[int] = None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[random.Random, List[Identity], Identity], dict]
+
+
+def _client_request(method: str, path: str, **kwargs) -> dict:
+    return {"method": method, "url": path, **kwargs}
+
+
+def default_scenarios() -> List[Scenario]:
+    from app.init_db import SEED_PASSWORD
+
+    def login(rng, clients, manager):
+        session = rng.choice(clients)
+        return _client_request("POST", "/api/auth/login",
+                               json={"email": session.email, "password": SEED_PASSWORD})
+
+    def me(rng, clients, manager):
+        return _client_request("GET", "/api/auth/me", headers=rng.choice(clients).headers)
+
+    def manager_list(path):
+        return lambda rng, clients, manager: _client_request("GET", path, headers=manager.headers)
+
+    def deposit(rng, clients, manager):
+        session = rng.choice(clients)
+        return _client_request(
+            "POST", "/api/transactions/deposit",
+            json={"account_id": session.account_id, "amount": round(rng.uniform(10, 500), 2)},
+            headers={**session.headers, "Idempotency-Key": str(uuid.uuid4())},
+        )
+
+    def account_path(suffix, **params):
+        def build(rng, clients, manager):
+            session = rng.choice(clients)
+            return _client_request("GET", f"/api/accounts/{session.account_id}{suffix}",
+                                   headers=session.headers, params=params)
+        return build
+
+    return [
+        Scenario("login", login),
+        Scenario("auth_me", me),
+        Scenario("manager_spreads", manager_list("/api/manager/spreads")),
+        Scenario("manager_branches", manager_list("/api/manager/branches")),
+        Scenario("manager_liquidity_providers", manager_list("/api/manager/liquidity-providers")),
+        Scenario("manager_routing_rules", manager_list("/api/manager/routing-rules")),
+        Scenario("deposit", deposit),
+        Scenario("statement_summary", account_path("/statement/summary")),
+        Scenario("statement_csv", account_path("/statement", format="csv")),
+        Scenario("balance_history", account_path("/balance-history")),
+    ]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], status_codes: Dict[int, int], elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    errors = sum(count for code, count in status_codes.items() if code >= 400 or code == 0)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status_codes": {str(code): count for code, count in sorted(status_codes.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 0.50)),
+            "p95": ms(percentile(latencies, 0.95)),
+            "p99": ms(percentile(latencies, 0.99)),
+            "max": ms(latencies[-1]) if latencies else 0.0,
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        },
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, clients: List[Identity],
+                       manager: Identity, concurrency: int, duration: float,
+                       max_requests: Optional[int] = None, random_seed: int = 0) -> dict:
+    """Drive one scenario with ``concurrency`` workers for ``duration`` seconds."""
+    latencies: List[float] = []
+    status_codes: Dict[int, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        rng = random.Random(random_seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            if max_requests is not None and len(latencies) >= max_requests:
+                return
+            request = scenario.build(rng, clients, manager)
+            start = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                await response.aread()
+                code = response.status_code
+            except httpx.HTTPError:
+                code = 0
+            latencies.append(time.perf_counter() - start)
+            status_codes[code] = status_codes.get(code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return summarize(latencies, status_codes, time.perf_counter() - started)
+
+
+async def authenticate(client: httpx.AsyncClient, count: int) -> tuple:
+    """Log in the manager and ``count`` clients; returns (manager, clients)."""
+    from app.init_db import SEED_MANAGER_EMAIL, SEED_PASSWORD, seed_client_email
+
+    async def login(email: str, account_id: Optional[int] = None) -> Identity:
+        response = await client.post("/api/auth/login", json={"email": email, "password": SEED_PASSWORD})
+        response.raise_for_status()
+        return Identity(email, response.json()["access_token"], account_id)
+
+    manager = await login(SEED_MANAGER_EMAIL)
+    # Seeded client n owns account n
+    clients = await asyncio.gather(*(login(seed_client_email(n), n) for n in range(1, count + 1)))
+    return manager, list(clients)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(env: Dict[str, str], workers: int, log_path: str) -> tuple:
+    """Boot uvicorn in a subprocess and wait for /health; returns (process, base_url)."""
+    port = _free_port()
+    log_file = open(log_path, "ab")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env={**os.environ, **env},
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    log_file.close()
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}; see {log_path}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not become healthy within 60 seconds")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmarks(args, sizes: Dict[str, int], seed_seconds: Optional[float]) -> dict:
+    scenarios = default_scenarios()
+    if args.scenarios:
+        wanted = set(args.scenarios.split(","))
+        scenarios = [s for s in scenarios if s.name in wanted]
+
+    process = None
+    if args.in_process:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://benchmark"
+    else:
+        process, base_url = start_server(args.env, args.workers, args.server_log)
+        transport = None
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=30) as client:
+            manager, clients = await authenticate(client, min(args.clients, sizes["users"]))
+            results = {}
+            for scenario in scenarios:
+                results[scenario.name] = await run_scenario(
+                    client, scenario, clients, manager, args.concurrency, args.duration,
+                    random_seed=args.seed
+                )
+                latency = results[scenario.name]["latency_ms"]
+                print(f"{scenario.name:<30} {results[scenario.name]['throughput_rps']:>10.1f} req/s  "
+                      f"p50 {latency['p50']:>8.2f}ms  p95 {latency['p95']:>8.2f}ms  p99 {latency['p99']:>8.2f}ms")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "database": args.database_url.split(":", 1)[0],
+            "dataset": sizes,
+            "seed_seconds": seed_seconds,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "workers": None if args.in_process else args.workers,
+            "in_process": args.in_process,
+        },
+        "scenarios": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the trading platform API")
+    parser.add_argument("--database-url", default=None,
+                        help="Defaults to a fresh SQLite file in a temporary directory")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the data already in --database-url")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the dataset and request mix")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--clients", type=int, default=50, help="Distinct logged-in clients")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--in-process", action="store_true", help="Drive the app through the ASGI transport")
+    parser.add_argument("--scenarios", default=None, help="Comma-separated subset of scenarios to run")
+    parser.add_argument("--output", default="benchmark-results.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # httpx logs every request at INFO, which would dominate an in-process run
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="imtiaz-bench-")
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{workdir}/bench.db"
+    args.server_log = os.path.join(workdir, "server.log")
+    args.env = {**BENCHMARK_ENV, "DATABASE_URL": args.database_url, "AUDIT_LOG_DIR": f"{workdir}/audit_logs"}
+    os.environ.update(args.env)
+
+    from sqlalchemy import create_engine
+    from app.init_db import seed_database
+
+    sizes = SCALES[args.scale]
+    seed_seconds = None
+    if not args.skip_seed:
+        engine = create_engine(args.database_url)
+        started = time.perf_counter()
+        seed_database(engine, random_seed=args.seed, reset=True, **sizes)
+        seed_seconds = round(time.perf_counter() - started, 2)
+        engine.dispose()
+        print(f"Seeded {sizes} in {seed_seconds}s")
+
+    report = asyncio.run(run_benchmarks(args, sizes, seed_seconds))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
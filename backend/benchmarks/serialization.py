@@ -0,0 +1,102 @@
+"""
+Serialization cost of large list responses, before and after the fast path.
+
+Loads ``--rows`` routing rules into an in-memory SQLite database, then times
+building the JSON body of a single page holding all of them two ways:
+
+- ``validated``: ORM objects, ``model_validate`` + ``model_dump`` per row,
+  stdlib ``json.dumps`` (the list endpoints before the fast path).
+- ``projected``: column-only query, ``project_rows`` with precomputed
+  converters, ``orjson.dumps`` (the list endpoints now).
+
+Usage:
+    python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+
+def build_database(rows: int):
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import Session
+    from sqlalchemy.pool import StaticPool
+
+    from app.database import Base
+    from app.models import RoutingRule, RoutingType
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(RoutingRule), [
+            {
+                "name": f"rule-{n}", "symbol": "EURUSD" if n % 2 else None, "routing_type": RoutingType.A_BOOK,
+                "a_book_percentage": 100.0, "priority": n % 50, "is_active": True,
+                "min_lot_size": 0.01, "max_lot_size": 100.0, "description": f"Benchmark rule {n}",
+            }
+            for n in range(rows)
+        ])
+    return Session(engine)
+
+
+def validated_body(db, page) -> bytes:
+    from app.models import RoutingRule
+    from app.schemas.manager import RoutingRuleResponse
+    from app.utils.pagination import page_payload, paginate
+
+    rules, next_cursor = paginate(db.query(RoutingRule), [RoutingRule.priority, RoutingRule.id], page)
+    content, _ = page_payload(rules, next_cursor, RoutingRuleResponse, page)
+    return json.dumps(content, separators=(",", ":")).encode("utf-8")
+
+
+def projected_body(db, page) -> bytes:
+    import orjson
+
+    from app.models import RoutingRule
+    from app.schemas.manager import RoutingRuleResponse
+    from app.utils.pagination import page_payload, paginate, projection_query
+
+    sort = [RoutingRule.priority, RoutingRule.id]
+    rules, next_cursor = paginate(projection_query(db, RoutingRule, RoutingRuleResponse, page, sort), sort, page)
+    content, _ = page_payload(rules, next_cursor, RoutingRuleResponse, page, trusted=True)
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def measure(build, db, page, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        db.expunge_all()
+        started = time.perf_counter()
+        body = build(db, page)
+        timings.append(time.perf_counter() - started)
+    return {"median_ms": round(statistics.median(timings) * 1000, 1),
+            "min_ms": round(min(timings) * 1000, 1), "bytes": len(body)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time list response serialization")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from benchmarks.run import BENCHMARK_ENV
+    for key, value in {**BENCHMARK_ENV, "DATABASE_URL": "sqlite://", "AUDIT_LOG_ENABLED": "false"}.items():
+        os.environ.setdefault(key, value)
+
+    from app.utils.pagination import PageParams
+
+    db = build_database(args.rows)
+    page = PageParams(cursor=None, limit=args.rows, fields=None)
+    validated = measure(validated_body, db, page, args.repeat)
+    projected = measure(projected_body, db, page, args.repeat)
+
+    print(f"{args.rows} rows, median of {args.repeat}")
+    for name, result in (("validated", validated), ("projected", projected)):
+        print(f"  {name:<10} {result['median_ms']:>8.1f} ms  (min {result['min_ms']:.1f} ms, {result['bytes']} bytes)")
+    print(f"  speedup    {validated['median_ms'] / projected['median_ms']:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
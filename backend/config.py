@@ -18,6 +18,11 @@ class Settings(BaseSettings):
 
     # Database (PostgreSQL connection string from Supabase)
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 300  # Recycle age this app has always used with Supabase
+    DB_SLOW_CHECKOUT_MS: int = 100
 
     # Security
     SECRET_KEY: str
@@ -1,14 +1,17 @@
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from supabase import create_client, Client
 from config import settings
+from app.utils.db_pool import create_pooled_engine
 
-# SQLAlchemy setup for direct PostgreSQL access
-engine = create_engine(
+# SQLAlchemy setup for direct PostgreSQL access, with the same pool handling as app.database
+engine = create_pooled_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    slow_checkout_ms=settings.DB_SLOW_CHECKOUT_MS,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -1,11 +1,19 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from supabase import Client
+from typing import Optional
 import os
 
 from config import settings
 from database import get_db, get_supabase, engine, Base
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    parse_fields
+)
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -28,6 +36,53 @@ app.add_middleware(
 )
 
 
+def supabase_page(
+    supabase: Client,
+    table: str,
+    sort_column: str,
+    filters: dict,
+    cursor: Optional[str],
+    limit: int,
+    fields: Optional[str]
+) -> dict:
+    """
+    Fetch one newest-first page of a Supabase table using keyset pagination.
+
+    The cursor encodes (sort_column, id) of the last row returned.
+    """
+    columns = parse_fields(fields)
+    if columns:
+        # Sort keys are always selected so the next cursor can be built
+        columns = list(dict.fromkeys(columns + [sort_column, "id"]))
+    query = supabase.table(table).select(",".join(columns) if columns else "*")
+
+    for name, value in filters.items():
+        if value is not None:
+            query = query.eq(name, value)
+
+    if cursor:
+        last_sort, last_id = decode_cursor(cursor, 2)
+        if any('"' in str(value) or '\\' in str(value) for value in (last_sort, last_id)):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        query = query.or_(
+            f'{sort_column}.lt."{last_sort}",and({sort_column}.eq."{last_sort}",id.lt."{last_id}")'
+        )
+
+    response = query.order(sort_column, desc=True).order("id", desc=True).limit(limit + 1).execute()
+    rows = response.data or []
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][sort_column], rows[-1]["id"]])
+
+    return {
+        "success": True,
+        "data": rows,
+        "next_cursor": next_cursor
+    }
+
+
 @app.get("/")
 async def root():
     """Root endpoint - API information."""
@@ -155,14 +210,24 @@ async def create_account(
 # =====================================================
 
 @app.get("/api/trades")
-async def get_trades(supabase: Client = Depends(get_supabase)):
-    """Get all trades for the authenticated user."""
+async def get_trades(
+    account_id: Optional[str] = None,
+    symbol: Optional[str] = None,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    supabase: Client = Depends(get_supabase)
+):
+    """Get trades for the authenticated user, newest first, one page at a time."""
     try:
-        response = supabase.table('trades').select('*').order('open_time', desc=True).execute()
-        return {
-            "success": True,
-            "data": response.data
-        }
+        return supabase_page(
+            supabase, 'trades', 'open_time',
+            {"account_id": account_id, "symbol": symbol, "status": status},
+            cursor, limit, fields
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -172,14 +237,24 @@ async def get_trades(supabase: Client = Depends(get_supabase)):
 # =====================================================
 
 @app.get("/api/transactions")
-async def get_transactions(supabase: Client = Depends(get_supabase)):
-    """Get all transactions for the authenticated user."""
+async def get_transactions(
+    account_id: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    supabase: Client = Depends(get_supabase)
+):
+    """Get transactions for the authenticated user, newest first, one page at a time."""
     try:
-        response = supabase.table('transactions').select('*').order('created_at', desc=True).execute()
-        return {
-            "success": True,
-            "data": response.data
-        }
+        return supabase_page(
+            supabase, 'transactions', 'created_at',
+            {"account_id": account_id, "transaction_type": transaction_type, "status": status},
+            cursor, limit, fields
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -25,9 +25,9 @@ if [ ! -f ".env" ]; then
     exit 1
 fi
 
-# Check if database is initialized
-echo "🔍 Checking database..."
-python -c "from app.database import engine; from app.models import Base; Base.metadata.create_all(bind=engine)" 2>/dev/null
+# Create missing tables once, before any worker starts
+echo "🔍 Migrating database schema..."
+python -m app.init_db --migrate
 
 if [ $? -eq 0 ]; then
     echo "✅ Database ready"
@@ -0,0 +1,196 @@
+"""
+Shared pytest fixtures for the backend test suite.
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# Settings are validated at import time, so provide safe defaults before any app import
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="imtiaz-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TEST_DB_DIR}/app.db")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-0123456789-abcdefghijklmnop")
+os.environ.setdefault("ADMIN_EMAIL", "admin@test.local")
+os.environ.setdefault("ADMIN_PASSWORD", "admin-password-123")
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("AUDIT_LOG_DIR", os.path.join(_TEST_DB_DIR, "audit_logs"))
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, get_db, get_read_db
+import app.models  # noqa: F401 - register all models on Base.metadata
+
+
+@pytest.fixture
+def db_engine():
+    """Fresh in-memory SQLite engine with the full schema."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(db_engine):
+    """Database session bound to the in-memory test engine."""
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db_engine):
+    """TestClient with get_db and get_read_db pointed at the in-memory test engine."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.utils.http_cache import resource_cache
+
+    # Cached responses from earlier tests belong to a different database
+    resource_cache.clear()
+
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    def override_get_db():
+        session = TestingSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+def login_as(user):
+    """Route every authenticated request through the given user."""
+    from app.main import app
+    from app.middleware.auth import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: user
+
+
+@contextmanager
+def assert_max_queries(engine, max_count):
+    """Fail if the block executes more than ``max_count`` SQL statements on ``engine``."""
+    from app.utils.query_stats import QueryStats
+
+    stats = QueryStats()
+
+    def listener(conn, cursor, statement, *args):
+        stats.record(statement, 0.0)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    repeated = "\n".join(f"  {count}x {sql}" for sql, count in stats.repeated(2))
+    assert stats.count <= max_count, (
+        f"Expected at most {max_count} queries, got {stats.count}" + (f"; repeated:\n{repeated}" if repeated else "")
+    )
+
+
+class FakeClock:
+    """A monotonic clock that only moves when a test sets ``now``."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def manager(db):
+    """A manager, logged in for every authenticated request."""
+    from app.models import User, UserRole
+
+    user = User(email="manager@test.local", hashed_password="x", name="Manager",
+                role=UserRole.MANAGER, is_active=True, is_verified=True)
+    db.add(user)
+    db.commit()
+    login_as(user)
+    return user
+
+
+def add_client(db, branch, email, balance=1000):
+    """A verified client of ``branch`` with one funded account."""
+    from app.models import Account, User, UserRole
+
+    user = User(email=email, hashed_password="x", name=email, role=UserRole.CLIENT,
+                is_active=True, is_verified=True, branch_id=branch.id)
+    db.add(user)
+    db.flush()
+    db.add(Account(user_id=user.id, account_number=f"ACC-{user.id}", balance=balance, wallet_balance=balance))
+    db.commit()
+    return user
+
+
+def open_trade(db, user, symbol, side, lots, price=1.1):
+    from app.models.trade import OrderType, Trade, TradeStatus
+
+    trade = Trade(user_id=user.id, symbol=symbol, trade_type=side, order_type=OrderType.MARKET,
+                  lots=lots, open_price=price, status=TradeStatus.OPEN)
+    db.add(trade)
+    db.commit()
+    return trade
+
+
+@pytest.fixture
+def spreads(db):
+    """Six product spreads, one of them crypto; returns their symbols."""
+    from app.models import ProductSpread
+
+    symbols = ["AUDUSD", "BTCUSD", "EURUSD", "GBPUSD", "USDJPY", "XAUUSD"]
+    for symbol in symbols:
+        category = "crypto" if symbol == "BTCUSD" else "forex"
+        db.add(ProductSpread(symbol=symbol, name=symbol, category=category))
+    db.commit()
+    return symbols
+
+
+@pytest.fixture
+def desk(db):
+    """A branch, EURUSD and XAUUSD, and a client trading them; returns (branch, client)."""
+    from app.models import Branch, ProductSpread
+
+    branch = Branch(name="Main", code="MAIN", referral_code="MAIN-REF", commission_per_lot=5,
+                    admin_email="admin@main.test", admin_name="Admin")
+    db.add_all([
+        branch,
+        ProductSpread(symbol="EURUSD", name="Euro"),
+        ProductSpread(symbol="XAUUSD", name="Gold", category="commodity"),
+    ])
+    db.commit()
+    return branch, add_client(db, branch, "trader@test.local")
+
+
+@pytest.fixture
+def aggregator(db_engine, monkeypatch):
+    """A loaded exposure aggregator on the test database that receives every committed open and close."""
+    import app.api.manager as manager_api
+    import app.services.exposure as exposure
+    from app.services.exposure import ExposureAggregator
+
+    aggregator = ExposureAggregator(sessionmaker(bind=db_engine), resync_seconds=60, clock=FakeClock())
+    monkeypatch.setattr(exposure, "exposure_aggregator", aggregator)
+    monkeypatch.setattr(manager_api, "exposure_aggregator", aggregator)
+    aggregator.reload()
+    return aggregator
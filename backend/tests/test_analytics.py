@@ -0,0 +1,135 @@
+"""
+Tests for the branch analytics rollups and the analytics API.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models import BranchDailyClient, BranchDailyStats, Branch, Trade
+from app.models.trade import OrderType, TradeStatus, TradeType
+from app.services.analytics import query_rollups, rebuild_rollups
+from app.services.commissions import CommissionEngine
+from tests.conftest import add_client
+
+DAY = date(2025, 3, 14)
+
+
+@pytest.fixture
+def branches(db):
+    rows = [
+        Branch(name=name, code=name, referral_code=f"{name}-REF", commission_per_lot=5,
+               admin_email=f"admin@{name.lower()}.test", admin_name="Admin")
+        for name in ("NORTH", "SOUTH")
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def close_trade(db, user, symbol, lots, profit_loss, closed_at=datetime(2025, 3, 14, 12, 0)):
+    trade = Trade(user_id=user.id, symbol=symbol, trade_type=TradeType.BUY, order_type=OrderType.MARKET,
+                  lots=lots, open_price=1.1, status=TradeStatus.OPEN)
+    db.add(trade)
+    db.commit()
+    trade.status = TradeStatus.CLOSED
+    trade.close_price = 1.2
+    trade.profit_loss = profit_loss
+    trade.closed_at = closed_at
+    db.commit()
+    return trade
+
+
+@pytest.fixture
+def activity(db, branches):
+    north, south = branches
+    alice = add_client(db, north, "alice@test.local")
+    bob = add_client(db, north, "bob@test.local")
+    carol = add_client(db, south, "carol@test.local")
+    close_trade(db, alice, "EURUSD", 1, 100)
+    close_trade(db, alice, "XAUUSD", 0.5, -40)
+    close_trade(db, bob, "EURUSD", 2, 25)
+    close_trade(db, carol, "EURUSD", 1, 10, closed_at=datetime(2025, 3, 15, 9, 30))
+    return north, south
+
+
+def snapshot(db):
+    stats = sorted(
+        (row.day, row.branch_id, row.symbol, row.trades_closed, Decimal(row.volume_lots),
+         Decimal(row.profit_loss), Decimal(row.commission))
+        for row in db.query(BranchDailyStats)
+    )
+    clients = sorted((row.day, row.branch_id, row.symbol, row.user_id) for row in db.query(BranchDailyClient))
+    return stats, clients
+
+
+class TestIncrementalRollups:
+    """Rollups follow trade closes and commission postings."""
+
+    def test_closes_roll_up_by_branch_symbol_and_day(self, db, activity):
+        north, south = activity
+
+        rows = query_rollups(db, ["day", "branch", "symbol"])
+
+        assert rows[0] == {"day": DAY, "branch_id": north.id, "symbol": "EURUSD", "trades_closed": 2,
+                           "volume_lots": 3.0, "profit_loss": 125.0, "commission": 0.0, "active_clients": 2}
+        assert [(row["day"], row["branch_id"], row["symbol"]) for row in rows] == [
+            (DAY, north.id, "EURUSD"), (DAY, north.id, "XAUUSD"), (date(2025, 3, 15), south.id, "EURUSD")]
+
+    def test_active_clients_are_distinct_across_symbols(self, db, activity):
+        north, _ = activity
+
+        rows = query_rollups(db, ["branch"], branch_id=north.id)
+
+        assert rows == [{"branch_id": north.id, "trades_closed": 3, "volume_lots": 3.5, "profit_loss": 85.0,
+                         "commission": 0.0, "active_clients": 2}]
+
+    def test_rolled_back_close_leaves_rollups_alone(self, db, branches):
+        user = add_client(db, branches[0], "a@test.local")
+        trade = Trade(user_id=user.id, symbol="EURUSD", trade_type=TradeType.BUY, order_type=OrderType.MARKET,
+                      lots=1, open_price=1.1, status=TradeStatus.CLOSED)
+        db.add(trade)
+        db.flush()
+        db.rollback()
+
+        assert db.query(BranchDailyStats).count() == 0
+
+    def test_commission_batches_add_to_the_close_bucket(self, db, db_engine, activity):
+        north, _ = activity
+        engine = CommissionEngine(sessionmaker(bind=db_engine))
+        engine.record_closes(trade.id for trade in db.query(Trade))
+
+        engine.flush()
+
+        rows = query_rollups(db, ["branch", "symbol"], branch_id=north.id)
+        assert [(row["symbol"], row["commission"]) for row in rows] == [("EURUSD", 15.0), ("XAUUSD", 2.5)]
+
+
+class TestRebuild:
+    def test_rebuild_matches_incremental_rollups(self, db, db_engine, activity):
+        engine = CommissionEngine(sessionmaker(bind=db_engine))
+        engine.record_closes(trade.id for trade in db.query(Trade))
+        engine.flush()
+        db.expire_all()
+        incremental = snapshot(db)
+
+        assert rebuild_rollups(db) == 3
+        assert snapshot(db) == incremental
+
+
+class TestAnalyticsApi:
+    def test_grouped_and_filtered(self, client, manager, activity):
+        north, south = activity
+
+        response = client.get("/api/manager/analytics",
+                              params={"group_by": "branch", "date_from": "2025-03-15"})
+
+        assert response.status_code == 200
+        assert response.json() == [{"branch_id": south.id, "trades_closed": 1, "volume_lots": 1.0,
+                                    "profit_loss": 10.0, "commission": 0.0, "active_clients": 1}]
+
+    def test_unknown_dimension_is_rejected(self, client, manager):
+        response = client.get("/api/manager/analytics", params={"group_by": "branch,account"})
+
+        assert response.status_code == 400
@@ -0,0 +1,143 @@
+"""
+Tests for the hash-chained audit log segment store.
+"""
+import os
+import time
+
+import pytest
+
+import app.utils.audit_log as audit_log
+from app.utils.audit_log import AuditLogError, AuditLogStore, HEADER_SIZE, verify_audit_log
+
+
+@pytest.fixture
+def store(tmp_path):
+    audit_log = AuditLogStore(str(tmp_path), index_interval=8)
+    yield audit_log
+    audit_log.close()
+
+
+def test_lookup_by_user_and_time_range(store):
+    for i in range(50):
+        store.append("security", "login", user_id=i % 5, attempt=i)
+    store.flush()
+    midpoint = time.time()
+    store.append("transaction", "deposit", user_id=3, amount=100.0)
+    store.flush()
+
+    user_three = list(store.query(user_id=3))
+    recent = list(store.query(start=midpoint))
+
+    assert [r.data["attempt"] for r in user_three[:-1]] == list(range(3, 50, 5))
+    assert user_three[-1].event == "deposit"
+    assert [r.event for r in recent] == ["deposit"]
+    assert [r.seq for r in store.query(limit=3)] == [1, 2, 3]
+
+
+def test_reopen_continues_sequence_and_chain(tmp_path):
+    first = AuditLogStore(str(tmp_path), index_interval=4, segment_max_bytes=1024)
+    for i in range(30):
+        first.append("security", "login", user_id=1, attempt=i)
+    first.close()
+
+    second = AuditLogStore(str(tmp_path), index_interval=4, segment_max_bytes=1024)
+    second.append("security", "logout", user_id=1)
+    second.flush()
+    events = list(second.query(user_id=1))
+    second.close()
+
+    assert len(list(tmp_path.glob("audit-*.log"))) > 1
+    assert [r.seq for r in events] == list(range(1, 32))
+    assert verify_audit_log(str(tmp_path)) == (True, 31, None)
+
+
+def test_torn_tail_is_truncated_on_reopen(tmp_path):
+    store = AuditLogStore(str(tmp_path))
+    store.append("security", "login", user_id=1)
+    store.close()
+    segment = next(tmp_path.glob("audit-*.log"))
+    with open(segment, "ab") as f:
+        f.write(b"\x00\x00\x01\x00partial")
+
+    reopened = AuditLogStore(str(tmp_path))
+    reopened.append("security", "logout", user_id=1)
+    reopened.close()
+
+    assert verify_audit_log(str(tmp_path)).records == 2
+
+
+def test_verify_detects_tampering(store, tmp_path):
+    store.append("transaction", "withdrawal", user_id=9, amount=500.0)
+    store.append("transaction", "deposit", user_id=9, amount=10.0)
+    store.flush()
+
+    segment = next(tmp_path.glob("audit-*.log"))
+    data = segment.read_bytes()
+    segment.write_bytes(data[:HEADER_SIZE] + data[HEADER_SIZE:].replace(b"500.0", b"5.0e2"))
+
+    result = verify_audit_log(str(tmp_path))
+    assert not result.ok
+    assert "hash mismatch at record 1" in result.error
+
+
+def test_tampered_record_is_kept_and_the_store_refuses_to_open(tmp_path):
+    store = AuditLogStore(str(tmp_path))
+    for amount in (100.0, 500.0, 200.0, 300.0, 400.0):
+        store.append("transaction", "deposit", user_id=9, amount=amount)
+    store.close()
+    segment = next(tmp_path.glob("audit-*.log"))
+    data = segment.read_bytes()
+    segment.write_bytes(data[:HEADER_SIZE] + data[HEADER_SIZE:].replace(b"500.0", b"5.0e2"))
+
+    with pytest.raises(AuditLogError, match="record 2 fails verification"):
+        AuditLogStore(str(tmp_path))
+
+    assert segment.read_bytes().count(b"deposit") == 5
+    result = verify_audit_log(str(tmp_path))
+    assert (result.ok, result.records) == (False, 1)
+    assert "hash mismatch at record 2" in result.error
+
+
+def test_failed_write_is_cut_back_and_retried(tmp_path, monkeypatch):
+    store = AuditLogStore(str(tmp_path))
+    store.append("security", "login", user_id=1)
+    store.flush()
+    real_fsync, failures = os.fsync, [OSError("disk full")]
+
+    def flaky_fsync(fd):
+        if failures:
+            raise failures.pop()
+        real_fsync(fd)
+
+    monkeypatch.setattr(audit_log.os, "fsync", flaky_fsync)
+    store.append("security", "logout", user_id=1)
+    assert store.flush()
+    store.close()
+
+    assert verify_audit_log(str(tmp_path)) == (True, 2, None)
+
+
+def test_writer_that_keeps_failing_stops_accepting_events(tmp_path, monkeypatch):
+    store = AuditLogStore(str(tmp_path))
+    monkeypatch.setattr(audit_log.os, "fsync", lambda fd: (_ for _ in ()).throw(OSError("disk gone")))
+    monkeypatch.setattr(audit_log.time, "sleep", lambda seconds: None)
+
+    store.append("security", "login", user_id=1)
+    assert not store.flush()
+    with pytest.raises(AuditLogError, match="disk gone"):
+        store.append("security", "logout", user_id=1)
+    store.close()
+
+    assert verify_audit_log(str(tmp_path)) == (True, 0, None)
+
+
+def test_security_events_reach_the_audit_log(client, tmp_path):
+    from app.utils.audit_log import get_audit_log
+    from app.utils.logging import log_security_event
+
+    log_security_event("login", user_email="someone@test.local", user_id=4242, success=False)
+    get_audit_log().flush()
+
+    events = list(get_audit_log().query(user_id=4242))
+    assert events[-1].category == "security"
+    assert events[-1].data["success"] is False
@@ -0,0 +1,76 @@
+"""
+Tests for periodic balance snapshots and history downsampling.
+"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.models import User, UserRole, Account, Trade, TradeType, OrderType, TradeStatus, ProductSpread
+from app.models.balance_history import BalanceHistory
+from app.services.balance_snapshots import BalanceSnapshotter, downsample
+
+
+def _seed_account(db, balance=1000):
+    user = User(email="trader@test.local", hashed_password="x", name="Trader",
+                role=UserRole.CLIENT, is_active=True)
+    db.add(user)
+    db.flush()
+    account = Account(user_id=user.id, account_number="ACC-SNAP-1", balance=balance, leverage=100)
+    db.add(account)
+    db.add(ProductSpread(symbol="EURUSD", name="Euro / US Dollar", category="forex"))
+    db.add(Trade(user_id=user.id, symbol="EURUSD", trade_type=TradeType.BUY, order_type=OrderType.MARKET,
+                 lots=1, open_price=1.1, profit_loss=25, swap=-5, status=TradeStatus.OPEN))
+    db.commit()
+    return account
+
+
+class TestBalanceSnapshotter:
+    """Snapshot computation and change detection."""
+
+    def test_computes_equity_and_margin(self, db):
+        account = _seed_account(db)
+        snapshot = BalanceSnapshotter().compute(db)[0]
+
+        assert snapshot["account_id"] == account.id
+        assert float(snapshot["equity"]) == 1020.0
+        assert float(snapshot["margin"]) == 1100.0  # 1 lot * 100000 * 1.1 / 100
+        assert float(snapshot["free_margin"]) == -80.0
+
+    def test_open_trades_count_once_for_a_user_with_two_accounts(self, db):
+        account = _seed_account(db)
+        second = Account(user_id=account.user_id, account_number="ACC-SNAP-2", balance=500, leverage=100)
+        db.add(second)
+        db.commit()
+
+        snapshots = {row["account_id"]: row for row in BalanceSnapshotter().compute(db)}
+
+        assert float(snapshots[account.id]["equity"]) == 1020.0
+        assert float(snapshots[account.id]["margin"]) == 1100.0
+        assert float(snapshots[second.id]["equity"]) == 500.0
+        assert float(snapshots[second.id]["margin"]) == 0.0
+
+    def test_unchanged_accounts_are_skipped(self, db):
+        account = _seed_account(db)
+        snapshotter = BalanceSnapshotter()
+
+        assert snapshotter.snapshot(db) == 1
+        assert snapshotter.snapshot(db) == 0
+
+        account.balance = 2000
+        db.commit()
+        assert snapshotter.snapshot(db) == 1
+        assert db.query(BalanceHistory).count() == 2
+
+    def test_restart_primes_from_latest_snapshot(self, db):
+        _seed_account(db)
+        BalanceSnapshotter().snapshot(db)
+
+        assert BalanceSnapshotter().snapshot(db) == 0
+
+
+def test_downsample_keeps_last_point_per_bucket():
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = [SimpleNamespace(recorded_at=start + timedelta(minutes=m), value=m) for m in range(0, 180, 10)]
+
+    points = list(downsample(rows, 3600))
+
+    assert [p.value for p in points] == [50, 110, 170]
@@ -0,0 +1,27 @@
+"""
+Tests for the benchmark harness helpers.
+"""
+from benchmarks.compare import compare
+from benchmarks.run import percentile, summarize
+
+
+def test_summary_percentiles():
+    latencies = [i / 1000 for i in range(1, 101)]
+
+    summary = summarize(latencies, {200: 99, 500: 1}, elapsed=2.0)
+
+    assert percentile(sorted(latencies), 0.5) == 0.05
+    assert summary["latency_ms"]["p99"] == 99.0
+    assert summary["errors"] == 1
+    assert summary["throughput_rps"] == 50.0
+
+
+def test_compare_flags_p95_regressions():
+    def result(p95):
+        return {"scenarios": {"auth_me": {"latency_ms": {"p50": 1.0, "p95": p95, "p99": p95},
+                                          "throughput_rps": 100.0}}}
+
+    _, regressions = compare(result(10.0), result(10.5), threshold=0.1)
+    assert regressions == []
+    _, regressions = compare(result(10.0), result(12.0), threshold=0.1)
+    assert regressions == ["auth_me"]
@@ -0,0 +1,182 @@
+"""
+Tests for branch commission accrual on closed trades.
+"""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import app.services.commissions as commissions
+from app.models import Account, AccountMonthlySummary, Branch, Trade, Transaction, TransactionType
+from app.models.trade import OrderType, TradeStatus, TradeType
+from app.services.commissions import CommissionEngine
+from tests.conftest import FakeClock, add_client
+
+
+@pytest.fixture
+def engine(db_engine, monkeypatch):
+    """A fresh engine on the test database that receives every committed close."""
+    engine = CommissionEngine(sessionmaker(bind=db_engine), rate_ttl=60, totals_refresh=60, clock=FakeClock())
+    monkeypatch.setattr(commissions, "commission_engine", engine)
+    return engine
+
+
+@pytest.fixture
+def branch(db):
+    branch = Branch(name="Main", code="MAIN", referral_code="MAIN-REF", commission_per_lot=5,
+                    admin_email="admin@main.test", admin_name="Admin")
+    db.add(branch)
+    db.commit()
+    return branch
+
+
+def open_trades(db, user, *lots):
+    trades = [
+        Trade(user_id=user.id, symbol="EURUSD", trade_type=TradeType.BUY, order_type=OrderType.MARKET,
+              lots=amount, open_price=1.1, status=TradeStatus.OPEN)
+        for amount in lots
+    ]
+    db.add_all(trades)
+    db.commit()
+    return trades
+
+
+def close(db, *trades):
+    for trade in trades:
+        trade.status = TradeStatus.CLOSED
+        trade.close_price = 1.2
+    db.commit()
+
+
+class TestCloseTracking:
+    """Which committed changes queue a trade for commission."""
+
+    def test_committed_closes_are_queued(self, db, engine, branch):
+        trades = open_trades(db, add_client(db, branch, "a@test.local"), 1, 2)
+        assert engine.pending() == 0
+
+        close(db, trades[0])
+
+        assert engine._pending == {trades[0].id}
+
+    def test_rolled_back_closes_and_other_updates_are_not(self, db, engine, branch):
+        trade, = open_trades(db, add_client(db, branch, "a@test.local"), 1)
+        trade.status = TradeStatus.CLOSED
+        db.flush()
+        db.rollback()
+        trade.comment = "note"
+        db.commit()
+
+        assert engine.pending() == 0
+
+    def test_workers_without_accrual_queue_nothing(self, db, engine, branch, monkeypatch):
+        monkeypatch.setattr(commissions.settings, "COMMISSION_ACCRUAL_ENABLED", False)
+        trade, = open_trades(db, add_client(db, branch, "a@test.local"), 1)
+
+        close(db, trade)
+
+        assert engine.pending() == 0
+
+
+class TestCharging:
+    """Batches become one COMMISSION transaction per account."""
+
+    def test_batch_posts_one_transaction_per_account(self, db, engine, branch):
+        alice = add_client(db, branch, "alice@test.local")
+        bob = add_client(db, branch, "bob@test.local")
+        close(db, *open_trades(db, alice, 1, 0.5, 0.25), *open_trades(db, bob, 2))
+
+        assert engine.flush() == 4
+
+        db.expire_all()
+        charges = {t.user_id: t for t in db.query(Transaction).filter(
+            Transaction.transaction_type == TransactionType.COMMISSION)}
+        assert set(charges) == {alice.id, bob.id}
+        assert charges[alice.id].amount == Decimal("8.75")
+        assert charges[alice.id].balance_after == Decimal("991.25")
+        assert db.query(Account).filter(Account.user_id == bob.id).one().balance == Decimal("990.00")
+        assert sorted(t.commission for t in db.query(Trade)) == [Decimal("1.25"), Decimal("2.50"),
+                                                                  Decimal("5.00"), Decimal("10.00")]
+        summary = db.query(AccountMonthlySummary).filter(
+            AccountMonthlySummary.account_id == charges[alice.id].account_id).one()
+        assert summary.commissions == Decimal("8.75")
+
+    def test_trades_are_charged_once(self, db, engine, branch):
+        trades = open_trades(db, add_client(db, branch, "a@test.local"), 1)
+        close(db, *trades)
+        engine.flush()
+
+        engine.record_closes([trades[0].id])
+
+        assert engine.flush() == 0
+        assert db.query(Transaction).count() == 1
+
+    def test_recent_closes_lost_from_the_queue_are_swept(self, db, engine, branch):
+        user = add_client(db, branch, "a@test.local")
+        recent, old = open_trades(db, user, 1, 2)
+        close(db, recent, old)
+        old.updated_at = datetime.now(timezone.utc) - timedelta(hours=25)
+        db.commit()
+        engine._pending.clear()  # queued by a worker that died before its batch
+
+        assert engine.flush() == 1
+
+        db.expire_all()
+        assert (recent.commission, old.commission) == (Decimal("5.00"), Decimal("0.00"))
+
+    def test_trades_inserted_closed_are_swept(self, db, engine, branch):
+        user = add_client(db, branch, "a@test.local")
+        trade = Trade(user_id=user.id, symbol="EURUSD", trade_type=TradeType.BUY, order_type=OrderType.MARKET,
+                      lots=1, open_price=1.1, close_price=1.2, status=TradeStatus.CLOSED,
+                      closed_at=datetime.now(timezone.utc))
+        db.add(trade)
+        db.commit()
+        engine._pending.clear()  # queued by a worker that died before its batch
+        assert trade.updated_at is None
+
+        assert engine.flush() == 1
+
+        db.expire_all()
+        assert trade.commission == Decimal("5.00")
+
+    def test_rates_are_cached_until_changed(self, db, engine, branch):
+        user = add_client(db, branch, "a@test.local")
+        close(db, *open_trades(db, user, 1))
+        engine.flush()
+
+        branch.commission_per_lot = 7
+        db.commit()
+        close(db, *open_trades(db, user, 1))
+        engine.flush()
+        engine.invalidate_rate(branch.id)
+        close(db, *open_trades(db, user, 1))
+        engine.flush()
+
+        amounts = [t.amount for t in db.query(Transaction).order_by(Transaction.id)]
+        assert amounts == [Decimal("5.00"), Decimal("5.00"), Decimal("7.00")]
+
+
+class TestBranchTotals:
+    """Running per-branch totals for the manager dashboard."""
+
+    def test_totals_load_from_trades_then_follow_charges(self, db, engine, branch):
+        user = add_client(db, branch, "a@test.local")
+        close(db, *open_trades(db, user, 1))
+        engine.flush()
+        engine._totals.clear()
+
+        assert engine.branch_totals(db)[branch.id] == (1, Decimal("1.00"), Decimal("5.00"))
+
+        close(db, *open_trades(db, user, 2))
+        engine.flush()
+        assert engine.branch_totals(db)[branch.id] == (2, Decimal("3.00"), Decimal("15.00"))
+
+    def test_dashboard_endpoint(self, client, db, engine, branch, manager):
+        close(db, *open_trades(db, add_client(db, branch, "a@test.local"), 1.5))
+        engine.flush()
+
+        response = client.get("/api/manager/branches/commissions")
+
+        assert response.status_code == 200
+        assert response.json() == [{"branch_id": branch.id, "trades": 1, "lots": 1.5, "commission": 7.5}]
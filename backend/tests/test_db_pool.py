@@ -0,0 +1,56 @@
+"""
+Tests for the instrumented engine factory and the database health endpoint.
+"""
+import pytest
+from sqlalchemy import exc
+
+from app.utils.db_pool import ENGINES, create_pooled_engine, pool_status
+
+
+@pytest.fixture
+def tiny_pool(tmp_path):
+    """A one-connection pool that gives up on checkout after 50 ms."""
+    engine = create_pooled_engine(f"sqlite:///{tmp_path}/pool.db", name="test-tiny", pool_size=1,
+                                  max_overflow=0, pool_timeout=0.05, pool_recycle=120, slow_checkout_ms=1000)
+    yield engine
+    ENGINES.pop("test-tiny", None)
+    engine.dispose()
+
+
+def test_factory_applies_every_pool_setting(tiny_pool):
+    status = pool_status("test-tiny", tiny_pool)
+
+    assert (status["size"], status["max_overflow"]) == (1, 0)
+    assert status["timeout_seconds"] == 0.05
+    assert status["recycle_seconds"] == 120
+
+
+def test_checkout_timeout_is_counted_and_pool_reports_saturation(tiny_pool):
+    with tiny_pool.connect():
+        with pytest.raises(exc.TimeoutError):
+            tiny_pool.connect()
+        status = pool_status("test-tiny", tiny_pool)
+
+    assert status["saturation"] == 1.0
+    assert status["checkout_timeouts"] == 1
+    assert status["checkout_wait_p95_ms"] >= 50
+
+
+def test_slow_checkouts_are_counted(tiny_pool):
+    tiny_pool.pool.slow_checkout_seconds = 0
+    before = pool_status("test-tiny", tiny_pool)["slow_checkouts"]
+
+    with tiny_pool.connect():
+        pass
+
+    assert pool_status("test-tiny", tiny_pool)["slow_checkouts"] == before + 1
+
+
+def test_health_db_reports_primary_pool(client):
+    response = client.get("/health/db")
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["status"] in ("ok", "degraded")
+    assert body["pools"]["primary"]["reachable"] is True
+    assert "saturation" in body["pools"]["primary"]
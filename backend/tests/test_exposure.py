@@ -0,0 +1,164 @@
+"""
+Tests for the dealing desk exposure aggregator and its API.
+"""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+from starlette.websockets import WebSocketDisconnect
+
+from app.config import settings
+from app.models import RoutingRule, Trade
+from app.models.routing_rule import RoutingType
+from app.models.trade import OrderType, TradeStatus, TradeType
+from app.utils.security import create_access_token
+from tests.conftest import assert_max_queries, open_trade
+
+
+@pytest.fixture
+def desk(desk, db):
+    db.add(RoutingRule(name="Gold to the book", symbol="XAUUSD", routing_type=RoutingType.B_BOOK, priority=10))
+    db.commit()
+    return desk
+
+
+def by_symbol(aggregator):
+    return {row["symbol"]: row for row in aggregator.snapshot(["symbol"])}
+
+
+class TestIncrementalExposure:
+    """The book follows committed opens and closes without reading trades."""
+
+    def test_opens_and_closes_update_net_lots_and_notional(self, db, desk, aggregator):
+        branch, user = desk
+        long_eur = open_trade(db, user, "EURUSD", TradeType.BUY, 2, 1.1)
+        open_trade(db, user, "EURUSD", TradeType.SELL, 0.5, 1.2)
+        open_trade(db, user, "XAUUSD", TradeType.BUY, 1, 2000)
+
+        long_eur.status = TradeStatus.CLOSED
+        db.commit()
+
+        assert aggregator.snapshot() == [
+            {"symbol": "EURUSD", "branch_id": branch.id, "routing_type": "a_book", "positions": 1,
+             "long_lots": 0.0, "short_lots": 0.5, "net_lots": -0.5, "notional": -60000.0, "unrealized_pnl": 0.0},
+            {"symbol": "XAUUSD", "branch_id": branch.id, "routing_type": "b_book", "positions": 1,
+             "long_lots": 1.0, "short_lots": 0.0, "net_lots": 1.0, "notional": 200000.0, "unrealized_pnl": 0.0},
+        ]
+
+    def test_rolled_back_open_is_ignored(self, db, desk, aggregator):
+        _, user = desk
+        db.add(Trade(user_id=user.id, symbol="EURUSD", trade_type=TradeType.BUY, order_type=OrderType.MARKET,
+                     lots=1, open_price=1.1, status=TradeStatus.OPEN))
+        db.flush()
+        db.rollback()
+
+        assert aggregator.snapshot() == []
+
+    def test_ticks_revalue_longs_at_bid_and_shorts_at_ask(self, db, db_engine, desk, aggregator):
+        _, user = desk
+        open_trade(db, user, "EURUSD", TradeType.BUY, 1, 1.1)
+        open_trade(db, user, "EURUSD", TradeType.SELL, 2, 1.1)
+
+        with assert_max_queries(db_engine, 0):
+            aggregator.on_tick("EURUSD", 1.1010, 1.1012)
+            rows = by_symbol(aggregator)
+
+        # 100000 * ((1.1010 - 1.1) * 1 + (1.1 - 1.1012) * 2)
+        assert rows["EURUSD"]["unrealized_pnl"] == -140.0
+
+    def test_reload_matches_incremental_book(self, db, desk, aggregator):
+        _, user = desk
+        open_trade(db, user, "EURUSD", TradeType.BUY, 1, 1.1)
+        open_trade(db, user, "XAUUSD", TradeType.SELL, 3, 2000)
+        aggregator.on_tick("XAUUSD", 1990, 1991)
+        incremental = aggregator.snapshot()
+
+        aggregator.reload()
+
+        assert aggregator.snapshot() == incremental
+
+    def test_changes_since_returns_only_moved_buckets(self, db, desk, aggregator):
+        _, user = desk
+        open_trade(db, user, "EURUSD", TradeType.BUY, 1, 1.1)
+        open_trade(db, user, "XAUUSD", TradeType.BUY, 1, 2000)
+        version, _ = aggregator.changes_since(0)
+
+        aggregator.on_tick("XAUUSD", 2001, 2002)
+
+        _, rows = aggregator.changes_since(version)
+        assert [row["symbol"] for row in rows] == ["XAUUSD"]
+
+    def test_reload_zeroes_a_bucket_emptied_by_another_worker(self, db, db_engine, desk, aggregator):
+        _, user = desk
+        trade = open_trade(db, user, "EURUSD", TradeType.BUY, 2, 1.1)
+        version, rows = aggregator.changes_since(0)
+        assert [row["net_lots"] for row in rows] == [2.0]
+
+        # Closed through a plain connection, as another worker would: no session events fire here
+        with db_engine.begin() as conn:
+            conn.execute(update(Trade).where(Trade.id == trade.id).values(status=TradeStatus.CLOSED))
+        aggregator.reload()
+
+        _, rows = aggregator.changes_since(version)
+        assert [(row["symbol"], row["positions"], row["net_lots"], row["notional"]) for row in rows] == [
+            ("EURUSD", 0, 0.0, 0.0)
+        ]
+
+
+class TestExposureApi:
+    def test_snapshot_grouped_by_routing(self, client, db, desk, aggregator, manager):
+        _, user = desk
+        open_trade(db, user, "EURUSD", TradeType.BUY, 1, 1.1)
+        open_trade(db, user, "XAUUSD", TradeType.SELL, 2, 2000)
+
+        response = client.get("/api/manager/exposure", params={"group_by": "routing"})
+
+        assert response.status_code == 200
+        assert [(row["routing_type"], row["net_lots"]) for row in response.json()] == [
+            ("a_book", 1.0), ("b_book", -2.0)]
+        assert "symbol" not in response.json()[0]
+
+    def test_stream_sends_snapshot_then_deltas(self, client, db, desk, aggregator, manager, monkeypatch):
+        monkeypatch.setattr(settings, "EXPOSURE_STREAM_INTERVAL_SECONDS", 0.05)
+        _, user = desk
+        open_trade(db, user, "EURUSD", TradeType.BUY, 1, 1.1)
+        open_trade(db, user, "XAUUSD", TradeType.BUY, 1, 2000)
+        token = create_access_token({"user_id": manager.id})
+
+        with client.websocket_connect("/api/manager/exposure/stream", subprotocols=["bearer", token]) as stream:
+            assert stream.accepted_subprotocol == "bearer"
+            snapshot = stream.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert [row["symbol"] for row in snapshot["rows"]] == ["EURUSD", "XAUUSD"]
+
+            aggregator.on_tick("EURUSD", 1.2, 1.2001)
+            delta = stream.receive_json()
+
+        assert delta["type"] == "delta"
+        assert [(row["symbol"], row["unrealized_pnl"]) for row in delta["rows"]] == [("EURUSD", 10000.0)]
+
+    @pytest.mark.parametrize("manager_token, in_url", [(False, False), (True, True)],
+                             ids=["client token", "token in the url"])
+    def test_stream_requires_a_manager_token_outside_the_url(self, client, desk, manager, manager_token, in_url):
+        _, user = desk
+        token = create_access_token({"user_id": (manager if manager_token else user).id})
+        url = "/api/manager/exposure/stream" + (f"?token={token}" if in_url else "")
+        headers = {} if in_url else {"Authorization": f"Bearer {token}"}
+
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect(url, headers=headers) as stream:
+                stream.receive_json()
+
+        assert closed.value.code == 1008
+
+    def test_stream_closes_when_the_token_expires(self, client, desk, aggregator, manager, monkeypatch):
+        monkeypatch.setattr(settings, "EXPOSURE_STREAM_INTERVAL_SECONDS", 0.05)
+        token = create_access_token({"user_id": manager.id}, expires_delta=timedelta(seconds=1))
+
+        with client.websocket_connect("/api/manager/exposure/stream",
+                                      headers={"Authorization": f"Bearer {token}"}) as stream:
+            assert stream.receive_json()["type"] == "snapshot"
+            with pytest.raises(WebSocketDisconnect) as closed:
+                stream.receive_json()
+
+        assert (closed.value.code, closed.value.reason) == (1008, "Token expired")
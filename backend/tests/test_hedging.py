@@ -0,0 +1,259 @@
+"""
+Tests for automatic B-Book hedging against a local fake liquidity provider.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models import HedgeOrder, HedgeOrderStatus, LiquidityProvider, RoutingRule
+from app.models.liquidity_provider import LPStatus, LPType
+from app.models.routing_rule import RoutingType
+from app.models.trade import TradeType
+from app.services.hedging import HedgeEngine, HedgeFill, HedgeOutcomeUnknown, run_hedging
+from tests.conftest import FakeClock, open_trade
+
+
+class FakeLP:
+    """Fills every order after ``latency`` seconds of clock time, ``slippage`` away from the quote.
+
+    Orders at ``hanging`` providers get no answer; they stay pending until ``settle`` fills them."""
+
+    def __init__(self, aggregator, clock, latency=0.02, slippage=0.0, failing=(), hanging=()):
+        self.aggregator = aggregator
+        self.clock = clock
+        self.latency = latency
+        self.slippage = slippage
+        self.failing = set(failing)
+        self.hanging = set(hanging)
+        self.orders = []
+        self.pending = {}
+        self.fills = {}
+
+    def _fill(self, symbol, side, lots):
+        bid, ask = self.aggregator.price(symbol)
+        return HedgeFill(lots, ask + self.slippage if side == TradeType.BUY else bid - self.slippage)
+
+    async def send_order(self, venue, symbol, side, lots, client_order_id):
+        self.orders.append((venue.code, symbol, side, lots))
+        if venue.code in self.hanging:
+            self.pending[client_order_id] = (symbol, side, lots)
+            await asyncio.sleep(1)
+        if venue.code in self.failing:
+            raise ConnectionError("rejected")
+        self.clock.now += self.latency
+        self.fills[client_order_id] = self._fill(symbol, side, lots)
+        return self.fills[client_order_id]
+
+    async def order_status(self, venue, client_order_id):
+        if client_order_id in self.pending:
+            raise HedgeOutcomeUnknown("pending")
+        return self.fills.get(client_order_id)
+
+    def settle(self):
+        for client_order_id, order in self.pending.items():
+            self.fills[client_order_id] = self._fill(*order)
+        self.pending.clear()
+
+
+@pytest.fixture
+def desk(desk, db):
+    db.add_all([
+        RoutingRule(name="Everything to the book", routing_type=RoutingType.B_BOOK, priority=10,
+                    max_slippage_pips=1.0),
+        LiquidityProvider(name="Prime", code="PRIME", lp_type=LPType.PRIME_BROKER, priority=1),
+        LiquidityProvider(name="ECN", code="ECN", lp_type=LPType.ECN, priority=5, supported_symbols="EURUSD"),
+        LiquidityProvider(name="Backup", code="BACKUP", lp_type=LPType.ECN, priority=5, success_rate=80.0),
+        LiquidityProvider(name="Down", code="DOWN", lp_type=LPType.ECN, priority=0, status=LPStatus.MAINTENANCE),
+    ])
+    db.commit()
+    return desk
+
+
+@pytest.fixture
+def trader(desk):
+    return desk[1]
+
+
+@pytest.fixture
+def aggregator(aggregator):
+    aggregator.on_tick("EURUSD", 1.1000, 1.1002)
+    aggregator.on_tick("XAUUSD", 2000.0, 2000.5)
+    return aggregator
+
+
+@pytest.fixture
+def hedging(db_engine, aggregator):
+    def build(**lp):
+        clock = FakeClock()
+        lp = FakeLP(aggregator, clock, **lp)
+        engine = HedgeEngine(lp, aggregator, sessionmaker(bind=db_engine), threshold_lots=1.0,
+                             order_timeout=0.05, clock=clock)
+        return engine, lp
+    return build
+
+
+def lp_ids(db):
+    return {lp.code: lp.id for lp in db.query(LiquidityProvider)}
+
+
+class TestRebalance:
+    @pytest.mark.asyncio
+    async def test_small_trades_are_netted_into_one_order_once_over_threshold(self, db, trader, aggregator, hedging):
+        engine, lp = hedging()
+        open_trade(db, trader, "EURUSD", TradeType.BUY, 0.6)
+        assert await engine.rebalance() == []
+
+        open_trade(db, trader, "EURUSD", TradeType.BUY, 0.7)
+        open_trade(db, trader, "EURUSD", TradeType.SELL, 0.2)
+        open_trade(db, trader, "XAUUSD", TradeType.SELL, 2)
+        await engine.rebalance()
+
+        assert lp.orders == [("PRIME", "EURUSD", TradeType.BUY, 1.1), ("PRIME", "XAUUSD", TradeType.SELL, 2.0)]
+        assert engine.unhedged() == {"EURUSD": 0.0, "XAUUSD": 0.0}
+
+    @pytest.mark.asyncio
+    async def test_hedged_position_survives_a_restart(self, db, db_engine, trader, aggregator, hedging):
+        engine, _ = hedging()
+        open_trade(db, trader, "EURUSD", TradeType.SELL, 3)
+        await engine.rebalance()
+
+        restarted, lp = hedging()
+        await restarted.rebalance()
+
+        assert restarted.hedged() == {"EURUSD": -3.0}
+        assert lp.orders == []
+
+    @pytest.mark.asyncio
+    async def test_a_book_exposure_is_not_hedged(self, db, trader, aggregator, hedging):
+        db.add(RoutingRule(name="Gold to LPs", symbol="XAUUSD", routing_type=RoutingType.A_BOOK, priority=1))
+        db.commit()
+        aggregator.reload()
+        engine, lp = hedging()
+        open_trade(db, trader, "XAUUSD", TradeType.BUY, 5)
+
+        await engine.rebalance()
+
+        assert lp.orders == []
+
+
+    @pytest.mark.asyncio
+    async def test_stopping_the_loop_lets_the_running_rebalance_record_its_orders(self, db, trader, hedging):
+        engine, lp = hedging(failing={"PRIME"}, latency=0)
+        open_trade(db, trader, "EURUSD", TradeType.BUY, 1)
+        loop = asyncio.create_task(run_hedging(engine, 0))
+        while not lp.orders:
+            await asyncio.sleep(0.001)
+
+        loop.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await loop
+
+        assert [order.status for order in db.query(HedgeOrder).order_by(HedgeOrder.id)] == [
+            HedgeOrderStatus.FAILED, HedgeOrderStatus.FILLED]
+
+
+class TestVenueSelection:
+    @pytest.mark.asyncio
+    async def test_fails_over_by_priority_then_health(self, db, trader, hedging):
+        engine, lp = hedging(failing={"PRIME"})
+        open_trade(db, trader, "XAUUSD", TradeType.BUY, 1)
+        open_trade(db, trader, "EURUSD", TradeType.BUY, 1)
+
+        await engine.rebalance()
+
+        # ECN only quotes EURUSD; it and BACKUP share a priority, so the healthier ECN goes first
+        assert lp.orders == [
+            ("PRIME", "EURUSD", TradeType.BUY, 1.0), ("PRIME", "XAUUSD", TradeType.BUY, 1.0),
+            ("ECN", "EURUSD", TradeType.BUY, 1.0), ("BACKUP", "XAUUSD", TradeType.BUY, 1.0),
+        ]
+        ids = lp_ids(db)
+        assert sorted((o.lp_id, o.symbol, o.status) for o in db.query(HedgeOrder)) == sorted([
+            (ids["PRIME"], "EURUSD", HedgeOrderStatus.FAILED), (ids["PRIME"], "XAUUSD", HedgeOrderStatus.FAILED),
+            (ids["ECN"], "EURUSD", HedgeOrderStatus.FILLED), (ids["BACKUP"], "XAUUSD", HedgeOrderStatus.FILLED),
+        ])
+        prime = db.get(LiquidityProvider, ids["PRIME"])
+        assert prime.success_rate == pytest.approx(64.0)  # two failures at 20% weight each
+
+    @pytest.mark.asyncio
+    async def test_timed_out_order_holds_the_symbol_until_the_provider_reports_a_late_fill(self, db, trader, hedging):
+        engine, lp = hedging(hanging={"PRIME"})
+        open_trade(db, trader, "EURUSD", TradeType.BUY, 1)
+
+        await engine.rebalance()
+        order = db.query(HedgeOrder).one()
+        assert (order.status, order.error) == (HedgeOrderStatus.UNKNOWN, "TimeoutError")
+
+        # Still pending at the provider: nothing is sent elsewhere, however large the exposure grows
+        open_trade(db, trader, "EURUSD", TradeType.BUY, 2)
+        await engine.rebalance()
+        assert lp.orders == [("PRIME", "EURUSD", TradeType.BUY, 1.0)]
+
+        lp.settle()
+        lp.hanging.clear()
+        await engine.rebalance()
+        db.expire_all()
+
+        assert (order.status, float(order.filled_lots), float(order.fill_price)) == (
+            HedgeOrderStatus.FILLED, 1.0, 1.1002)
+        assert lp.orders[1:] == [("PRIME", "EURUSD", TradeType.BUY, 2.0)]
+        assert engine.hedged() == {"EURUSD": 3.0}
+
+    @pytest.mark.asyncio
+    async def test_order_the_provider_never_executed_is_sent_again(self, db, trader, hedging):
+        engine, lp = hedging(hanging={"PRIME"})
+        open_trade(db, trader, "EURUSD", TradeType.BUY, 1)
+        await engine.rebalance()
+
+        lp.pending.clear()
+        lp.hanging.clear()
+        restarted, _ = hedging()
+        restarted.gateway = lp
+        await restarted.rebalance()
+
+        assert [o.status for o in db.query(HedgeOrder).order_by(HedgeOrder.id)] == [
+            HedgeOrderStatus.FAILED, HedgeOrderStatus.FILLED]
+        assert restarted.hedged() == {"EURUSD": 1.0}
+
+    @pytest.mark.asyncio
+    async def test_order_is_capped_at_the_provider_maximum(self, db, trader, hedging):
+        db.query(LiquidityProvider).filter_by(code="PRIME").update({"max_lot_size": 2.0})
+        db.commit()
+        engine, lp = hedging()
+        open_trade(db, trader, "EURUSD", TradeType.BUY, 5)
+
+        await engine.rebalance()
+        await engine.rebalance()
+
+        assert [lots for *_, lots in lp.orders] == [2.0, 2.0]
+        assert engine.unhedged() == {"EURUSD": 1.0}
+
+
+class TestExecutionQuality:
+    @pytest.mark.asyncio
+    async def test_latency_and_slippage_against_the_routing_rule(self, db, trader, hedging):
+        engine, _ = hedging(latency=0.04, slippage=0.00015)
+        open_trade(db, trader, "EURUSD", TradeType.SELL, 1)
+
+        attempts = await engine.rebalance()
+
+        order = db.query(HedgeOrder).one()
+        assert (order.side, order.status) == (TradeType.SELL, HedgeOrderStatus.FILLED)
+        assert float(order.requested_price) == 1.1
+        assert float(order.fill_price) == pytest.approx(1.09985)
+        assert (order.slippage_pips, order.max_slippage_pips) == (1.5, 1.0)
+        assert order.latency_ms == pytest.approx(40.0)
+        assert attempts[0].slippage_pips > attempts[0].max_slippage_pips
+
+        prime = db.get(LiquidityProvider, lp_ids(db)["PRIME"])
+        assert (prime.avg_latency_ms, prime.success_rate) == (pytest.approx(8.0), pytest.approx(100.0))
+
+    @pytest.mark.asyncio
+    async def test_price_improvement_is_negative_slippage_in_symbol_pips(self, db, trader, hedging):
+        engine, _ = hedging(slippage=-0.25)
+        open_trade(db, trader, "XAUUSD", TradeType.BUY, 1)
+
+        await engine.rebalance()
+
+        order = db.query(HedgeOrder).one()
+        assert order.slippage_pips == -25.0
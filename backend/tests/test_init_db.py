@@ -0,0 +1,91 @@
+"""
+Tests for bulk seeding in init_db.
+"""
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.init_db import migrate, seed_database
+from app.models import Account, AccountMonthlySummary, ProductSpread, Trade, Transaction, User
+from app.models.trade import TradeType
+from app.services.statements import rebuild_monthly_summaries
+from app.services.swaps import swap_rates
+
+SIZES = dict(branches=2, users=20, trades=100, transactions=150, random_seed=7)
+
+
+def test_seed_is_deterministic_and_consistent(db_engine):
+    counts = seed_database(db_engine, reset=True, **SIZES)
+
+    with db_engine.connect() as conn:
+        first = conn.execute(select(Trade.symbol, Trade.open_price, Trade.opened_at).order_by(Trade.id)).all()
+        assert conn.execute(select(func.count()).select_from(User)).scalar() == counts["users"]
+        assert conn.execute(select(func.count()).select_from(Transaction)).scalar() == 150
+        # Every account's balance matches the last balance_after in its ledger
+        last = conn.execute(
+            select(Transaction.account_id, Transaction.balance_after)
+            .order_by(Transaction.account_id, Transaction.id)
+        ).all()
+        final = dict(last)
+        for account_id, balance in conn.execute(select(Account.id, Account.balance)):
+            assert float(balance) == float(final.get(account_id, 0))
+
+    seed_database(db_engine, reset=True, **SIZES)
+    with db_engine.connect() as conn:
+        assert conn.execute(
+            select(Trade.symbol, Trade.open_price, Trade.opened_at).order_by(Trade.id)
+        ).all() == first
+
+
+def test_seeded_summaries_match_a_rebuild(db_engine):
+    seed_database(db_engine, reset=True, **SIZES)
+    columns = (AccountMonthlySummary.account_id, AccountMonthlySummary.month,
+               AccountMonthlySummary.opening_balance, AccountMonthlySummary.closing_balance,
+               AccountMonthlySummary.deposits, AccountMonthlySummary.withdrawals,
+               AccountMonthlySummary.transaction_count)
+    query = select(*columns).order_by(AccountMonthlySummary.account_id, AccountMonthlySummary.month)
+
+    with Session(db_engine) as db:
+        seeded = db.execute(query).all()
+        rebuild_monthly_summaries(db)
+        assert db.execute(query).all() == seeded
+
+
+def test_seeded_spreads_have_swap_rates(db_engine):
+    seed_database(db_engine, reset=True, **SIZES)
+
+    with db_engine.connect() as conn:
+        swaps = conn.execute(select(ProductSpread.symbol, ProductSpread.swap_long, ProductSpread.swap_short)).all()
+
+    assert all(swap_long is not None and swap_short is not None for _, swap_long, swap_short in swaps)
+    assert any(swap_long != 0 for _, swap_long, _ in swaps)
+
+
+def test_seed_refuses_to_overwrite_existing_data(db_engine):
+    seed_database(db_engine, reset=True, **SIZES)
+
+    with pytest.raises(RuntimeError):
+        seed_database(db_engine, **SIZES)
+
+
+def test_migrate_upgrades_a_database_created_before_swap_rates():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        # product_spreads as the first release created it
+        conn.execute(text(
+            "CREATE TABLE product_spreads (id INTEGER PRIMARY KEY, symbol VARCHAR NOT NULL UNIQUE, "
+            "name VARCHAR NOT NULL, base_spread NUMERIC(10, 5), extra_spread NUMERIC(10, 5), category VARCHAR, "
+            "is_active BOOLEAN, created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME)"
+        ))
+        conn.execute(text("INSERT INTO product_spreads (symbol, name, category) VALUES ('EURUSD', 'Euro', 'forex')"))
+
+    assert migrate(engine) == [
+        "column product_spreads.swap_long", "column product_spreads.swap_short",
+        "index ix_product_spreads_id", "index ix_product_spreads_symbol",
+    ]
+    assert migrate(engine) == []
+
+    with Session(engine) as db:
+        rates = swap_rates(db)
+    assert (rates[TradeType.BUY]["EURUSD"], rates[TradeType.SELL]["EURUSD"]) == (0, 0)
@@ -0,0 +1,48 @@
+"""
+Tests for the queued, structured logging pipeline.
+"""
+import json
+import logging
+import queue
+
+from app.utils.logging import JSONFormatter, NonBlockingQueueHandler, SamplingFilter
+from app.utils.metrics import LOG_RECORDS_DROPPED
+
+
+def make_record(msg, *args, level=logging.INFO, **extra):
+    record = logging.LogRecord("api", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    record = make_record("API - %s %s", "GET", "/health", user_id=7, details=None)
+
+    payload = json.loads(JSONFormatter().format(record))
+
+    assert payload["message"] == "API - GET /health"
+    assert payload["level"] == "INFO"
+    assert payload["user_id"] == 7
+    assert "details" not in payload
+
+
+def test_sampling_filter_keeps_warnings():
+    sampler = SamplingFilter(0.0)
+
+    assert not sampler.filter(make_record("ok"))
+    assert sampler.filter(make_record("bad", level=logging.WARNING))
+
+
+def test_queue_handler_defers_formatting_and_never_blocks():
+    class Unformattable:
+        def __str__(self):
+            raise AssertionError("formatted on the calling thread")
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    dropped = LOG_RECORDS_DROPPED.labels().value
+
+    handler.handle(make_record("value %s", Unformattable()))
+    handler.handle(make_record("overflow"))
+
+    assert handler.queue.qsize() == 1
+    assert LOG_RECORDS_DROPPED.labels().value == dropped + 1
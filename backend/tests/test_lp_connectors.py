@@ -0,0 +1,259 @@
+"""
+Tests for the liquidity provider connectors, against the simulated LP and scripted market data feeds.
+"""
+import asyncio
+
+import httpx
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.models import LiquidityProvider, ProductSpread
+from app.models.liquidity_provider import LPType
+from app.models.trade import TradeType
+from app.services.hedging import HedgeFill, HedgeOutcomeUnknown, Venue
+from app.services.lp_connectors import CONNECTORS, LPConnector, LPError, LPGateway, backoff_delay
+from benchmarks.lp_simulator import create_simulator
+
+
+async def until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.001)
+
+
+def quote(symbol, bid, ask):
+    return orjson.dumps([{"symbol": symbol, "bid": bid, "ask": ask}])
+
+
+class FakeFeed:
+    """A market data endpoint: refuses ``refuse`` connections, then serves what is put on ``queue`` (None closes)."""
+
+    def __init__(self, refuse=0):
+        self.refuse = refuse
+        self.queue = asyncio.Queue()
+        self.subscriptions = []
+
+    def __call__(self, url):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, feed):
+        self.feed = feed
+
+    async def __aenter__(self):
+        if self.feed.refuse:
+            self.feed.refuse -= 1
+            raise OSError("connection refused")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def send(self, message):
+        self.feed.subscriptions.append(orjson.loads(message))
+
+    async def __aiter__(self):
+        while (message := await self.feed.queue.get()) is not None:
+            yield message
+
+
+class Book:
+    def __init__(self):
+        self.ticks = []
+
+    def on_tick(self, symbol, bid, ask):
+        self.ticks.append((symbol, bid, ask))
+
+
+def connector(simulator, **options):
+    return LPConnector("SIM", "http://lp.test", api_key="secret",
+                       transport=httpx.ASGITransport(app=simulator), **options)
+
+
+class TestOrders:
+    @pytest.mark.asyncio
+    async def test_fill_at_the_simulated_quote(self):
+        simulator = create_simulator(api_key="secret")
+        _, ask = simulator.state.simulator.quote("EURUSD")
+
+        fill = await connector(simulator).send_order("EURUSD", TradeType.BUY, 2.5, "o1")
+
+        assert fill == HedgeFill(2.5, ask)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("options, key, error", [
+        ({"failure_rate": 1.0}, "secret", "Service unavailable"),
+        ({"reject_rate": 1.0}, "secret", "No liquidity"),
+        ({}, "wrong", "Invalid API key"),
+    ])
+    async def test_failures_and_rejections_raise(self, options, key, error):
+        simulator = create_simulator(api_key="secret", **options)
+        lp = LPConnector("SIM", "http://lp.test", api_key=key, transport=httpx.ASGITransport(app=simulator))
+
+        with pytest.raises(LPError, match=error):
+            await lp.send_order("EURUSD", TradeType.SELL, 1, "o1")
+
+    @pytest.mark.asyncio
+    async def test_unreachable_provider_raises(self):
+        lp = LPConnector("DOWN", "http://127.0.0.1:1", timeout=1)
+
+        with pytest.raises(LPError):
+            await lp.send_order("EURUSD", TradeType.BUY, 1, "o1")
+
+    @pytest.mark.asyncio
+    async def test_orders_beyond_the_concurrency_limit_wait_for_a_slot(self):
+        simulator = create_simulator(api_key="secret", latency_ms=(20, 20))
+        lp = connector(simulator, max_concurrency=2)
+
+        fills = await asyncio.gather(*(lp.send_order("EURUSD", TradeType.BUY, 1, f"o{n}") for n in range(6)))
+
+        assert len(fills) == 6
+        assert simulator.state.simulator.peak_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_a_retried_order_is_executed_once(self):
+        simulator = create_simulator(api_key="secret", slippage=0.001, seed=1)
+        lp = connector(simulator)
+
+        first = await lp.send_order("EURUSD", TradeType.BUY, 1, "o1")
+        retry = await lp.send_order("EURUSD", TradeType.BUY, 1, "o1")
+
+        assert retry == first
+        assert (simulator.state.simulator.orders, simulator.state.simulator.duplicates) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_order_given_up_on_is_reported_by_its_status(self):
+        simulator = create_simulator(api_key="secret", latency_ms=(50, 50))
+        lp = connector(simulator)
+        _, ask = simulator.state.simulator.quote("EURUSD")
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(lp.send_order("EURUSD", TradeType.BUY, 1, "late"), 0.01)
+        with pytest.raises(HedgeOutcomeUnknown, match="pending"):
+            await lp.order_status("late")
+        await until(lambda: simulator.state.simulator.fills == 1)
+
+        assert await lp.order_status("late") == HedgeFill(1, ask)
+        assert await lp.order_status("never-sent") is None
+
+    @pytest.mark.asyncio
+    async def test_order_without_an_answer_has_an_unknown_outcome(self):
+        def handler(request):
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        lp = LPConnector("SIM", "http://lp.test", transport=httpx.MockTransport(handler))
+
+        with pytest.raises(HedgeOutcomeUnknown, match="timed out"):
+            await lp.send_order("EURUSD", TradeType.BUY, 1, "o1")
+
+
+class TestMarketData:
+    def test_backoff_doubles_up_to_the_maximum_with_jitter(self):
+        assert [backoff_delay(n, 0.5, 4, rng=lambda: 1.0) for n in range(5)] == [0.5, 1, 2, 4, 4]
+        assert backoff_delay(3, 0.5, 4, rng=lambda: 0.0) == 2
+
+    @pytest.mark.asyncio
+    async def test_reconnects_after_refusals_and_drops(self):
+        feed = FakeFeed(refuse=2)
+        lp = LPConnector("SIM", None, api_key="secret", websocket_url="ws://lp.test/quotes",
+                         reconnect_min=0.001, connect=feed)
+        quotes = []
+        stream = asyncio.create_task(lp.stream_quotes(["EURUSD"], lambda *q: quotes.append(q)))
+
+        await until(lambda: lp.connected)
+        await feed.queue.put(quote("EURUSD", 1.1, 1.1002))
+        await feed.queue.put(None)
+        await until(lambda: len(feed.subscriptions) == 2 and lp.connected)
+        await feed.queue.put(quote("EURUSD", 1.2, 1.2002))
+        await until(lambda: len(quotes) == 2)
+        stream.cancel()
+        await asyncio.gather(stream, return_exceptions=True)
+
+        assert quotes == [("EURUSD", 1.1, 1.1002), ("EURUSD", 1.2, 1.2002)]
+        assert feed.subscriptions[0] == {"action": "subscribe", "api_key": "secret", "symbols": ["EURUSD"]}
+        assert not lp.connected
+
+    def test_simulator_streams_subscribed_symbols(self):
+        simulator = create_simulator(api_key="secret", tick_interval=0.01)
+
+        with TestClient(simulator).websocket_connect("/quotes") as ws:
+            ws.send_json({"action": "subscribe", "api_key": "secret", "symbols": ["EURUSD", "XAUUSD"]})
+            quotes = ws.receive_json()
+
+        assert [q["symbol"] for q in quotes] == ["EURUSD", "XAUUSD"]
+        assert all(q["bid"] < q["ask"] for q in quotes)
+
+
+class TestGateway:
+    @pytest.fixture
+    def providers(self, db):
+        db.add_all([
+            ProductSpread(symbol="EURUSD", name="Euro"),
+            ProductSpread(symbol="XAUUSD", name="Gold", category="commodity"),
+            LiquidityProvider(name="Prime", code="PRIME", lp_type=LPType.PRIME_BROKER, priority=1,
+                              api_endpoint="http://prime.test", websocket_url="ws://prime", supported_symbols="EURUSD"),
+            LiquidityProvider(name="Backup", code="BACKUP", lp_type=LPType.ECN, priority=2,
+                              api_endpoint="http://backup.test", websocket_url="ws://backup"),
+            LiquidityProvider(name="Orders only", code="ORDERS", lp_type=LPType.ECN, priority=3,
+                              api_endpoint="http://orders.test"),
+        ])
+        db.commit()
+        return {lp.code: lp.id for lp in db.query(LiquidityProvider)}
+
+    @pytest.mark.asyncio
+    async def test_quotes_come_from_the_best_connected_provider(self, db_engine, providers):
+        feeds = {"ws://prime": FakeFeed(), "ws://backup": FakeFeed()}
+        prime, backup = feeds.values()
+        book = Book()
+        gateway = LPGateway(sessionmaker(bind=db_engine), book, connect=lambda url: feeds[url](url),
+                            reconnect_min=0.001)
+        await gateway.start()
+        connectors = gateway.connectors
+
+        await until(lambda: connectors[providers["PRIME"]].connected and connectors[providers["BACKUP"]].connected)
+        await backup.queue.put(quote("EURUSD", 1.3, 1.3002))
+        await backup.queue.put(quote("XAUUSD", 2000.0, 2000.5))
+        await prime.queue.put(quote("EURUSD", 1.1, 1.1002))
+        await until(lambda: len(book.ticks) == 2)
+
+        prime.refuse = 1000
+        await prime.queue.put(None)
+        await until(lambda: not connectors[providers["PRIME"]].connected)
+        await backup.queue.put(quote("EURUSD", 1.2, 1.2002))
+        await until(lambda: len(book.ticks) == 3)
+        await gateway.close()
+
+        assert sorted(book.ticks[:2]) == [("EURUSD", 1.1, 1.1002), ("XAUUSD", 2000.0, 2000.5)]
+        assert book.ticks[2] == ("EURUSD", 1.2, 1.2002)
+        assert (prime.subscriptions[0]["symbols"], backup.subscriptions[0]["symbols"]) == (
+            ["EURUSD"], ["EURUSD", "XAUUSD"])
+
+    @pytest.mark.asyncio
+    async def test_orders_go_through_the_registered_connector(self, db_engine, providers, monkeypatch):
+        class ECNConnector(LPConnector):
+            def order_request(self, symbol, side, lots, client_order_id):
+                request = super().order_request(symbol, side, lots, client_order_id)
+                request["json"]["lots"] = lots * 2  # quotes in half lots
+                return request
+
+        monkeypatch.setitem(CONNECTORS, LPType.ECN, ECNConnector)
+        simulator = create_simulator()
+        gateway = LPGateway(sessionmaker(bind=db_engine), Book(), transport=httpx.ASGITransport(app=simulator),
+                            connect=FakeFeed())
+        await gateway.start()
+        connector_types = {lp_id: type(connector) for lp_id, connector in gateway.connectors.items()}
+
+        fill = await gateway.send_order(Venue(providers["ORDERS"], "ORDERS", 3, 0.01, 100, None, 0, 100),
+                                        "EURUSD", TradeType.SELL, 1.5, "o1")
+        with pytest.raises(LPError, match="Not connected to GONE"):
+            await gateway.send_order(Venue(999, "GONE", 1, 0.01, 100, None, 0, 100), "EURUSD", TradeType.SELL, 1,
+                                     "o2")
+        await gateway.close()
+
+        assert (connector_types[providers["PRIME"]], connector_types[providers["ORDERS"]]) == (
+            LPConnector, ECNConnector)
+        assert fill.lots == 3.0
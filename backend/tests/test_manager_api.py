@@ -0,0 +1,201 @@
+"""
+Tests for manager configuration endpoints.
+"""
+import pytest
+
+from app.models import RoutingRule, RoutingType
+
+
+class TestPagination:
+    """Keyset pagination, filters and sparse fields on list endpoints."""
+
+    def test_pages_follow_cursor_until_exhausted(self, client, manager, spreads):
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 4}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/manager/spreads", params=params)
+            assert response.status_code == 200
+            seen.extend(item["symbol"] for item in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert seen == spreads
+
+    def test_filters_and_sparse_fields(self, client, manager, spreads):
+        response = client.get("/api/manager/spreads", params={"category": "crypto", "fields": "symbol,category"})
+
+        assert response.json() == [{"symbol": "BTCUSD", "category": "crypto"}]
+
+    def test_unknown_field_is_rejected(self, client, manager, spreads):
+        response = client.get("/api/manager/spreads", params={"fields": "symbol,hashed_password"})
+
+        assert response.status_code == 400
+
+    def test_invalid_cursor_is_rejected(self, client, manager, spreads):
+        response = client.get("/api/manager/spreads", params={"cursor": "not-a-cursor"})
+
+        assert response.status_code == 400
+
+    def test_routing_rules_keep_priority_order(self, client, db, manager):
+        for priority in (30, 10, 20, 10):
+            db.add(RoutingRule(name=f"rule-{priority}", routing_type=RoutingType.A_BOOK, priority=priority))
+        db.commit()
+
+        first = client.get("/api/manager/routing-rules", params={"limit": 2})
+        second = client.get("/api/manager/routing-rules",
+                            params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+
+        priorities = [rule["priority"] for rule in first.json() + second.json()]
+        assert priorities == [10, 10, 20, 30]
+        assert "X-Next-Cursor" not in second.headers
+
+
+    def test_trusted_projection_matches_validated_output(self, db):
+        import orjson
+        from app.schemas.manager import RoutingRuleResponse
+        from app.utils.pagination import PageParams, page_payload, projection_query
+
+        db.add(RoutingRule(name="gold", symbol="XAUUSD", routing_type=RoutingType.HYBRID,
+                           a_book_percentage=62.5, min_lot_size=0.1, priority=5))
+        db.commit()
+        page = PageParams(cursor=None, limit=10, fields=None)
+        sort = [RoutingRule.priority, RoutingRule.id]
+
+        validated, _ = page_payload(db.query(RoutingRule).all(), None, RoutingRuleResponse, page)
+        rows = projection_query(db, RoutingRule, RoutingRuleResponse, page, sort).all()
+        projected, _ = page_payload(rows, None, RoutingRuleResponse, page, trusted=True)
+
+        assert orjson.loads(orjson.dumps(projected, option=orjson.OPT_UTC_Z)) == validated
+
+
+class TestConditionalGet:
+    """ETag revalidation for configuration lists."""
+
+    def test_matching_etag_returns_304(self, client, manager, spreads):
+        first = client.get("/api/manager/spreads")
+        etag = first.headers["ETag"]
+
+        second = client.get("/api/manager/spreads", headers={"If-None-Match": etag})
+
+        assert second.status_code == 304
+        assert second.headers["ETag"] == etag
+
+    def test_cached_page_reads_only_the_table_state(self, client, manager, spreads, db_engine):
+        from sqlalchemy import event
+
+        client.get("/api/manager/spreads")
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_engine, "before_cursor_execute", listener)
+        try:
+            client.get("/api/manager/spreads")
+        finally:
+            event.remove(db_engine, "before_cursor_execute", listener)
+
+        reads = [statement for statement in statements if "product_spreads" in statement]
+        assert len(reads) == 1 and "count(*)" in reads[0]
+
+    def test_write_in_another_worker_changes_etag(self, client, manager, spreads, db_engine):
+        from sqlalchemy import insert
+        from app.models import ProductSpread
+
+        etag = client.get("/api/manager/spreads").headers["ETag"]
+        # Written through a plain connection, as another worker would: no session events fire here
+        with db_engine.begin() as conn:
+            conn.execute(insert(ProductSpread).values(symbol="EURGBP", name="Euro / British Pound",
+                                                      category="forex"))
+
+        response = client.get("/api/manager/spreads", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert "EURGBP" in [item["symbol"] for item in response.json()]
+
+    def test_write_changes_etag(self, client, manager, spreads):
+        etag = client.get("/api/manager/spreads").headers["ETag"]
+
+        client.put("/api/manager/spreads/EURUSD", json={"extra_spread": 2.5})
+        response = client.get("/api/manager/spreads", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        eurusd = next(item for item in response.json() if item["symbol"] == "EURUSD")
+        assert eurusd["extra_spread"] == 2.5
+
+
+class TestBulkUpsert:
+    """Bulk upsert endpoints apply a batch in one transaction."""
+
+    def test_spreads_bulk_creates_and_updates(self, client, manager, spreads):
+        etag = client.get("/api/manager/spreads").headers["ETag"]
+        response = client.post("/api/manager/spreads/bulk", json={"items": [
+            {"symbol": "eurusd", "name": "Euro", "extra_spread": 0.9},
+            {"symbol": "NZDUSD", "name": "Kiwi", "base_spread": 1.4},
+            {"symbol": "NZDUSD", "name": "Kiwi again"},
+        ]})
+
+        body = response.json()
+        assert response.status_code == 200
+        assert (body["created"], body["updated"], body["failed"]) == (1, 1, 1)
+        assert [r["status"] for r in body["results"]] == ["updated", "created", "error"]
+        assert all(r["id"] for r in body["results"][:2])
+
+        listing = client.get("/api/manager/spreads", headers={"If-None-Match": etag})
+        assert listing.status_code == 200
+        by_symbol = {item["symbol"]: item for item in listing.json()}
+        assert by_symbol["EURUSD"]["extra_spread"] == 0.9
+        assert by_symbol["NZDUSD"]["base_spread"] == 1.4
+
+    def test_liquidity_providers_bulk_upserts_by_code(self, client, manager):
+        items = [
+            {"name": "Prime One", "code": "P1", "lp_type": "prime_broker"},
+            {"name": "ECN Two", "code": "E2", "lp_type": "ecn", "priority": 5},
+        ]
+        client.post("/api/manager/liquidity-providers/bulk", json={"items": items})
+        items[1]["priority"] = 1
+        response = client.post("/api/manager/liquidity-providers/bulk", json={"items": items})
+
+        assert response.json()["updated"] == 2
+        listing = client.get("/api/manager/liquidity-providers").json()
+        assert [lp["code"] for lp in listing] == ["E2", "P1"]
+
+    def test_routing_rules_bulk_reports_unknown_ids(self, client, manager):
+        created = client.post("/api/manager/routing-rules/bulk", json={"items": [
+            {"name": "EUR A-Book", "symbol": "EURUSD", "priority": 10},
+            {"name": "Gold B-Book", "symbol": "XAUUSD", "routing_type": "b_book", "priority": 20},
+        ]}).json()
+        first_id = created["results"][0]["id"]
+
+        response = client.post("/api/manager/routing-rules/bulk", json={"items": [
+            {"id": first_id, "name": "EUR A-Book", "symbol": "EURUSD", "priority": 5},
+            {"id": 9999, "name": "Missing"},
+        ]}).json()
+
+        assert [r["status"] for r in response["results"]] == ["updated", "error"]
+        rules = client.get("/api/manager/routing-rules").json()
+        assert rules[0]["id"] == first_id and rules[0]["priority"] == 5
+
+    def test_routing_rules_bulk_reports_unknown_liquidity_providers(self, client, manager):
+        lp = client.post("/api/manager/liquidity-providers/bulk", json={"items": [
+            {"name": "Prime One", "code": "P1", "lp_type": "prime_broker"},
+        ]}).json()["results"][0]
+        created = client.post("/api/manager/routing-rules/bulk", json={"items": [
+            {"name": "EUR A-Book", "symbol": "EURUSD", "priority": 10},
+        ]}).json()
+
+        response = client.post("/api/manager/routing-rules/bulk", json={"items": [
+            {"id": created["results"][0]["id"], "name": "EUR A-Book", "lp_id": 9999},
+            {"name": "Gold to P1", "symbol": "XAUUSD", "lp_id": lp["id"]},
+            {"name": "Gold backup", "symbol": "XAUUSD", "lp_id": lp["id"], "backup_lp_id": 9998},
+        ]})
+
+        assert response.status_code == 200
+        assert [(r["status"], r["detail"]) for r in response.json()["results"]] == [
+            ("error", "Liquidity provider with ID 9999 not found"),
+            ("created", None),
+            ("error", "Liquidity provider with ID 9998 not found"),
+        ]
+        assert len(client.get("/api/manager/routing-rules").json()) == 2
@@ -0,0 +1,50 @@
+"""
+Tests for the Prometheus metrics endpoint and its recording overhead.
+"""
+from time import perf_counter
+
+from app.utils.metrics import Counter, Histogram, REGISTRY
+
+
+def test_metrics_expose_route_template_latency(client):
+    client.get("/health")
+    client.get("/api/accounts/12345/balance-history")
+
+    body = client.get("/metrics").text
+
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/health",status="200",le="+Inf"}' in body
+    assert 'route="/api/accounts/{account_id}/balance-history"' in body
+    assert "/api/accounts/12345" not in body
+    assert "db_pool_checked_out" in body
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_cumulative_seconds", "test", buckets=(0.1, 1.0))
+    try:
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+        lines = histogram.render()
+    finally:
+        REGISTRY.remove(histogram)
+
+    assert 'test_cumulative_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_cumulative_seconds_bucket{le="1"} 2' in lines
+    assert 'test_cumulative_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_cumulative_seconds_count 3" in lines
+
+
+def test_recording_overhead_stays_under_10_microseconds():
+    histogram = Histogram("test_overhead_seconds", "test", ["method", "route", "status"])
+    counter = Counter("test_overhead_total", "test", ["method", "route", "status"])
+    iterations = 20000
+    try:
+        start = perf_counter()
+        for _ in range(iterations):
+            histogram.labels("GET", "/api/manager/spreads", "200").observe(0.0123)
+            counter.labels("GET", "/api/manager/spreads", "200").inc()
+        per_request = (perf_counter() - start) / iterations
+    finally:
+        REGISTRY.remove(histogram)
+        REGISTRY.remove(counter)
+
+    assert per_request < 10e-6
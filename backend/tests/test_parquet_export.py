@@ -0,0 +1,95 @@
+"""
+Tests for the Parquet export of trade and transaction history.
+"""
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import Account, Trade, Transaction, TransactionType, User, UserRole
+from app.models.trade import OrderType, TradeStatus, TradeType
+from app.services.parquet_export import export_history, export_partition, partition_path, partitions
+
+
+def add_history(db):
+    user = User(email="quant@test.local", hashed_password="x", name="Quant", role=UserRole.CLIENT,
+                is_active=True, is_verified=True)
+    db.add(user)
+    db.flush()
+    account = Account(user_id=user.id, account_number="ACC-1", balance=1000, wallet_balance=1000)
+    db.add(account)
+    db.flush()
+    for symbol, lots, opened_at in [("EURUSD", 1, datetime(2025, 3, 14, 9, 0)),
+                                    ("XAUUSD", 0.5, datetime(2025, 3, 14, 17, 30)),
+                                    ("EURUSD", 2, datetime(2025, 3, 16, 8, 15))]:
+        db.add(Trade(user_id=user.id, symbol=symbol, trade_type=TradeType.BUY, order_type=OrderType.MARKET,
+                     lots=lots, open_price=1.10525, status=TradeStatus.CLOSED, profit_loss=12.5,
+                     opened_at=opened_at))
+    db.add(Transaction(user_id=user.id, account_id=account.id, transaction_type=TransactionType.DEPOSIT,
+                       amount=1000, balance_before=0, balance_after=1000,
+                       created_at=datetime(2025, 3, 13, 10, 0)))
+    db.commit()
+
+
+class TestPartitions:
+    def test_one_partition_per_day_with_rows(self, db):
+        add_history(db)
+
+        assert partitions(db, "trades") == [date(2025, 3, 14), date(2025, 3, 16)]
+        assert partitions(db, "transactions") == [date(2025, 3, 13)]
+
+    def test_date_range_is_inclusive(self, db):
+        add_history(db)
+
+        assert partitions(db, "trades", date_from=date(2025, 3, 15)) == [date(2025, 3, 16)]
+        assert partitions(db, "trades", date_to=date(2025, 3, 14)) == [date(2025, 3, 14)]
+
+    def test_missing_pyarrow_is_reported(self, db, tmp_path, monkeypatch):
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+        with pytest.raises(RuntimeError, match="pip install pyarrow"):
+            export_history("sqlite://", tmp_path)
+
+
+class TestParquetFiles:
+    @pytest.fixture(autouse=True)
+    def pyarrow(self):
+        return pytest.importorskip("pyarrow")
+
+    def test_partition_round_trips_with_dictionary_columns(self, db, db_engine, tmp_path, pyarrow):
+        import pyarrow.parquet as pq
+
+        add_history(db)
+
+        exported = export_partition(db_engine, "trades", date(2025, 3, 14), tmp_path)
+
+        assert exported.rows == 2
+        assert exported.path == partition_path(tmp_path, "trades", date(2025, 3, 14))
+        table = pq.read_table(exported.path)
+        assert pyarrow.types.is_dictionary(table.schema.field("symbol").type)
+        assert pyarrow.types.is_dictionary(table.schema.field("status").type)
+        assert table.column("symbol").to_pylist() == ["EURUSD", "XAUUSD"]
+        assert table.column("status").to_pylist() == ["closed", "closed"]
+        assert table.column("lots").to_pylist() == [Decimal("1.00"), Decimal("0.50")]
+
+    def test_full_export_in_process_pool(self, tmp_path):
+        url = f"sqlite:///{tmp_path}/history.db"
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as db:
+            add_history(db)
+        engine.dispose()
+
+        exported = export_history(url, tmp_path / "out", workers=2)
+
+        assert [(p.table, p.day, p.rows) for p in exported] == [
+            ("trades", date(2025, 3, 14), 2),
+            ("trades", date(2025, 3, 16), 1),
+            ("transactions", date(2025, 3, 13), 1),
+        ]
+        assert all(p.path.is_file() for p in exported)
+        assert not list((tmp_path / "out").rglob("*.tmp"))
@@ -0,0 +1,89 @@
+"""
+Query plan checks for the hot access paths.
+
+Each query is explained against the real schema; the test fails if SQLite
+would read a table without an index or sort the result in a temp b-tree,
+i.e. if an index the query depends on is dropped or stops matching.
+"""
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models import (
+    AccountMonthlySummary, BalanceHistory, LiquidityProvider, ProductSpread, RoutingRule, Trade, Transaction
+)
+from app.models.account import Account
+from app.models.trade import TradeStatus
+from app.models.transaction import TransactionStatus
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+END = datetime(2025, 2, 1, tzinfo=timezone.utc)
+
+HOT_QUERIES = {
+    "open_trades_for_user": select(Trade).where(Trade.user_id == 7, Trade.status == TradeStatus.OPEN),
+    "open_positions_by_user": (
+        select(Trade.user_id, func.sum(Trade.lots * Trade.open_price))
+        .outerjoin(ProductSpread, ProductSpread.symbol == Trade.symbol)
+        .where(Trade.status == TradeStatus.OPEN)
+        .group_by(Trade.user_id)
+    ),
+    "trades_for_user_by_date": (
+        select(Trade.id, Trade.opened_at)
+        .where(Trade.user_id == 7, Trade.opened_at >= START, Trade.opened_at < END)
+        .order_by(Trade.opened_at, Trade.id)
+    ),
+    "transactions_for_account_by_date": (
+        select(Transaction.id, Transaction.amount)
+        .where(Transaction.account_id == 3, Transaction.created_at >= START, Transaction.created_at < END)
+        .order_by(Transaction.created_at, Transaction.id)
+    ),
+    "ledger_in_account_order": (
+        select(Transaction.account_id, Transaction.amount)
+        .where(Transaction.status == TransactionStatus.COMPLETED)
+        .order_by(Transaction.account_id, Transaction.created_at, Transaction.id)
+    ),
+    "active_routing_rules_by_priority": (
+        select(RoutingRule).where(RoutingRule.is_active == True)  # noqa: E712
+        .order_by(RoutingRule.priority, RoutingRule.id).limit(50)
+    ),
+    "active_liquidity_providers_by_priority": (
+        select(LiquidityProvider).where(LiquidityProvider.is_active == True)  # noqa: E712
+        .order_by(LiquidityProvider.priority, LiquidityProvider.id)
+    ),
+    "balance_history_for_account": (
+        select(BalanceHistory)
+        .where(BalanceHistory.account_id == 3, BalanceHistory.recorded_at >= START)
+        .order_by(BalanceHistory.recorded_at)
+    ),
+    "monthly_summaries_for_account": (
+        select(AccountMonthlySummary)
+        .where(AccountMonthlySummary.account_id == 3, AccountMonthlySummary.month >= "2025-01")
+        .order_by(AccountMonthlySummary.month)
+    ),
+    "accounts_for_user": select(Account).where(Account.user_id == 7),
+}
+
+
+def query_plan(engine, statement) -> list:
+    compiled = statement.compile(dialect=engine.dialect)
+    params = compiled.construct_params()
+    # Bind the values as the app would, so enum and datetime literals match the stored forms
+    processors = compiled._bind_processors
+    values = tuple(
+        processors[name](params[name]) if name in processors else params[name]
+        for name in compiled.positiontup
+    )
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", values).all()
+    return [row[-1] for row in rows]
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(db_engine, name):
+    plan = query_plan(db_engine, HOT_QUERIES[name])
+
+    # "SCAN t" alone is a full table scan; "SCAN t USING INDEX" walks an index in order
+    full_scans = [step for step in plan if step.startswith("SCAN ") and " USING " not in step]
+    assert not full_scans, f"{name} scans without an index: {plan}"
+    assert not any("TEMP B-TREE" in step for step in plan), f"{name} sorts in a temp b-tree: {plan}"
@@ -0,0 +1,77 @@
+"""
+Tests for per-request SQL query statistics and N+1 detection.
+"""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.models import LiquidityProvider, LPType, RoutingRule, RoutingType
+from app.utils.query_stats import fingerprint
+from tests.conftest import assert_max_queries
+
+
+@pytest.fixture
+def routing_rules(db):
+    for i in range(6):
+        lp = LiquidityProvider(name=f"LP {i}", code=f"LP{i}", lp_type=LPType.ECN)
+        db.add(lp)
+        db.flush()
+        db.add(RoutingRule(name=f"rule-{i}", routing_type=RoutingType.A_BOOK, priority=i, lp_id=lp.id))
+    db.commit()
+
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    first = fingerprint("SELECT * FROM users WHERE id = 1 AND email = 'a@b.c'")
+    second = fingerprint("SELECT *\n  FROM users WHERE id = 42 AND email = 'x@y.z'")
+    in_list = fingerprint("SELECT * FROM users WHERE id IN (?, ?, ?)")
+
+    assert first == second == "SELECT * FROM users WHERE id = ? AND email = ?"
+    assert in_list == "SELECT * FROM users WHERE id IN (?...)"
+
+
+def test_lazy_loading_is_reported_as_repeated_statement(db_engine, routing_rules):
+    SessionLocal = sessionmaker(bind=db_engine)
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, expose_headers=True, repeat_threshold=5)
+
+    def session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/rules")
+    async def rules(db=Depends(session)):
+        return [rule.liquidity_provider.code for rule in db.query(RoutingRule).all()]
+
+    response = TestClient(app).get("/rules")
+
+    assert response.status_code == 200
+    assert response.headers["X-DB-Query-Count"] == "7"
+    assert response.headers["X-DB-Repeated-Queries"] == "1"
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
+
+
+def test_headers_hidden_outside_debug(client, manager):
+    response = client.get("/api/manager/spreads")
+
+    assert "X-DB-Query-Count" not in response.headers
+
+
+class TestQueryBudgets:
+    """Upper bounds on queries per endpoint, so N+1 regressions fail loudly.
+
+    Budgets include one query for reloading the logged-in manager, and cached
+    lists one for reading their table's state.
+    """
+
+    def test_spread_list(self, client, db_engine, manager, spreads):
+        with assert_max_queries(db_engine, 3):
+            client.get("/api/manager/spreads")
+
+    def test_routing_rule_list(self, client, db_engine, manager, routing_rules):
+        with assert_max_queries(db_engine, 3):
+            client.get("/api/manager/routing-rules")
@@ -0,0 +1,118 @@
+"""
+Tests for read-replica routing, using two SQLite files as primary and replica.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.database as database
+from app.database import Base
+from app.models import Account, User, UserRole
+from app.utils.read_replica import ReplicaRouter
+from app.utils.security import create_access_token
+from tests.conftest import FakeClock
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """Primary and replica sessionmakers, each holding the same client, account and manager."""
+    factories = []
+    for name in ("primary", "replica"):
+        engine = create_engine(f"sqlite:///{tmp_path}/{name}.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with factory() as db:
+            db.add(User(id=1, email="client@example.com", hashed_password="x", name="Client",
+                        role=UserRole.CLIENT, is_active=True, is_verified=True))
+            db.add(Account(id=1, user_id=1, account_number="ACC-1", balance=100, wallet_balance=100))
+            db.add(User(id=2, email="manager@example.com", hashed_password="x", name="Manager",
+                        role=UserRole.MANAGER, is_active=True, is_verified=True))
+            db.commit()
+        factories.append(factory)
+    yield factories
+    for factory in factories:
+        factory.kw["bind"].dispose()
+
+
+@pytest.fixture
+def replica_lag():
+    return {"seconds": 0.0}
+
+
+@pytest.fixture
+def router(databases, replica_lag):
+    def probe(conn):
+        if replica_lag["seconds"] is None:
+            raise ConnectionError("replica down")
+        return replica_lag["seconds"]
+
+    primary, replica = databases
+    return ReplicaRouter(primary, replica, max_lag_seconds=5, lag_check_interval=0,
+                         read_your_writes_seconds=10, lag_probe=probe, clock=FakeClock())
+
+
+@pytest.fixture
+def api(router, monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(database, "SessionLocal", router.primary)
+    monkeypatch.setattr(database, "read_router", router)
+    token = create_access_token({"user_id": 2})
+    return TestClient(app, headers={"Authorization": f"Bearer {token}"})
+
+
+class TestRouting:
+    """Where the router sends each read."""
+
+    def test_reads_use_the_replica_when_it_is_current(self, router):
+        assert router.route(user_id=1) == "replica"
+
+    def test_lagging_replica_falls_back_to_primary(self, router, replica_lag):
+        replica_lag["seconds"] = 30
+
+        assert router.route(user_id=1) == "primary"
+
+    def test_unreachable_replica_falls_back_to_primary(self, router, replica_lag):
+        replica_lag["seconds"] = None
+
+        assert router.route(user_id=1) == "primary"
+
+    def test_user_sticks_to_primary_after_own_write(self, router):
+        router.record_write(1)
+
+        assert router.route(user_id=1) == "primary"
+        assert router.route(user_id=2) == "replica"
+        router.clock.now += 11
+        assert router.route(user_id=1) == "replica"
+
+    def test_lag_is_measured_once_per_interval(self, router, replica_lag):
+        router.lag_check_interval = 5
+        router.route()
+        replica_lag["seconds"] = 30
+
+        assert router.route() == "replica"
+        router.clock.now += 5
+        assert router.route() == "primary"
+
+    def test_without_replica_everything_uses_primary(self, databases):
+        router = ReplicaRouter(databases[0])
+
+        assert router.route(user_id=1) == "primary"
+
+
+class TestReadYourWrites:
+    """A manager's deposit is visible on their next read even though the replica lags."""
+
+    def test_commit_pins_user_reads_to_primary(self, api, router):
+        summary_url = "/api/accounts/1/statement/summary"
+        assert api.get(summary_url).json() == []
+
+        response = api.post("/api/transactions/deposit", json={"account_id": 1, "amount": 50})
+        assert response.status_code == 201
+
+        # The replica never received the deposit; the manager still sees it
+        assert [row["deposits"] for row in api.get(summary_url).json()] == [50.0]
+
+        router.clock.now += 11
+        assert api.get(summary_url).json() == []
@@ -0,0 +1,107 @@
+"""
+Tests for the pre-forking launcher.
+"""
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import app.database as database
+from app.models import ProductSpread
+from app.server import warm_caches
+from app.utils.http_cache import resource_cache, table_state
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_warm_caches_fills_default_pages(db_engine, db, monkeypatch):
+    db.add(ProductSpread(symbol="EURUSD", name="Euro / US Dollar", category="forex"))
+    db.commit()
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=db_engine))
+
+    try:
+        warmed = warm_caches()
+
+        assert warmed == ["get_all_spreads", "get_all_branches",
+                          "get_all_liquidity_providers", "get_all_routing_rules"]
+        with sessionmaker(bind=db_engine)() as session:
+            state = table_state(session, ProductSpread)
+        _, body, _ = resource_cache.get(ProductSpread.__tablename__, "", state)
+        assert b'"symbol":"EURUSD"' in body
+    finally:
+        resource_cache.clear()
+
+
+@pytest.fixture
+def launcher(tmp_path):
+    """A two-worker launcher on a free port; yields (process, base_url, log path)."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    env = {
+        **os.environ,
+        "PYTHONPATH": BACKEND_DIR,
+        "DATABASE_URL": f"sqlite:///{tmp_path}/app.db",
+        "AUDIT_LOG_DIR": str(tmp_path / "audit_logs"),
+        "LOG_JSON": "false",
+    }
+    subprocess.run([sys.executable, "-m", "app.init_db", "--migrate"], cwd=tmp_path, env=env,
+                   check=True, capture_output=True)
+    log_path = tmp_path / "server.log"
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "app.server", "--workers", "2", "--host", "127.0.0.1",
+             "--port", str(port), "--graceful-timeout", "2", "--no-pin"],
+            cwd=tmp_path, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for(lambda: len(started_workers(log_path)) == 2)
+        yield process, base_url, log_path
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.1)
+
+
+def started_workers(log_path):
+    """Pid of the latest start of each worker slot."""
+    return dict(re.findall(r"Worker (\d+) started \(pid (\d+)", log_path.read_text()))
+
+
+def health(base_url):
+    with urllib.request.urlopen(f"{base_url}/health", timeout=5) as response:
+        return response.status
+
+
+def test_rolling_restart_and_crash_recovery(launcher):
+    process, base_url, log_path = launcher
+    before = started_workers(log_path)
+    assert health(base_url) == 200
+
+    process.send_signal(signal.SIGHUP)
+    wait_for(lambda: all(started_workers(log_path)[slot] != pid for slot, pid in before.items()))
+    assert health(base_url) == 200
+
+    crashed = started_workers(log_path)["1"]
+    os.kill(int(crashed), signal.SIGKILL)
+    wait_for(lambda: started_workers(log_path)["1"] != crashed)
+    assert health(base_url) == 200
+
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=30) == 0
+    assert (log_path.parent / "audit_logs" / "worker-1").is_dir()
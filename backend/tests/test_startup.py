@@ -0,0 +1,93 @@
+"""
+Tests for worker startup: importing the app is side-effect free and fast.
+
+Each import runs in a fresh interpreter so modules cached by other tests do
+not hide its cost.
+"""
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Cumulative import time of app.main, measured with -X importtime. About
+# 1.4s on a slow CI runner; the budget leaves room for noise, not new weight.
+IMPORT_BUDGET_SECONDS = 3.0
+
+# Heavy modules that only optional features may load, and only on first use
+LAZY_MODULES = ("numpy", "pandas", "pyarrow", "uvicorn", "httpx", "websockets",
+                "app.services.hedging", "app.services.lp_connectors")
+
+
+def import_app(cwd, *flags: str, code: str = "import app.main") -> subprocess.CompletedProcess:
+    env = {
+        **os.environ,
+        "PYTHONPATH": BACKEND_DIR,
+        "DATABASE_URL": f"sqlite:///{cwd}/app.db",
+        "AUDIT_LOG_DIR": str(cwd / "audit_logs"),
+    }
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=cwd, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def test_import_has_no_side_effects(tmp_path):
+    import_app(tmp_path)
+
+    with sqlite3.connect(tmp_path / "app.db") as conn:
+        tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    assert tables == []
+    assert not (tmp_path / "kyc_uploads").exists()
+    assert not (tmp_path / "secure_storage").exists()
+
+
+def test_import_leaves_logging_to_the_entry_point(tmp_path):
+    result = import_app(tmp_path, code=(
+        "import logging, app.main; "
+        "print(len(logging.getLogger().handlers), flush=True); "
+        "app.main.configure_logging(); "
+        "logging.getLogger('app').info('configured')"
+    ))
+
+    unconfigured, logged = result.stdout.splitlines()
+    assert unconfigured == "0"
+    # Plain text unless LOG_JSON is set
+    assert logged.endswith(" - app - INFO - configured")
+
+
+def test_import_skips_heavy_optional_modules(tmp_path):
+    result = import_app(tmp_path, code=(
+        "import sys, app.main; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    ))
+
+    assert result.stdout.strip() == ""
+
+
+def test_import_time_budget(tmp_path):
+    result = import_app(tmp_path, "-X", "importtime")
+
+    cumulative_us = int(re.search(r"\|\s*(\d+) \| app\.main$", result.stderr, re.M).group(1))
+    assert cumulative_us / 1e6 < IMPORT_BUDGET_SECONDS
+
+
+def test_migrate_creates_schema(tmp_path):
+    import_app(tmp_path, code="from app.init_db import main; main(['--migrate'])")
+
+    with sqlite3.connect(tmp_path / "app.db") as conn:
+        tables = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"users", "accounts", "trades", "transactions"} <= tables
+
+
+def test_lifespan_opens_and_closes_audit_log(monkeypatch):
+    import app.main as main
+    from app.utils import audit_log
+
+    monkeypatch.setattr(main.settings, "AUDIT_LOG_ENABLED", True)
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+        assert audit_log.get_audit_log() is not None
+    assert audit_log.get_audit_log() is None
@@ -0,0 +1,102 @@
+"""
+Tests for the nightly swap rollover.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models import ProductSpread, SwapRollover, Trade, User, UserRole
+from app.models.trade import OrderType, TradeStatus, TradeType
+from app.services.swaps import apply_swaps, swap_multiplier
+from tests.conftest import assert_max_queries, login_as
+
+MONDAY = date(2025, 3, 10)
+WEDNESDAY = date(2025, 3, 12)
+SATURDAY = date(2025, 3, 15)
+
+
+@pytest.fixture
+def positions(db):
+    db.add_all([
+        ProductSpread(symbol="EURUSD", name="Euro", swap_long=Decimal("-6.5"), swap_short=Decimal("1.25")),
+        ProductSpread(symbol="XAUUSD", name="Gold", category="commodity", swap_long=Decimal("-20")),
+    ])
+    user = User(email="trader@test.local", hashed_password="x", name="Trader", role=UserRole.CLIENT,
+                is_active=True, is_verified=True)
+    db.add(user)
+    db.flush()
+
+    def trade(symbol, side, lots, status=TradeStatus.OPEN, opened_at=datetime(2025, 3, 3, 9, 0)):
+        return Trade(user_id=user.id, symbol=symbol, trade_type=side, order_type=OrderType.MARKET,
+                     lots=lots, open_price=1.1, status=status, opened_at=opened_at)
+
+    trades = {
+        "eur_long": trade("EURUSD", TradeType.BUY, 2),
+        "eur_short": trade("EURUSD", TradeType.SELL, 0.5),
+        "gold_short": trade("XAUUSD", TradeType.SELL, 1),  # no short swap configured
+        "unknown": trade("BTCUSD", TradeType.BUY, 1),  # no product row
+        "closed": trade("EURUSD", TradeType.BUY, 1, status=TradeStatus.CLOSED),
+        "opened_later": trade("EURUSD", TradeType.BUY, 1, opened_at=datetime(2025, 3, 20, 9, 0)),
+    }
+    db.add_all(trades.values())
+    db.commit()
+    return trades
+
+
+def swaps(db, trades):
+    db.expire_all()
+    return {name: trade.swap for name, trade in trades.items()}
+
+
+def test_multiplier_by_weekday():
+    assert [swap_multiplier(MONDAY + timedelta(days=n)) for n in range(7)] == [1, 1, 3, 1, 1, 0, 0]
+
+
+class TestRollover:
+    def test_open_positions_accrue_their_side_rate(self, db, positions):
+        result = apply_swaps(db, MONDAY)
+
+        assert (result.multiplier, result.positions, result.total_swap) == (1, 2, Decimal("-12.37"))
+        assert swaps(db, positions) == {
+            "eur_long": Decimal("-13.00"), "eur_short": Decimal("0.63"), "gold_short": Decimal("0.00"),
+            "unknown": Decimal("0.00"), "closed": Decimal("0.00"), "opened_later": Decimal("0.00"),
+        }
+
+    def test_triple_day_charges_three_nights_on_top_of_earlier_swap(self, db, positions):
+        apply_swaps(db, MONDAY)
+
+        apply_swaps(db, WEDNESDAY)
+
+        assert swaps(db, positions)["eur_long"] == Decimal("-52.00")
+
+    def test_weekend_and_repeated_days_change_nothing(self, db, positions):
+        assert apply_swaps(db, SATURDAY).positions == 0
+        apply_swaps(db, MONDAY)
+
+        assert apply_swaps(db, MONDAY) is None
+        assert apply_swaps(db, SATURDAY) is None
+        assert swaps(db, positions)["eur_long"] == Decimal("-13.00")
+        assert [(r.day, r.multiplier) for r in db.query(SwapRollover).order_by(SwapRollover.day)] == [
+            (MONDAY, 1), (SATURDAY, 0)]
+
+    def test_one_update_per_chunk(self, db, db_engine, positions):
+        # rollover check and insert, rates, one read and one UPDATE for the first chunk, a read for the
+        # second (nothing to charge), the final empty read, and the rollover totals
+        with assert_max_queries(db_engine, 8):
+            apply_swaps(db, MONDAY, chunk_rows=2)
+
+        assert swaps(db, positions)["eur_short"] == Decimal("0.63")
+
+
+def test_manager_sets_swap_rates(client, db, positions):
+    manager = User(email="manager@test.local", hashed_password="x", name="Manager",
+                   role=UserRole.MANAGER, is_active=True, is_verified=True)
+    db.add(manager)
+    db.commit()
+    login_as(manager)
+
+    response = client.put("/api/manager/spreads/XAUUSD", json={"swap_short": 4.5})
+
+    assert response.status_code == 200
+    assert (response.json()["swap_long"], response.json()["swap_short"]) == (-20.0, 4.5)
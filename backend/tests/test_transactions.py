@@ -0,0 +1,153 @@
+"""
+Tests for transaction posting and idempotency-key handling.
+"""
+import pytest
+
+from app.models import User, UserRole, Account, Transaction
+from app.utils.idempotency import TTLCache, idempotency_store
+from tests.conftest import login_as
+
+
+@pytest.fixture
+def client_account(db, manager):
+    """A verified client with a funded account; requests are made by their manager."""
+    user = User(email="client@test.local", hashed_password="x", name="Client",
+                role=UserRole.CLIENT, is_active=True, is_verified=True)
+    db.add(user)
+    db.flush()
+    account = Account(user_id=user.id, account_number="ACC-TEST-1",
+                      balance=100, wallet_balance=100, trading_balance=0)
+    db.add(account)
+    db.commit()
+    idempotency_store.cache.clear()
+    return account
+
+
+class TestIdempotentDeposits:
+    """Retried postings must resolve to the original transaction."""
+
+    def test_retry_with_same_key_posts_once(self, client, db, client_account):
+        headers = {"Idempotency-Key": "deposit-1"}
+        body = {"account_id": client_account.id, "amount": 50}
+
+        first = client.post("/api/transactions/deposit", json=body, headers=headers)
+        second = client.post("/api/transactions/deposit", json=body, headers=headers)
+
+        assert first.status_code == 201
+        assert second.status_code == 201
+        assert first.json() == second.json()
+        assert db.query(Transaction).count() == 1
+        db.refresh(client_account)
+        assert float(client_account.balance) == 150.0
+
+    def test_replay_falls_back_to_database(self, client, db, client_account):
+        headers = {"Idempotency-Key": "deposit-2"}
+        body = {"account_id": client_account.id, "amount": 25}
+
+        first = client.post("/api/transactions/deposit", json=body, headers=headers)
+        idempotency_store.cache.clear()
+        second = client.post("/api/transactions/deposit", json=body, headers=headers)
+
+        assert second.json()["id"] == first.json()["id"]
+        assert db.query(Transaction).count() == 1
+
+    def test_key_reuse_with_different_amount_conflicts(self, client, client_account):
+        headers = {"Idempotency-Key": "deposit-3"}
+        client.post("/api/transactions/deposit",
+                    json={"account_id": client_account.id, "amount": 10}, headers=headers)
+        response = client.post("/api/transactions/deposit",
+                               json={"account_id": client_account.id, "amount": 11}, headers=headers)
+
+        assert response.status_code == 409
+
+    def test_manager_retry_on_a_client_account_replays(self, client, db, client_account, manager):
+        headers = {"Idempotency-Key": "deposit-4"}
+        body = {"account_id": client_account.id, "amount": 30}
+
+        first = client.post("/api/transactions/deposit", json=body, headers=headers)
+        idempotency_store.cache.clear()
+        second = client.post("/api/transactions/deposit", json=body, headers=headers)
+        admin = User(email="admin@test.local", hashed_password="x", name="Admin",
+                     role=UserRole.ADMIN, is_active=True, is_verified=True)
+        db.add(admin)
+        db.commit()
+        login_as(admin)
+        reused = client.post("/api/transactions/deposit", json=body, headers=headers)
+
+        assert (first.status_code, second.status_code) == (201, 201)
+        assert second.json() == first.json()
+        assert first.json()["user_id"] == client_account.user_id
+        assert reused.status_code == 409
+        assert db.query(Transaction).count() == 1
+
+    @pytest.mark.parametrize("path", ["/api/transactions/deposit", "/api/transactions/withdraw"])
+    def test_client_cannot_post_to_their_own_balance(self, client, db, client_account, path):
+        login_as(db.get(User, client_account.user_id))
+
+        response = client.post(path, json={"account_id": client_account.id, "amount": 50},
+                               headers={"Idempotency-Key": "self-credit"})
+
+        assert response.status_code == 403
+        assert db.query(Transaction).count() == 0
+        db.refresh(client_account)
+        assert float(client_account.balance) == 100.0
+
+    def test_withdraw_rejects_overdraft(self, client, client_account):
+        response = client.post("/api/transactions/withdraw",
+                               json={"account_id": client_account.id, "amount": 1000})
+
+        assert response.status_code == 400
+
+
+def test_ttl_cache_expires_entries():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+
+    assert cache.get("a") is None  # evicted by size
+    now[0] = 11
+    assert cache.get("b") is None  # expired
+
+
+class TestStatements:
+    """Statement export and monthly summaries."""
+
+    def test_posting_updates_monthly_summary(self, client, db, client_account):
+        client.post("/api/transactions/deposit", json={"account_id": client_account.id, "amount": 40})
+        client.post("/api/transactions/withdraw", json={"account_id": client_account.id, "amount": 15})
+
+        summary = client.get(f"/api/accounts/{client_account.id}/statement/summary").json()
+
+        assert len(summary) == 1
+        assert summary[0]["opening_balance"] == 100.0
+        assert summary[0]["closing_balance"] == 125.0
+        assert summary[0]["deposits"] == 40.0
+        assert summary[0]["withdrawals"] == 15.0
+        assert summary[0]["transaction_count"] == 2
+
+    def test_rebuild_matches_incremental_summary(self, client, db, client_account):
+        from app.models import AccountMonthlySummary
+        from app.services.statements import rebuild_monthly_summaries
+
+        client.post("/api/transactions/deposit", json={"account_id": client_account.id, "amount": 40})
+        client.post("/api/transactions/withdraw", json={"account_id": client_account.id, "amount": 15})
+        incremental = client.get(f"/api/accounts/{client_account.id}/statement/summary").json()
+
+        assert rebuild_monthly_summaries(db) == 1
+        db.expire_all()
+        assert db.query(AccountMonthlySummary).count() == 1
+        assert client.get(f"/api/accounts/{client_account.id}/statement/summary").json() == incremental
+
+    def test_statement_streams_csv_and_ndjson(self, client, client_account):
+        client.post("/api/transactions/deposit", json={"account_id": client_account.id, "amount": 40})
+
+        csv_response = client.get(f"/api/accounts/{client_account.id}/statement?format=csv")
+        ndjson_response = client.get(f"/api/accounts/{client_account.id}/statement?format=ndjson")
+
+        assert csv_response.headers["content-type"].startswith("text/csv")
+        assert csv_response.text.splitlines()[0].startswith("record_type,id,time")
+        assert len(csv_response.text.splitlines()) == 2
+        assert ndjson_response.text.count("\n") == 1
+        assert '"type": "deposit"' in ndjson_response.text
@@ -220,12 +220,20 @@ export const getTransactions = async (filters = {}) => {
  * Create a deposit transaction
  * @param {number} accountId - Account ID
  * @param {number} amount - Deposit amount
+ * @param {string} idempotencyKey - Required. Create it once per user action (e.g. with
+ *   crypto.randomUUID()), send the same key on every retry of that action, and replace it
+ *   only after a definite success or failure, so a retried request posts the deposit once
  * @returns {Promise} Transaction response
  */
-export const createDeposit = async (accountId, amount) => {
+export const createDeposit = async (accountId, amount, idempotencyKey) => {
+  if (!idempotencyKey) {
+    throw new Error('createDeposit requires an idempotency key');
+  }
   const response = await api.post('/api/transactions/deposit', {
     account_id: accountId,
     amount,
+  }, {
+    headers: { 'Idempotency-Key': idempotencyKey },
   });
   return response.data;
 };
@@ -234,12 +242,20 @@ export const createDeposit = async (accountId, amount) => {
  * Create a withdrawal transaction
  * @param {number} accountId - Account ID
  * @param {number} amount - Withdrawal amount
+ * @param {string} idempotencyKey - Required. Create it once per user action (e.g. with
+ *   crypto.randomUUID()), send the same key on every retry of that action, and replace it
+ *   only after a definite success or failure, so a retried request posts the withdrawal once
  * @returns {Promise} Transaction response
  */
-export const createWithdrawal = async (accountId, amount) => {
+export const createWithdrawal = async (accountId, amount, idempotencyKey) => {
+  if (!idempotencyKey) {
+    throw new Error('createWithdrawal requires an idempotency key');
+  }
   const response = await api.post('/api/transactions/withdraw', {
     account_id: accountId,
     amount,
+  }, {
+    headers: { 'Idempotency-Key': idempotencyKey },
   });
   return response.data;
 };
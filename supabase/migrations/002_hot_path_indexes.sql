@@ -0,0 +1,54 @@
+-- Imtiaz Trading Platform - Composite and partial indexes for hot access paths
+-- Run this SQL in Supabase SQL Editor after 001_initial_schema.sql
+
+-- =====================================================
+-- TRADES
+-- =====================================================
+
+-- A user's / account's trades in time order (statements, history pages)
+CREATE INDEX IF NOT EXISTS idx_trades_user_open_time ON trades(user_id, open_time DESC);
+CREATE INDEX IF NOT EXISTS idx_trades_account_open_time ON trades(account_id, open_time DESC);
+
+-- Open positions only; closed trades, the bulk of the table, stay out of it
+CREATE INDEX IF NOT EXISTS idx_trades_open_by_user ON trades(user_id) WHERE status = 'OPEN';
+CREATE INDEX IF NOT EXISTS idx_trades_open_by_account ON trades(account_id) WHERE status = 'OPEN';
+
+-- Covered by the composites above, which lead with the same column.
+-- idx_trades_status stays: the partial index serves only status = 'OPEN'.
+DROP INDEX IF EXISTS idx_trades_account_id;
+DROP INDEX IF EXISTS idx_trades_user_id;
+
+-- =====================================================
+-- TRANSACTIONS
+-- =====================================================
+
+-- An account's ledger in time order
+CREATE INDEX IF NOT EXISTS idx_transactions_account_created ON transactions(account_id, created_at DESC);
+
+-- Pending transactions awaiting processing
+CREATE INDEX IF NOT EXISTS idx_transactions_pending ON transactions(created_at) WHERE status = 'PENDING';
+
+-- Covered by idx_transactions_account_created. idx_transactions_status stays for
+-- the statuses other than PENDING.
+DROP INDEX IF EXISTS idx_transactions_account_id;
+
+-- =====================================================
+-- ACCOUNTS, LIQUIDITY PROVIDERS, BALANCE HISTORY
+-- =====================================================
+
+-- A user's active accounts / providers; inactive rows are rarely read
+CREATE INDEX IF NOT EXISTS idx_accounts_active_by_user ON accounts(user_id) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_lp_active_by_user ON liquidity_providers(user_id) WHERE is_active;
+-- idx_accounts_active and idx_lp_active stay for is_active lookups that are not per user
+
+-- Balance history for one account over a time range, and its latest snapshot
+CREATE INDEX IF NOT EXISTS idx_balance_history_account_recorded ON balance_history(account_id, recorded_at DESC);
+
+DROP INDEX IF EXISTS idx_balance_history_account_id;
+
+-- Refresh planner statistics for the new indexes
+ANALYZE trades;
+ANALYZE transactions;
+ANALYZE accounts;
+ANALYZE liquidity_providers;
+ANALYZE balance_history;